@@ -62,6 +62,7 @@ interface BotSettings {
   support_notification_channel_id?: number | string;
   support_role_id?: number | string | null;
   last_updated?: string;
+  settingsVersion?: number;  // Bumped on every settings write (optimistic concurrency for 'update_settings')
   [key: string]: any;  // Allow any additional settings
 }
 
@@ -73,9 +74,26 @@ interface DataStore {
   pendingRagEntries: PendingRagEntry[];
 }
 
+// BANDWIDTH OPTIMIZATION: Every save that changes what the bot syncs bumps a version and records the
+// changed ids, so the bot can ask for ?since=<version> and get a 304 or only the changed entries
+interface ChangelogEntry {
+  version: number;
+  ragEntries: { upserted: string[]; deleted: string[] };
+  autoResponses: { upserted: string[]; deleted: string[] };
+  botSettings: boolean;
+}
+
+interface SyncState {
+  version: number;
+  changelog: ChangelogEntry[];
+}
+
+const CHANGELOG_LIMIT = 200; // Older versions get the full dataset instead of a delta
+
 // Persistent storage using Vercel KV (Redis)
 // Falls back to in-memory if KV not configured
 let kvClient: any = null;
+let inMemorySyncState: SyncState = { version: 0, changelog: [] };
 let inMemoryStore: DataStore = {
   ragEntries: [
     {
@@ -532,6 +550,190 @@ async function saveDataStore(data: DataStore): Promise<void> {
   }
 }
 
+// Settings-only reads/writes for 'update_settings' (the bot no longer round-trips the whole dataset)
+async function getBotSettings(): Promise<BotSettings> {
+  await initKV();
+  if (kvClient) {
+    let botSettings = await kvClient.get('bot_settings');
+    if (typeof botSettings === 'string') {
+      try {
+        botSettings = JSON.parse(botSettings);
+      } catch (e) {
+        console.error('Error parsing bot_settings JSON:', e);
+        botSettings = null;
+      }
+    }
+    return (botSettings && typeof botSettings === 'object') ? botSettings : inMemoryStore.botSettings;
+  }
+  return inMemoryStore.botSettings;
+}
+
+// Compare-and-set for bot_settings: only writes if the stored settingsVersion still equals ARGV[1]
+// Runs inside Redis, so no other write can land between the version check and the SET
+const SAVE_SETTINGS_IF_VERSION_SCRIPT = `
+local current = redis.call('GET', KEYS[1])
+local version = 0
+if current then
+  local ok, settings = pcall(cjson.decode, current)
+  if ok and type(settings) == 'table' then
+    version = tonumber(settings.settingsVersion) or 0
+  end
+end
+if version ~= tonumber(ARGV[1]) then
+  return 0
+end
+redis.call('SET', KEYS[1], ARGV[2])
+return 1
+`;
+
+// Save botSettings only if the stored settings are still at expectedVersion; false = someone else wrote first
+async function saveBotSettingsIfVersion(expectedVersion: number, botSettings: BotSettings): Promise<boolean> {
+  await initKV();
+  if (kvClient) {
+    const args = [String(expectedVersion), JSON.stringify(botSettings)];
+    // ioredis: eval(script, numKeys, ...keys, ...args); Vercel KV: eval(script, keys, args)
+    const saved = typeof kvClient.defineCommand === 'function'
+      ? await kvClient.eval(SAVE_SETTINGS_IF_VERSION_SCRIPT, 1, 'bot_settings', ...args)
+      : await kvClient.eval(SAVE_SETTINGS_IF_VERSION_SCRIPT, ['bot_settings'], args);
+    return Number(saved) === 1;
+  }
+  // In-memory: the check and the write run without an await in between, so they can't interleave
+  if ((Number(inMemoryStore.botSettings?.settingsVersion) || 0) !== expectedVersion) {
+    return false;
+  }
+  inMemoryStore = { ...inMemoryStore, botSettings };
+  return true;
+}
+
+// Data version counter and changelog live in separate keys so a save can bump and append atomically
+const DATA_VERSION_KEY = 'data_version';
+const DATA_CHANGELOG_KEY = 'data_changelog';
+const LEGACY_SYNC_STATE_KEY = 'data_sync_state'; // Single JSON blob written by earlier deployments
+
+// INCR the version and push the changelog entry (ARGV[1], JSON without its version) in one step,
+// trimmed to the last ARGV[2] entries. Concurrent saves get distinct versions and none is lost.
+// The entry JSON is only prefixed with the version, never re-encoded by cjson (it turns [] into {}).
+const APPEND_CHANGELOG_SCRIPT = `
+if not redis.call('GET', KEYS[1]) then
+  local version = 0
+  local legacy = redis.call('GET', KEYS[3])
+  if legacy then
+    local ok, state = pcall(cjson.decode, legacy)
+    if ok and type(state) == 'table' then
+      version = tonumber(state.version) or 0
+    end
+  end
+  redis.call('SET', KEYS[1], version)
+end
+local version = redis.call('INCR', KEYS[1])
+redis.call('RPUSH', KEYS[2], '{"version":' .. version .. ',' .. string.sub(ARGV[1], 2))
+redis.call('LTRIM', KEYS[2], -tonumber(ARGV[2]), -1)
+return version
+`;
+
+async function getSyncState(): Promise<SyncState> {
+  await initKV();
+  if (kvClient) {
+    try {
+      // Version first: an entry appended after this read is dropped below instead of skipped over later
+      const version = Number(await kvClient.get(DATA_VERSION_KEY)) || 0;
+      const items: any[] = (await kvClient.lrange(DATA_CHANGELOG_KEY, 0, -1)) || [];
+      const changelog: ChangelogEntry[] = items
+        .map(item => (typeof item === 'string' ? JSON.parse(item) : item))
+        .filter(entry => entry && typeof entry.version === 'number' && entry.version <= version);
+      return { version, changelog };
+    } catch (error) {
+      console.error('Error reading data sync state:', error);
+      return { version: 0, changelog: [] };
+    }
+  }
+  return inMemorySyncState;
+}
+
+// Record one change under a new version; returns that version
+async function bumpDataVersion(change: Omit<ChangelogEntry, 'version'>): Promise<number> {
+  await initKV();
+  if (kvClient) {
+    const keys = [DATA_VERSION_KEY, DATA_CHANGELOG_KEY, LEGACY_SYNC_STATE_KEY];
+    const args = [JSON.stringify(change), String(CHANGELOG_LIMIT)];
+    // ioredis: eval(script, numKeys, ...keys, ...args); Vercel KV: eval(script, keys, args)
+    const version = typeof kvClient.defineCommand === 'function'
+      ? await kvClient.eval(APPEND_CHANGELOG_SCRIPT, keys.length, ...keys, ...args)
+      : await kvClient.eval(APPEND_CHANGELOG_SCRIPT, keys, args);
+    return Number(version);
+  }
+  // In-memory: no await between reading and replacing the state, so saves can't interleave
+  const version = inMemorySyncState.version + 1;
+  inMemorySyncState = {
+    version,
+    changelog: [...inMemorySyncState.changelog, { version, ...change }].slice(-CHANGELOG_LIMIT),
+  };
+  return version;
+}
+
+function diffById<T extends { id: string }>(previous: T[], next: T[]): { upserted: string[]; deleted: string[] } {
+  const before = new Map(previous.map(entry => [entry.id, JSON.stringify(entry)]));
+  const nextIds = new Set(next.map(entry => entry.id));
+  return {
+    upserted: next.filter(entry => before.get(entry.id) !== JSON.stringify(entry)).map(entry => entry.id),
+    deleted: previous.filter(entry => !nextIds.has(entry.id)).map(entry => entry.id),
+  };
+}
+
+// Bump the data version if a save changed anything the bot syncs (RAG entries, auto-responses, settings)
+async function recordChange(previous: DataStore, next: DataStore): Promise<void> {
+  const ragEntries = diffById(previous.ragEntries, next.ragEntries);
+  const autoResponses = diffById(previous.autoResponses, next.autoResponses);
+  const botSettings = JSON.stringify(previous.botSettings) !== JSON.stringify(next.botSettings);
+  if (!ragEntries.upserted.length && !ragEntries.deleted.length &&
+      !autoResponses.upserted.length && !autoResponses.deleted.length && !botSettings) {
+    return;
+  }
+  await appendChangelog(ragEntries, autoResponses, botSettings);
+}
+
+async function appendChangelog(
+  ragEntries: ChangelogEntry['ragEntries'],
+  autoResponses: ChangelogEntry['autoResponses'],
+  botSettings: boolean
+): Promise<void> {
+  try {
+    const version = await bumpDataVersion({ ragEntries, autoResponses, botSettings });
+    console.log(`🔢 Data version ${version}: RAG +${ragEntries.upserted.length}/-${ragEntries.deleted.length}, auto +${autoResponses.upserted.length}/-${autoResponses.deleted.length}${botSettings ? ', settings' : ''}`);
+  } catch (error) {
+    // Worst case the bot picks the change up on its next full sync
+    console.error('Error recording data version:', error);
+  }
+}
+
+// Changes since a version, or null if the changelog no longer reaches back that far
+function buildDelta(data: DataStore, state: SyncState, since: number) {
+  const entries = state.changelog.filter(entry => entry.version > since);
+  if (since > state.version || !entries.length || entries[0].version !== since + 1) {
+    return null;
+  }
+  const collect = <T extends { id: string }>(current: T[], key: 'ragEntries' | 'autoResponses') => {
+    const changed = new Set<string>();
+    for (const entry of entries) {
+      entry[key].upserted.forEach(id => changed.add(id));
+      entry[key].deleted.forEach(id => changed.add(id));
+    }
+    const byId = new Map(current.map(item => [item.id, item]));
+    return {
+      upserted: [...changed].filter(id => byId.has(id)).map(id => byId.get(id) as T),
+      deleted: [...changed].filter(id => !byId.has(id)),
+    };
+  };
+  return {
+    delta: true,
+    since,
+    version: state.version,
+    ragEntries: collect(data.ragEntries, 'ragEntries'),
+    autoResponses: collect(data.autoResponses, 'autoResponses'),
+    ...(entries.some(entry => entry.botSettings) ? { botSettings: data.botSettings } : {}),
+  };
+}
+
 export default async function handler(req: VercelRequest, res: VercelResponse) {
   // Enable CORS
   res.setHeader('Access-Control-Allow-Origin', '*');
@@ -545,8 +747,30 @@ export default async function handler(req: VercelRequest, res: VercelResponse) {
   if (req.method === 'GET') {
     // Return all data with caching to reduce bandwidth
     try {
+      const syncState = await getSyncState();
+      res.setHeader('X-Data-Version', String(syncState.version));
+      
+      // Delta sync: ?since=<version> the caller already has
+      const sinceParam = Array.isArray(req.query.since) ? req.query.since[0] : req.query.since;
+      const since = sinceParam !== undefined ? Number(sinceParam) : NaN;
+      if (Number.isInteger(since) && since === syncState.version) {
+        // Nothing changed - answered without loading the dataset
+        res.setHeader('Cache-Control', 'no-cache');
+        return res.status(304).end();
+      }
+      
       const data = await getDataStore();
       
+      if (Number.isInteger(since)) {
+        const delta = buildDelta(data, syncState, since);
+        if (delta) {
+          console.log(`📤 GET /api/data?since=${since} returning delta to v${syncState.version}: ${delta.ragEntries.upserted.length + delta.ragEntries.deleted.length} RAG, ${delta.autoResponses.upserted.length + delta.autoResponses.deleted.length} auto-response changes`);
+          res.setHeader('Cache-Control', 'no-cache');
+          return res.status(200).json(delta);
+        }
+        // Changelog doesn't reach back to `since` - fall through to the full dataset
+      }
+      
       // Generate ETag from data hash for conditional requests
       const crypto = await import('crypto');
       const dataString = JSON.stringify(data);
@@ -569,7 +793,7 @@ export default async function handler(req: VercelRequest, res: VercelResponse) {
       res.setHeader('Cache-Control', 'public, max-age=60, must-revalidate'); // Cache for 60 seconds
       res.setHeader('Content-Type', 'application/json');
       
-      return res.status(200).json(data);
+      return res.status(200).json({ ...data, version: syncState.version });
     } catch (error) {
       console.error('Error fetching data:', error);
       // Only return inMemoryStore as last resort (when Redis fails)
@@ -605,6 +829,44 @@ export default async function handler(req: VercelRequest, res: VercelResponse) {
         }
       }
 
+      if (action === 'update_settings') {
+        // BANDWIDTH OPTIMIZATION: Bot sends only the changed settings keys, based on a settingsVersion
+        // 409 = settings changed since baseVersion (or while this request was merging); the bot merges the
+        // returned settings and retries. The version check and the write are one atomic compare-and-set.
+        try {
+          const changes = req.body.changes;
+          if (!changes || typeof changes !== 'object' || Array.isArray(changes)) {
+            return res.status(400).json({ error: 'Missing changes object' });
+          }
+          const current = await getBotSettings();
+          const currentVersion = Number(current.settingsVersion) || 0;
+          const baseVersion = req.body.baseVersion;
+          if (baseVersion !== undefined && Number(baseVersion) !== currentVersion) {
+            return res.status(409).json({
+              error: 'Settings were changed since baseVersion',
+              settingsVersion: currentVersion,
+              botSettings: current,
+            });
+          }
+          const { settingsVersion: _ignored, ...safeChanges } = changes;
+          const updated: BotSettings = { ...current, ...safeChanges, settingsVersion: currentVersion + 1 };
+          if (!(await saveBotSettingsIfVersion(currentVersion, updated))) {
+            const latest = await getBotSettings();
+            return res.status(409).json({
+              error: 'Settings were changed by another write',
+              settingsVersion: Number(latest.settingsVersion) || 0,
+              botSettings: latest,
+            });
+          }
+          await appendChangelog({ upserted: [], deleted: [] }, { upserted: [], deleted: [] }, true);
+          console.log(`⚙️ Settings v${updated.settingsVersion}: updated ${Object.keys(safeChanges).join(', ')}`);
+          return res.status(200).json({ success: true, settingsVersion: updated.settingsVersion });
+        } catch (error: any) {
+          console.error('Error updating settings:', error);
+          return res.status(500).json({ error: `Failed to update settings: ${error.message}` });
+        }
+      }
+
       if (action === 'update_leaderboard') {
         // Handle leaderboard update
         try {
@@ -648,6 +910,14 @@ export default async function handler(req: VercelRequest, res: VercelResponse) {
         pendingRagEntries: (pendingRagEntries && Array.isArray(pendingRagEntries)) ? pendingRagEntries : currentData.pendingRagEntries,
       };
       
+      // Full saves that change the settings bump settingsVersion too, so a stale 'update_settings' gets a 409
+      if (JSON.stringify(updatedData.botSettings) !== JSON.stringify(currentData.botSettings)) {
+        updatedData.botSettings = {
+          ...updatedData.botSettings,
+          settingsVersion: (Number(currentData.botSettings?.settingsVersion) || 0) + 1,
+        };
+      }
+      
       console.log(`📝 Saving data: ${updatedData.ragEntries.length} RAG entries, ${updatedData.autoResponses.length} auto-responses, ${updatedData.slashCommands.length} slash commands`);
       
       // Check if we have persistent storage before saving
@@ -656,6 +926,7 @@ export default async function handler(req: VercelRequest, res: VercelResponse) {
         console.error('   Please configure Vercel KV or Redis. See SETUP_VERCEL_KV.md for instructions.');
         // Still save to in-memory as fallback, but warn the user
         await saveDataStore(updatedData);
+        await recordChange(currentData, updatedData);
         return res.status(200).json({ 
           success: true, 
           data: updatedData,
@@ -665,6 +936,7 @@ export default async function handler(req: VercelRequest, res: VercelResponse) {
       
       console.log(`📝 Before save - RAG: ${updatedData.ragEntries.length}, Auto: ${updatedData.autoResponses.length}`);
       await saveDataStore(updatedData);
+      await recordChange(currentData, updatedData);
       
       // Verify the save by reading back (only if we have persistent storage)
       if (kvClient) {
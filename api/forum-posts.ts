@@ -27,6 +27,26 @@ interface CloseThreadRequest {
   channelId: string;
 }
 
+// BANDWIDTH OPTIMIZATION: Per-post deltas from the bot (one new message / a status change)
+// instead of the whole post on every Discord message
+interface AppendMessageRequest {
+  postId: string;
+  message: ForumPost['conversation'][number];
+  status?: string;
+}
+
+interface SetStatusRequest {
+  postId: string;
+  status: string;
+}
+
+// Bot's write-behind queue: every change to each post within its flush window, in one request
+interface BatchUpdate {
+  postId: string;
+  messages?: ForumPost['conversation'];
+  status?: string;
+}
+
 // RESOURCE OPTIMIZATION: Forum posts are stored in-memory only (not persisted to Vercel KV to save costs)
 // Data resets on restart but saves significant storage and API costs
 let inMemoryForumPosts: ForumPost[] = [];
@@ -38,6 +58,12 @@ async function getForumPosts(): Promise<ForumPost[]> {
   return inMemoryForumPosts;
 }
 
+// Find a post by Discord thread ID or dashboard ID (POST-<threadId>)
+function findPostIndex(posts: ForumPost[], postId: string): number {
+  const threadId = String(postId).replace('POST-', '');
+  return posts.findIndex(p => p.postId === threadId || p.id === `POST-${threadId}` || p.id === postId);
+}
+
 async function saveForumPosts(posts: ForumPost[]): Promise<void> {
   // RESOURCE OPTIMIZATION: Forum posts are NOT saved to Vercel KV to save storage costs
   // Only use in-memory storage - data resets on restart but saves significant Vercel costs
@@ -59,7 +85,15 @@ export default async function handler(req: VercelRequest, res: VercelResponse) {
   if (req.method === 'GET') {
     // Return all forum posts with caching to reduce bandwidth
     try {
-      const posts = await getForumPosts();
+      const allPosts = await getForumPosts();
+      
+      // BANDWIDTH OPTIMIZATION: ?postId= returns just that post (the bot fetches single posts on a cache miss)
+      const requestedPostId = req.query?.postId;
+      let posts = allPosts;
+      if (typeof requestedPostId === 'string' && requestedPostId) {
+        const index = findPostIndex(allPosts, requestedPostId);
+        posts = index >= 0 ? [allPosts[index]] : [];
+      }
       
       // Generate ETag from posts hash for conditional requests
       const crypto = await import('crypto');
@@ -140,6 +174,73 @@ export default async function handler(req: VercelRequest, res: VercelResponse) {
         return res.status(404).json({ error: 'Post not found' });
       }
 
+      if (action === 'append_message') {
+        // Append one message to a post's conversation (optionally changing its status)
+        const { postId, message, status }: AppendMessageRequest = req.body;
+        if (!postId || !message) {
+          return res.status(400).json({ error: 'Missing postId or message' });
+        }
+        const posts = await getForumPosts();
+        const index = findPostIndex(posts, postId);
+        if (index < 0) {
+          // Bot re-sends the full post with action 'update'
+          return res.status(404).json({ error: 'Post not found' });
+        }
+        posts[index].conversation = [...(posts[index].conversation || []), message];
+        if (status) {
+          posts[index].status = status;
+        }
+        await saveForumPosts(posts);
+        return res.status(200).json({
+          success: true,
+          conversationLength: posts[index].conversation.length,
+          status: posts[index].status
+        });
+      }
+
+      if (action === 'set_status') {
+        // Change a post's status only
+        const { postId, status }: SetStatusRequest = req.body;
+        if (!postId || !status) {
+          return res.status(400).json({ error: 'Missing postId or status' });
+        }
+        const posts = await getForumPosts();
+        const index = findPostIndex(posts, postId);
+        if (index < 0) {
+          return res.status(404).json({ error: 'Post not found' });
+        }
+        posts[index].status = status;
+        await saveForumPosts(posts);
+        return res.status(200).json({ success: true, status });
+      }
+
+      if (action === 'batch') {
+        // Apply queued changes for many posts with a single save
+        const updates: BatchUpdate[] = Array.isArray(req.body.updates) ? req.body.updates : [];
+        const posts = await getForumPosts();
+        const missing: string[] = [];
+        let applied = 0;
+        for (const update of updates) {
+          const index = update?.postId ? findPostIndex(posts, update.postId) : -1;
+          if (index < 0) {
+            // Bot re-sends these posts in full with action 'update'
+            if (update?.postId) missing.push(update.postId);
+            continue;
+          }
+          if (update.messages?.length) {
+            posts[index].conversation = [...(posts[index].conversation || []), ...update.messages];
+          }
+          if (update.status) {
+            posts[index].status = update.status;
+          }
+          applied++;
+        }
+        if (applied > 0) {
+          await saveForumPosts(posts);
+        }
+        return res.status(200).json({ success: true, applied, missing });
+      }
+
       if (action === 'close-thread') {
         // Close a Discord thread
         const { threadId }: CloseThreadRequest = req.body;
@@ -2,18 +2,31 @@ import os
 import asyncio
 import json
 import re
+import math
+import sys
+import heapq
+import time
+import hashlib
+import functools
+import contextlib
+import threading
+import sqlite3
+import signal
+from collections import Counter, OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from pathlib import Path
+from urllib.parse import urlsplit
 import discord
 from discord import app_commands
 from discord.ext import commands
 from discord.ext import tasks
-from groq import Groq
+from groq import Groq, AsyncGroq, RateLimitError, NotFoundError, APITimeoutError, AuthenticationError, PermissionDeniedError
+import httpx
 from dotenv import load_dotenv
 import aiohttp
 import numpy as np
 from sentence_transformers import SentenceTransformer
-from sklearn.metrics.pairwise import cosine_similarity
 try:
     from pinecone import Pinecone, ServerlessSpec
     PINECONE_AVAILABLE = True
@@ -47,12 +60,45 @@ ENABLE_EMBEDDINGS_EXPLICIT = os.getenv('ENABLE_EMBEDDINGS', '').lower() == 'true
 # Set FORCE_KEYWORD_SEARCH=true to completely disable embeddings and save Railway CPU
 FORCE_KEYWORD_SEARCH = os.getenv('FORCE_KEYWORD_SEARCH', '').lower() == 'true'
 
+# Vector backend: 'pinecone' (cloud index, default) or 'local' (in-process NumPy index)
+# Local keeps all RAG vectors in one float32 matrix - top-k is a single dot product (microseconds)
+# instead of a 100-300ms Pinecone round-trip. Does not need PINECONE_API_KEY.
+VECTOR_BACKEND = os.getenv('VECTOR_BACKEND', 'pinecone').lower()
+
+# CPU OPTIMIZATION: RAG vectors are persisted here (memory-mapped .npy + JSON sidecar) so
+# restarts/redeploys only re-encode entries whose text changed. Point at a Railway volume to survive redeploys.
+EMBEDDING_MODEL_NAME = 'all-MiniLM-L6-v2'
+EMBEDDING_CACHE_DIR = os.getenv('EMBEDDING_CACHE_DIR', '.cache/embeddings')
+# COST OPTIMIZATION: AI answers are also kept in a SQLite file here so restarts don't re-pay Groq for them
+# (empty = memory only). Point at a Railway volume to survive redeploys.
+AI_CACHE_DIR = os.getenv('AI_CACHE_DIR', '.cache/ai_answers')
+AI_CACHE_DISK_MAX_ENTRIES = max(1, int(os.getenv('AI_CACHE_DISK_MAX_ENTRIES', '5000')))
+# Bulk indexing encodes this many entries per model.encode call (off the event loop, in a worker thread)
+EMBEDDING_BATCH_SIZE = max(1, int(os.getenv('EMBEDDING_BATCH_SIZE', '64')))
+# Query encoding + vector search run on a bounded thread pool so the Discord event loop never blocks on them
+RETRIEVAL_MAX_WORKERS = max(1, int(os.getenv('RETRIEVAL_MAX_WORKERS', '4')))
+RETRIEVAL_TIMEOUT_SECONDS = float(os.getenv('RETRIEVAL_TIMEOUT_SECONDS', '8'))
+# Retrieval mode: 'vector' (vector search, keyword search only as fallback) or 'hybrid'
+# Hybrid runs vector + BM25 keyword search concurrently and fuses them with reciprocal-rank fusion;
+# the better top-2 precision lets answers use fewer knowledge base entries (fewer prompt tokens)
+RETRIEVAL_MODE = os.getenv('RETRIEVAL_MODE', 'vector').lower()
+RAG_CONTEXT_ENTRIES = max(1, int(os.getenv('RAG_CONTEXT_ENTRIES', '2' if RETRIEVAL_MODE == 'hybrid' else '3')))
+# Stream AI answers into the Discord message as they are generated (edited in place every STREAM_EDIT_INTERVAL seconds)
+STREAM_AI_RESPONSES = os.getenv('STREAM_AI_RESPONSES', 'true').lower() == 'true'
+STREAM_EDIT_INTERVAL = max(1.0, float(os.getenv('STREAM_EDIT_INTERVAL', '1.2')))  # Discord allows ~5 edits / 5s per channel
+# LATENCY OPTIMIZATION: Total time budget per answer (retrieval + key waits + every model attempt)
+FORUM_ANSWER_DEADLINE_SECONDS = float(os.getenv('FORUM_ANSWER_DEADLINE_SECONDS', '25'))
+ASK_ANSWER_DEADLINE_SECONDS = float(os.getenv('ASK_ANSWER_DEADLINE_SECONDS', '10'))
+
 # CRITICAL: Only enable embeddings if Pinecone is configured (prevents expensive Railway CPU usage)
 # Even if ENABLE_EMBEDDINGS=true is set, don't enable if Pinecone isn't configured
 if FORCE_KEYWORD_SEARCH:
     print("💰 FORCE_KEYWORD_SEARCH=true - Using keyword search only to save Railway CPU costs")
     print("   💡 Embeddings disabled (no model loading, no query encoding = zero CPU cost)")
     ENABLE_EMBEDDINGS = False
+elif VECTOR_BACKEND == 'local':
+    # Local backend never talks to Pinecone, so it doesn't need Pinecone config
+    ENABLE_EMBEDDINGS = True
 elif ENABLE_EMBEDDINGS_EXPLICIT and not HAS_PINECONE_CONFIG:
     print("⚠️ WARNING: ENABLE_EMBEDDINGS=true but Pinecone not configured!")
     print("   ⚠️ Disabling embeddings to prevent expensive Railway CPU usage")
@@ -63,14 +109,19 @@ else:
     # NOTE: Even with Pinecone, query encoding uses CPU. Set FORCE_KEYWORD_SEARCH=true to disable.
     ENABLE_EMBEDDINGS = ENABLE_EMBEDDINGS_EXPLICIT or HAS_PINECONE_CONFIG
 
-# Use Pinecone if available and embeddings are enabled
-USE_PINECONE = ENABLE_EMBEDDINGS and HAS_PINECONE_CONFIG and not FORCE_KEYWORD_SEARCH
+# Use the in-process vector index if selected, otherwise Pinecone if available and embeddings are enabled
+USE_LOCAL_VECTOR_INDEX = ENABLE_EMBEDDINGS and VECTOR_BACKEND == 'local'
+USE_PINECONE = ENABLE_EMBEDDINGS and HAS_PINECONE_CONFIG and not FORCE_KEYWORD_SEARCH and not USE_LOCAL_VECTOR_INDEX
 
 # 1. LOAD ENVIRONMENT VARIABLES FROM .env FILE
 DISCORD_BOT_TOKEN = os.getenv('DISCORD_BOT_TOKEN')
 SUPPORT_FORUM_CHANNEL_ID_STR = os.getenv('SUPPORT_FORUM_CHANNEL_ID')
 DISCORD_GUILD_ID_STR = os.getenv('DISCORD_GUILD_ID', '1265864190883532872')  # Server ID for slash command sync
 DATA_API_URL = os.getenv('DATA_API_URL', 'https://your-vercel-app.vercel.app/api/data')
+# Dashboard data sync: a cheap conditional/delta check every DATA_SYNC_INTERVAL_MINUTES,
+# plus a full (ETag-conditional) download every DATA_FULL_SYNC_HOURS as a safety net
+DATA_SYNC_INTERVAL_MINUTES = max(1.0, float(os.getenv('DATA_SYNC_INTERVAL_MINUTES', '5')))
+DATA_FULL_SYNC_HOURS = max(0.5, float(os.getenv('DATA_FULL_SYNC_HOURS', '6')))
 
 # Load API keys from environment variable
 # All keys (GROQ_API_KEY, GROQ_API_KEY_2 through GROQ_API_KEY_20) are used for all operations
@@ -118,6 +169,9 @@ print(f"✓ Loaded {len(GROQ_API_KEYS)} valid Groq API key(s) for all operations
 if FORCE_KEYWORD_SEARCH:
     print("💰 FORCE_KEYWORD_SEARCH=true - Using keyword search only (ZERO CPU cost)")
     print("   ✅ No embedding model loading, no query encoding = minimal Railway costs")
+elif USE_LOCAL_VECTOR_INDEX:
+    print("🧮 Local vector index enabled (VECTOR_BACKEND=local) - in-process search, no Pinecone round-trips")
+    print("   ⚠️ NOTE: RAG entries are encoded on this worker when the knowledge base changes")
 elif USE_PINECONE:
     print("🌲 Pinecone vector search enabled - cost-effective cloud-based vector search")
     print("   ⚠️ NOTE: Query encoding still uses CPU (minimal per query)")
@@ -149,86 +203,340 @@ except ValueError:
     print("FATAL ERROR: 'DISCORD_GUILD_ID' is not a valid number.")
     exit()
 
+# --- REQUEST DEADLINES ---
+class DeadlineExceeded(asyncio.TimeoutError):
+    """The answer's time budget ran out - callers answer with degraded_answer() instead"""
+
+class Deadline:
+    """Time budget for one answer, created at the entry point and passed down to every step
+    
+    Each step (retrieval, waiting for key budget, each model attempt) spends at most what remains,
+    so a slow model or an exhausted key can't stall a forum post past its budget.
+    Deadline() without seconds never expires.
+    """
+    
+    def __init__(self, seconds=None):
+        self.seconds = seconds
+        self.expires_at = None if seconds is None else time.monotonic() + seconds
+    
+    def remaining(self):
+        if self.expires_at is None:
+            return float('inf')
+        return max(0.0, self.expires_at - time.monotonic())
+    
+    @property
+    def expired(self):
+        return self.remaining() <= 0
+    
+    def cap(self, timeout):
+        """timeout, shortened to whatever is left of the budget"""
+        return min(timeout, self.remaining())
+    
+    def timeout(self):
+        """remaining() for asyncio.wait_for (None when there is no deadline)"""
+        return None if self.expires_at is None else self.remaining()
+    
+    def check(self, step):
+        """Raise DeadlineExceeded if the budget is gone before step starts"""
+        if self.expired:
+            raise DeadlineExceeded(f"{self.seconds:.0f}s answer deadline reached before {step}")
+
 # --- GROQ API KEY ROTATION SYSTEM ---
+# Per-key budgets from the Groq console (free tier defaults). Every key gets its own buckets.
+GROQ_RPM_LIMIT = max(1, int(os.getenv('GROQ_RPM_LIMIT', '30')))  # Requests per minute
+GROQ_TPM_LIMIT = max(1, int(os.getenv('GROQ_TPM_LIMIT', '8000')))  # Tokens per minute (prompt + completion)
+
+class TokenBucket:
+    """Continuously refilling token bucket (capacity tokens, refilled at capacity per period seconds)
+    
+    All queries are O(1): the level is brought up to date from the elapsed time on access.
+    reserve() always succeeds but may leave the bucket in debt; the caller then waits exactly
+    the returned delay, so concurrent waiters queue up in order without polling.
+    """
+    
+    def __init__(self, capacity, period=60.0):
+        self.capacity = float(capacity)
+        self.rate = self.capacity / period  # Tokens per second
+        self._level = self.capacity
+        self._updated = time.monotonic()
+    
+    def _refill(self):
+        now = time.monotonic()
+        self._level = min(self.capacity, self._level + (now - self._updated) * self.rate)
+        self._updated = now
+    
+    def available(self):
+        self._refill()
+        return self._level
+    
+    def wait_time(self, amount=1.0):
+        """Seconds until amount tokens are available (0 if they are now)"""
+        self._refill()
+        return max(0.0, (min(amount, self.capacity) - self._level) / self.rate)
+    
+    def reserve(self, amount=1.0):
+        """Take amount tokens now and return how long the caller must wait before using them"""
+        delay = self.wait_time(amount)
+        self._level -= min(amount, self.capacity)
+        return delay
+    
+    def refund(self, amount):
+        """Give back (positive) or take more (negative) tokens, e.g. once real usage is known"""
+        self._refill()
+        self._level = min(self.capacity, self._level + amount)
+
+_GROQ_DURATION_PATTERN = re.compile(r'(\d+(?:\.\d+)?)(ms|h|m|s)')
+
+def parse_groq_duration(value):
+    """Seconds from a Groq reset header ('7.66s', '2m59.56s', '1h2m', '120ms'); None if missing/unparseable"""
+    if not value:
+        return None
+    try:
+        return float(value)  # retry-after is plain seconds
+    except ValueError:
+        pass
+    parts = _GROQ_DURATION_PATTERN.findall(value)
+    if not parts:
+        return None
+    scale = {'ms': 0.001, 's': 1, 'm': 60, 'h': 3600}
+    return sum(float(amount) * scale[unit] for amount, unit in parts)
+
+def _header_int(headers, name):
+    try:
+        return int(float(headers.get(name)))
+    except (TypeError, ValueError):
+        return None
+
+class KeyRateLimiter:
+    """Requests-per-minute and tokens-per-minute buckets for one Groq API key
+    
+    The buckets pace sending locally; update_from_headers() keeps them honest with what Groq
+    reports on every response (x-ratelimit-* headers, retry-after on 429). A key whose
+    server-side budget is spent is retired exactly until the reported reset time.
+    """
+    
+    def __init__(self, rpm=GROQ_RPM_LIMIT, tpm=GROQ_TPM_LIMIT):
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.retired_until = 0.0  # time.monotonic() until which the key must not be used
+        self.requests_left = None  # Server-reported requests remaining (daily window), minus our sends since
+        self.requests_reset_at = 0.0
+        self.requests_exhausted_until = 0.0  # Set by our own pacing; cleared if the server reports budget left
+        self.last_headers = {}  # Latest raw x-ratelimit values, for /check_api_keys
+    
+    def retired_for(self):
+        """Seconds until this key may be used again (0 if usable now)"""
+        return max(0.0, max(self.retired_until, self.requests_exhausted_until) - time.monotonic())
+    
+    def retire(self, seconds):
+        """Keep the key out of rotation for seconds (never shortens an existing retirement)"""
+        self.retired_until = max(self.retired_until, time.monotonic() + seconds)
+    
+    def wait_time(self, estimated_tokens=0):
+        return max(self.retired_for(), self.requests.wait_time(1), self.tokens.wait_time(estimated_tokens))
+    
+    async def acquire(self, estimated_tokens=0, max_wait=None):
+        """Reserve one request plus estimated_tokens, sleeping exactly as long as the budgets require
+        
+        If that would take longer than max_wait seconds, raises DeadlineExceeded without reserving anything.
+        """
+        if max_wait is not None:
+            needed = self.wait_time(estimated_tokens)
+            if needed > max_wait:
+                raise DeadlineExceeded(f"key budget frees up in {needed:.1f}s, only {max_wait:.1f}s left")
+        delay = max(self.retired_for(), self.requests.reserve(1), self.tokens.reserve(estimated_tokens))
+        if self.requests_left is not None:
+            # Pace against the server's request budget: the send that uses the last one retires the key until reset
+            self.requests_left -= 1
+            if self.requests_left <= 0:
+                self.requests_exhausted_until = self.requests_reset_at
+        if delay > 0:
+            await asyncio.sleep(delay)
+        return delay
+    
+    def update_from_headers(self, headers, status_code=200):
+        """Sync with Groq's rate-limit headers from any response (success or error)"""
+        now = time.monotonic()
+        limit_tokens = _header_int(headers, 'x-ratelimit-limit-tokens')
+        remaining_tokens = _header_int(headers, 'x-ratelimit-remaining-tokens')
+        remaining_requests = _header_int(headers, 'x-ratelimit-remaining-requests')
+        reset_tokens = parse_groq_duration(headers.get('x-ratelimit-reset-tokens'))
+        reset_requests = parse_groq_duration(headers.get('x-ratelimit-reset-requests'))
+        
+        if limit_tokens and limit_tokens != self.tokens.capacity:
+            # The key's real TPM limit replaces the configured guess
+            self.tokens.capacity = float(limit_tokens)
+            self.tokens.rate = self.tokens.capacity / 60.0
+        if remaining_tokens is not None:
+            # The server is the source of truth, but our in-flight reservations aren't in its count yet
+            self.tokens._refill()
+            self.tokens._level = min(self.tokens._level, float(remaining_tokens))
+            if remaining_tokens <= 0 and reset_tokens:
+                self.retire(reset_tokens)
+        if remaining_requests is not None:
+            self.requests_left = remaining_requests
+            self.requests_reset_at = now + (reset_requests or 0.0)
+            self.requests_exhausted_until = 0.0
+            if remaining_requests <= 0 and reset_requests:
+                self.retire(reset_requests)
+        if status_code == 429:
+            retry_after = parse_groq_duration(headers.get('retry-after'))
+            if retry_after is None:
+                retry_after = max(reset_tokens or 0.0, reset_requests or 0.0) or None
+            if retry_after is not None:
+                self.retire(retry_after)
+        self.last_headers = {
+            name: headers.get(name) for name in (
+                'x-ratelimit-remaining-requests', 'x-ratelimit-remaining-tokens',
+                'x-ratelimit-reset-requests', 'x-ratelimit-reset-tokens'
+            ) if headers.get(name) is not None
+        }
+    
+    def record_usage(self, estimated_tokens, actual_tokens):
+        """Correct the token bucket once the response reports real usage"""
+        if actual_tokens is not None:
+            self.tokens.refund(estimated_tokens - actual_tokens)
+    
+    def recent_requests(self):
+        """Approximate requests in the last minute (budget used and not yet refilled)"""
+        return max(0, round(self.requests.capacity - self.requests.available()))
+    
+    def utilization(self):
+        """0..1 (or above, while in debt) - the busier of the two budgets"""
+        return max(1 - self.requests.available() / self.requests.capacity,
+                   1 - self.tokens.available() / self.tokens.capacity)
+
+def estimate_request_tokens(messages, max_tokens):
+    """Rough Groq token cost of a chat request: ~4 chars/token for the prompt plus the likely completion
+    
+    The completion is counted as at most 512 tokens (answers are usually far shorter than max_tokens);
+    KeyRateLimiter.record_usage corrects the bucket when the response reports real usage.
+    """
+    prompt_chars = sum(len(message.get('content') or '') for message in messages)
+    return prompt_chars // 4 + min(max_tokens, 512)
+
+
+class KeyLease:
+    """One generation's claim on a Groq key (see GroqKeyManager.checkout)
+    
+    Outcomes are reported against this exact key, no matter how many other generations
+    have checked out keys in the meantime. release() must be called when done (or use
+    `async with groq_key_manager.lease() as lease:`).
+    """
+    
+    def __init__(self, manager, index):
+        self.manager = manager
+        self.index = index
+        self.key = manager.api_keys[index]
+        self.key_short = self.key[:10] + '...'
+        self.limiter = manager.limiters[self.key_short]
+        self.released = False
+    
+    @property
+    def client(self):
+        return groq_transport.client(self.key)
+    
+    async def reserve(self, estimated_tokens=0, deadline=None):
+        """Reserve this key's budget for one request (waits exactly as long as its buckets require)
+        
+        With a deadline, raises DeadlineExceeded instead of waiting past it.
+        """
+        waited = await self.limiter.acquire(estimated_tokens, deadline.remaining() if deadline else None)
+        if waited > 0:
+            print(f"⏳ Rate limit: waited {waited:.2f}s for budget on key {self.key_short}")
+        self.manager.key_usage_count[self.key_short] += 1
+        return waited
+    
+    def success(self):
+        self.manager.mark_key_success(self.key)
+    
+    def error(self):
+        self.manager.mark_key_error(self.key, is_rate_limit=False)
+    
+    def rate_limited(self):
+        """Bench this key after a 429 (other leases will pick other keys)
+        
+        The transport has normally already retired it until Groq's reported reset time;
+        rate_limit_cooldown is only the fallback when the response carried no timing headers.
+        """
+        if self.limiter.retired_for() <= 0:
+            self.limiter.retire(self.manager.rate_limit_cooldown)
+    
+    def release(self):
+        if not self.released:
+            self.released = True
+            self.manager.key_in_flight[self.key_short] -= 1
+
 class GroqKeyManager:
-    """Manages multiple Groq API keys with intelligent rotation, load balancing, and rate limit handling"""
+    """Manages multiple Groq API keys: per-call leases, load balancing, and rate limit handling"""
     
     def __init__(self, api_keys):
         self.api_keys = api_keys
-        self.current_key_index = 0
         
         # Initialize tracking dictionaries
         key_short_names = [key[:10] + '...' for key in api_keys]
         self.key_usage_count = {name: 0 for name in key_short_names}  # Total usage per key
         self.key_success_count = {name: 0 for name in key_short_names}  # Successful calls per key
         self.key_error_count = {name: 0 for name in key_short_names}  # Error count per key
-        self.key_rate_limited = {name: False for name in key_short_names}  # Rate limit status
-        self.key_rate_limit_time = {name: None for name in key_short_names}  # When rate limit occurred
         self.key_last_used = {name: None for name in key_short_names}  # Last usage timestamp
+        self.limiters = {name: KeyRateLimiter() for name in key_short_names}  # RPM/TPM token buckets
+        self.key_in_flight = {name: 0 for name in key_short_names}  # Leases currently checked out per key
+        self.rate_limit_cooldown = 60  # Fallback bench time after a 429 without reset headers
         
-        # Groq has higher rate limits, so we can rotate less frequently
-        # Groq free tier: 30 requests/minute, paid: much higher
-        if len(api_keys) >= 10:
-            self.calls_per_key = 3  # Rotate frequently with many keys
-        elif len(api_keys) >= 6:
-            self.calls_per_key = 5  # Moderate rotation with 6+ keys
-        elif len(api_keys) >= 3:
-            self.calls_per_key = 8  # Less frequent rotation with 3-5 keys
-        else:
-            self.calls_per_key = 10  # Less frequent with 1-2 keys
-        
-        self.current_key_calls = 0  # Track calls on current key
-        self.rate_limit_cooldown = 60  # Seconds to wait before retrying rate-limited key
-        
-        print(f"✓ Initialized GroqKeyManager with {len(api_keys)} key(s) for rotation")
+        print(f"✓ Initialized GroqKeyManager with {len(api_keys)} key(s)")
         if len(api_keys) > 1:
-            print(f"   🔄 Keys will rotate every {self.calls_per_key} calls to distribute load evenly")
+            print(f"   🔄 Each call leases the least-loaded key, so concurrent answers spread across keys")
             print(f"   📊 Load balancing enabled with health tracking")
     
-    def get_current_key(self):
-        """Get the current active API key"""
-        return self.api_keys[self.current_key_index]
+    # Fractions of a key's RPM/TPM budget: prefer other keys above ROTATE_AT, avoid keys above AVOID_AT
+    ROTATE_AT = 0.67
+    AVOID_AT = 0.85
+    
+    def get_limiter(self, key_index):
+        return self.limiters[self.api_keys[key_index][:10] + '...']
     
     def get_recent_call_count(self, key_index):
-        """Get number of API calls in the last minute for a key"""
-        key_short = self.api_keys[key_index][:10] + '...'
-        if key_short not in groq_api_calls_by_key:
-            return 0
-        
-        api_calls = groq_api_calls_by_key[key_short]
-        now = datetime.now()
-        # Count calls in last 60 seconds
-        recent_count = sum(1 for call_time in api_calls 
-                          if (now - call_time).total_seconds() <= 60)
-        return recent_count
+        """Get number of API calls in the last minute for a key (O(1), from its token bucket)"""
+        return self.get_limiter(key_index).recent_requests()
+    
+    def is_key_retired(self, key_index):
+        """True while a key is benched (until Groq's reported reset time)"""
+        return self.get_limiter(key_index).retired_for() > 0
+    
+    def record_rate_limit_headers(self, api_key, headers, status_code):
+        """GroqTransport hook: feed every response's rate-limit headers into that key's limiter"""
+        limiter = self.limiters.get(api_key[:10] + '...')
+        if limiter is None:
+            return
+        was_retired = limiter.retired_for() > 0
+        limiter.update_from_headers(headers, status_code)
+        if not was_retired and limiter.retired_for() > 0:
+            print(f"⏸️ Key {api_key[:10]}... retired for {limiter.retired_for():.1f}s (Groq rate-limit reset)")
+    
+    def get_key_utilization(self, key_index):
+        """How much of the key's per-minute budget (requests or tokens, whichever is higher) is in use"""
+        return self.get_limiter(key_index).utilization()
     
     def get_key_health_score(self, key_index):
         """Calculate health score for a key (higher is better)"""
         key_short = self.api_keys[key_index][:10] + '...'
         
-        # Skip if rate limited (unless cooldown expired)
-        if self.key_rate_limited[key_short]:
-            limit_time = self.key_rate_limit_time[key_short]
-            if limit_time:
-                time_since_limit = (datetime.now() - limit_time).total_seconds()
-                if time_since_limit < self.rate_limit_cooldown:
-                    return -1000  # Very low score if still rate limited
-                else:
-                    # Rate limit expired, reset it
-                    self.key_rate_limited[key_short] = False
-                    self.key_rate_limit_time[key_short] = None
+        # Skip if rate limited (retired until Groq's reset time)
+        if self.is_key_retired(key_index):
+            return -1000  # Very low score if still rate limited
         
-        # CRITICAL: Check recent calls in last minute (Groq free tier: 30 req/min, paid: much higher)
+        # CRITICAL: Check the key's per-minute budgets (GROQ_RPM_LIMIT / GROQ_TPM_LIMIT)
         recent_calls = self.get_recent_call_count(key_index)
+        utilization = self.get_key_utilization(key_index)
         
-        # Heavily penalize keys close to or at the limit (optimized for Groq's 30 req/min)
-        if recent_calls >= 30:
-            return -2000  # Way over limit - never use
-        elif recent_calls >= 25:
+        # Heavily penalize keys close to or at the limit
+        if utilization >= 1.0:
+            return -2000  # Budget exhausted - never use
+        elif utilization >= self.AVOID_AT:
             return -500   # Very close to limit - avoid
-        elif recent_calls >= 20:
+        elif utilization >= self.ROTATE_AT:
             return -100  # Getting close - prefer others
-        elif recent_calls >= 15:
+        elif utilization >= 0.5:
             return 10    # Moderate usage - low priority
         
         # Calculate health score based on:
@@ -284,106 +592,47 @@ class GroqKeyManager:
         
         return health_score
     
-    def get_best_key_index(self):
-        """Get the index of the healthiest available key with fewest recent calls"""
-        best_index = self.current_key_index
-        best_score = self.get_key_health_score(self.current_key_index)
-        best_recent_calls = self.get_recent_call_count(self.current_key_index)
-        
-        # Check all keys to find the best one
-        for i in range(len(self.api_keys)):
-            if i == self.current_key_index:
-                continue
-            
-            # Skip rate-limited keys
-            key_short = self.api_keys[i][:10] + '...'
-            if self.key_rate_limited[key_short]:
-                limit_time = self.key_rate_limit_time[key_short]
-                if limit_time:
-                    time_since_limit = (datetime.now() - limit_time).total_seconds()
-                    if time_since_limit < self.rate_limit_cooldown:
-                        continue  # Skip this key, still rate limited
-            
-            score = self.get_key_health_score(i)
-            recent_calls = self.get_recent_call_count(i)
-            
-            # Prefer keys with fewer recent calls, even if score is slightly lower
-            # This prevents hitting rate limits
-            if recent_calls < best_recent_calls:
-                best_score = score
-                best_index = i
-                best_recent_calls = recent_calls
-            elif recent_calls == best_recent_calls and score > best_score:
-                # Same recent call count, prefer better health score
-                best_score = score
-                best_index = i
-        
-        return best_index
-    
-    def rotate_key(self, force_round_robin=False):
-        """Intelligently rotate to the best available key, or use round-robin if forced"""
-        original_index = self.current_key_index
-        original_key_short = self.api_keys[original_index][:10] + '...'
-        
-        # Check if current key is approaching limit (proactive rotation for Groq's 30 req/min)
-        current_recent_calls = self.get_recent_call_count(original_index)
-        if current_recent_calls >= 20 and not force_round_robin:
-            print(f"⚠️ Key {original_key_short} has {current_recent_calls}/30 calls in last minute - proactively rotating")
-            force_round_robin = False  # Use smart rotation to find best key
-        
-        if force_round_robin:
-            # Round-robin but skip rate-limited keys (optimized for Groq's 30 req/min)
-            attempts = 0
-            while attempts < len(self.api_keys):
-                self.current_key_index = (self.current_key_index + 1) % len(self.api_keys)
-                key_short = self.api_keys[self.current_key_index][:10] + '...'
-                recent_calls = self.get_recent_call_count(self.current_key_index)
-                
-                # Skip if rate limited or too many recent calls (25/30 = safe threshold)
-                if not self.key_rate_limited[key_short] and recent_calls < 25:
-                    break
-                attempts += 1
-        else:
-            # Smart rotation: find the healthiest key with fewest recent calls
-            best_index = self.get_best_key_index()
-            self.current_key_index = best_index
-        
-        # Final check: if selected key is still problematic, find any available key
-        key_short = self.api_keys[self.current_key_index][:10] + '...'
-        recent_calls = self.get_recent_call_count(self.current_key_index)
-        
-        if self.key_rate_limited[key_short] or recent_calls >= 25:
-            # Emergency: find ANY key that's available (25/30 = safe threshold)
-            for i in range(len(self.api_keys)):
-                test_key_short = self.api_keys[i][:10] + '...'
-                test_recent = self.get_recent_call_count(i)
-                if not self.key_rate_limited[test_key_short] and test_recent < 25:
-                    self.current_key_index = i
-                    key_short = test_key_short
-                    recent_calls = test_recent
-                    break
-        
-        # Reset call counter for new key
-        self.current_key_calls = 0
-        
-        if original_index != self.current_key_index:
-            print(f"🔄 Rotated from key {original_key_short} ({self.get_recent_call_count(original_index)} recent) to key {key_short} ({recent_calls} recent)")
-        
-        return self.api_keys[self.current_key_index]
+    def _lease_rank(self, key_index, estimated_tokens):
+        """Sort key for checkout (lower is better): usable first, then fewest in-flight leases,
+        then the soonest available budget, then the best health score"""
+        key_short = self.api_keys[key_index][:10] + '...'
+        health = self.get_key_health_score(key_index)  # Also clears expired rate-limit flags
+        return (
+            self.is_key_retired(key_index),
+            self.key_in_flight[key_short],
+            round(self.get_limiter(key_index).wait_time(estimated_tokens), 1),
+            -health
+        )
     
-    def get_next_key(self):
-        """Get next available key - uses smart rotation"""
-        return self.rotate_key()
+    def checkout(self, estimated_tokens=0, exclude=()):
+        """Lease the key that lets this request run soonest and most in parallel with the others
+        
+        Concurrent generations spread across all keys (fewest in-flight leases first) instead of
+        sharing one current key. Keys in exclude (API key strings) are only used if nothing else is left.
+        """
+        candidates = [i for i, key in enumerate(self.api_keys) if key not in exclude] or list(range(len(self.api_keys)))
+        index = min(candidates, key=lambda i: self._lease_rank(i, estimated_tokens))
+        lease = KeyLease(self, index)
+        self.key_in_flight[lease.key_short] += 1
+        return lease
+    
+    @contextlib.asynccontextmanager
+    async def lease(self, estimated_tokens=0, exclude=()):
+        """async with groq_key_manager.lease() as lease: ... - checkout() that is always released"""
+        lease = self.checkout(estimated_tokens, exclude)
+        try:
+            yield lease
+        finally:
+            lease.release()
     
     def mark_key_rate_limited(self, key):
         """Mark a key as rate limited"""
         key_short = key[:10] + '...'
-        self.key_rate_limited[key_short] = True
-        self.key_rate_limit_time[key_short] = datetime.now()
+        limiter = self.limiters[key_short]
+        if limiter.retired_for() <= 0:
+            limiter.retire(self.rate_limit_cooldown)
         self.key_error_count[key_short] = self.key_error_count.get(key_short, 0) + 1
-        print(f"⚠️ Key {key_short} hit rate limit, switching to next key")
-        # Immediately rotate to a different key
-        self.rotate_key(force_round_robin=True)
+        print(f"⚠️ Key {key_short} hit rate limit - benched, new leases will use other keys")
     
     def mark_key_success(self, key):
         """Mark that a key was used successfully - reduces error count to give key a fresh start"""
@@ -413,27 +662,6 @@ class GroqKeyManager:
         if is_rate_limit:
             self.mark_key_rate_limited(key)
     
-    def track_usage(self, key):
-        """Track that a key was used and rotate if needed"""
-        key_short = key[:10] + '...'
-        self.key_usage_count[key_short] = self.key_usage_count.get(key_short, 0) + 1
-        self.current_key_calls += 1
-        
-        # Check recent calls for this key
-        key_index = self.api_keys.index(key) if key in self.api_keys else self.current_key_index
-        recent_calls = self.get_recent_call_count(key_index)
-        
-        # Proactive rotation strategies:
-        # 1. If key has 6+ calls in last minute, rotate immediately
-        # 2. Otherwise, rotate after N calls to distribute load
-        if len(self.api_keys) > 1:
-            if recent_calls >= 20:  # Rotate when approaching Groq's 30 req/min limit
-                print(f"🔄 Key {key_short} has {recent_calls}/30 recent calls - rotating proactively")
-                self.rotate_key()
-            elif self.current_key_calls >= self.calls_per_key:
-                # Normal rotation after N calls
-                self.rotate_key()
-    
     def get_usage_stats(self):
         """Get comprehensive usage statistics for all keys"""
         stats = {}
@@ -442,7 +670,7 @@ class GroqKeyManager:
             total = self.key_usage_count[key_short]
             success = self.key_success_count[key_short]
             errors = self.key_error_count[key_short]
-            rate_limited = self.key_rate_limited[key_short]
+            rate_limited = self.limiters[key_short].retired_for() > 0
             
             # Calculate total calls: use max of tracked usage, or sum of success + errors
             # This handles cases where success/errors are tracked but usage_count isn't
@@ -463,58 +691,218 @@ class GroqKeyManager:
                 'errors': errors,
                 'success_rate': success_rate,
                 'rate_limited': rate_limited,
-                'health_score': self.get_key_health_score(i)
+                'retired_for': self.limiters[key_short].retired_for(),
+                'rate_limit_headers': self.limiters[key_short].last_headers,
+                'health_score': self.get_key_health_score(i),
+                'in_flight': self.key_in_flight[key_short],
+                'utilization': self.limiters[key_short].utilization()
             }
         return stats
     
-    def get_client(self):
-        """Get a Groq client with the current key (with proactive rotation)"""
-        key = self.get_current_key()
-        self.track_usage(key)  # This will rotate if needed
-        
-        # Get current key (may have rotated)
-        current_key = self.get_current_key()
-        return Groq(api_key=current_key)
+    def format_lease_status(self):
+        """One-line summary of key leases and limiter state across all keys"""
+        in_flight = sum(self.key_in_flight.values())
+        retired = sum(1 for i in range(len(self.api_keys)) if self.is_key_retired(i))
+        available = len(self.api_keys) - retired
+        return f"{in_flight} lease(s) in flight, {available}/{len(self.api_keys)} key(s) available, {retired} rate limited"
+
+# PERFORMANCE OPTIMIZATION: Groq calls go through native async clients sharing one connection pool
+GROQ_MAX_CONNECTIONS = int(os.getenv('GROQ_MAX_CONNECTIONS', '20'))
+GROQ_KEEPALIVE_SECONDS = float(os.getenv('GROQ_KEEPALIVE_SECONDS', '60'))
+
+class GroqTransport:
+    """One long-lived AsyncGroq client per API key over a shared, pooled httpx.AsyncClient
+    
+    Keep-alive connections to the Groq API are reused across calls and keys (the key is just a
+    header), so only the first request pays for the TLS handshake. Requests are awaited on the
+    event loop instead of occupying executor threads, and cancelling the awaiting task (e.g. via
+    asyncio.wait_for) closes the in-flight request instead of leaving a thread blocked on the socket.
+    SDK retries are off - generate_ai_response does its own key/model fallback.
+    """
     
-    def get_client_with_retry(self):
-        """Get a Groq client with automatic key rotation"""
-        # Try each key once, rotating through all keys
-        tried_keys = set()
-        max_attempts = len(self.api_keys) * 2  # Try each key up to 2 times
-        
-        for attempt in range(max_attempts):
-            current_key = self.get_current_key()
-            key_short = current_key[:15] + '...'
-            
-            # If we've tried this key recently, rotate
-            if current_key in tried_keys and attempt > 0:
-                self.rotate_key(force_round_robin=True)
-                current_key = self.get_current_key()
-                key_short = current_key[:15] + '...'
-            
-            tried_keys.add(current_key)
-            
-            try:
-                # Create and return Groq client
-                client = Groq(api_key=current_key)
-                print(f"✅ Created Groq client with key {key_short}")
-                return client
-            except Exception as e:
-                error_str = str(e).lower()
-                # Rotate to next key and try again
-                if attempt < max_attempts - 1:
-                    self.rotate_key(force_round_robin=True)
-                    import time
-                    time.sleep(0.2)
-                    continue
-                else:
-                    # Last attempt failed
-                    raise Exception(f"Failed to create Groq client: {str(e)[:200]}")
-        
-        raise Exception("All API keys exhausted")
+    def __init__(self, max_connections=20, keepalive_expiry=60.0):
+        self.max_connections = max_connections
+        self.keepalive_expiry = keepalive_expiry
+        self._http_client = None
+        self._clients = {}  # {api_key: AsyncGroq}
+        self.rate_limit_listener = None  # fn(api_key, headers, status_code), called for every response
+    
+    async def _on_response(self, response):
+        # Every response (including 429s) carries Groq's x-ratelimit-* headers - hand them to the key manager
+        if self.rate_limit_listener is None:
+            return
+        api_key = response.request.headers.get('authorization', '').replace('Bearer ', '', 1)
+        if api_key:
+            self.rate_limit_listener(api_key, response.headers, response.status_code)
+    
+    def _get_http_client(self):
+        # Created lazily so the pool is bound to the running bot loop, not import time
+        if self._http_client is None or self._http_client.is_closed:
+            self._http_client = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                    keepalive_expiry=self.keepalive_expiry
+                ),
+                timeout=httpx.Timeout(30.0, connect=5.0),
+                event_hooks={'response': [self._on_response]}
+            )
+            self._clients.clear()
+        return self._http_client
+    
+    def client(self, api_key):
+        """Cached AsyncGroq client for api_key"""
+        http_client = self._get_http_client()
+        client = self._clients.get(api_key)
+        if client is None:
+            client = AsyncGroq(api_key=api_key, http_client=http_client, max_retries=0)
+            self._clients[api_key] = client
+            print(f"✅ Created async Groq client with key {api_key[:15]}... ({len(self._clients)} cached)")
+        return client
+    
+    async def close(self):
+        """Close the shared connection pool (called on shutdown)"""
+        if self._http_client is not None and not self._http_client.is_closed:
+            await self._http_client.aclose()
+        self._http_client = None
+        self._clients.clear()
+
+groq_transport = GroqTransport(GROQ_MAX_CONNECTIONS, GROQ_KEEPALIVE_SECONDS)
+
+# Groq models in preference order (quality first). ModelRouter reorders them by observed health.
+GROQ_MODELS = [model.strip() for model in os.getenv(
+    'GROQ_MODELS',
+    'openai/gpt-oss-120b,llama-3.3-70b-versatile,openai/gpt-oss-20b,llama-3.1-8b-instant'
+).split(',') if model.strip()]
+MODEL_ATTEMPTS_PER_ANSWER = max(1, int(os.getenv('MODEL_ATTEMPTS_PER_ANSWER', '2')))  # Models tried per key before the retry round
+
+def classify_model_error(error):
+    """'not_found' (model missing/decommissioned), 'rate_limit' / 'auth' (key problems, not the model's), 'timeout' or 'error'"""
+    if isinstance(error, (asyncio.TimeoutError, APITimeoutError)):
+        return 'timeout'
+    if isinstance(error, RateLimitError):
+        return 'rate_limit'
+    if isinstance(error, (AuthenticationError, PermissionDeniedError)):
+        return 'auth'
+    message = str(error).lower()
+    if isinstance(error, NotFoundError) or 'decommissioned' in message or 'model_not_found' in message \
+            or ('model' in message and ('not found' in message or 'does not exist' in message)):
+        return 'not_found'
+    return 'error'
+
+class ModelStats:
+    """Rolling health of one Groq model"""
+    
+    def __init__(self, priority):
+        self.priority = priority  # Position in GROQ_MODELS (0 = preferred)
+        self.calls = 0
+        self.failures = 0
+        self.success_ewma = 1.0  # Exponentially weighted success rate (new models start trusted)
+        self.latency_ewma = None  # Seconds
+        self.latencies = deque(maxlen=50)
+        self.consecutive_failures = 0
+        self.open_until = 0.0  # Circuit breaker: skipped until this time.monotonic()
+        self.last_error = None
+
+class ModelRouter:
+    """Orders Groq models by observed health and circuit-breaks dead ones
+    
+    Each call outcome updates the model's success EWMA, latency EWMA and p50/p95 window.
+    candidates() ranks models by preference order plus penalties for failures and slowness,
+    so a failing or slow primary drops behind a healthy fallback. A "model not found" /
+    decommissioned error opens the model's circuit for NOT_FOUND_COOLDOWN (one wasted call,
+    then it's skipped); CIRCUIT_FAILURES consecutive failures open it for FAILURE_COOLDOWN.
+    Once the cool-off ends the model is tried again (half-open) and one success closes it.
+    Rate limits and auth errors are key problems, not model ones, and don't count against the model.
+    """
+    
+    ALPHA = 0.3  # EWMA weight of the newest sample
+    CIRCUIT_FAILURES = 3
+    FAILURE_COOLDOWN = 120.0
+    NOT_FOUND_COOLDOWN = 3600.0
+    SLOW_LATENCY = 8.0  # Each SLOW_LATENCY seconds of average latency costs one preference position
+    
+    def __init__(self, models):
+        self.models = list(models)
+        self.stats = {model: ModelStats(priority) for priority, model in enumerate(self.models)}
+    
+    def _score(self, model):
+        stats = self.stats[model]
+        score = stats.priority + (1.0 - stats.success_ewma) * len(self.models)
+        if stats.latency_ewma is not None:
+            score += stats.latency_ewma / self.SLOW_LATENCY
+        return score
+    
+    def is_open(self, model):
+        return self.stats[model].open_until > time.monotonic()
+    
+    def candidates(self, limit=None, exclude=()):
+        """Models to try, best first - open circuits are left out (all of them only if nothing else is left)"""
+        usable = [model for model in self.models if model not in exclude and not self.is_open(model)]
+        if not usable:
+            usable = sorted((model for model in self.models if model not in exclude),
+                            key=lambda model: self.stats[model].open_until)[:1]
+        ranked = sorted(usable, key=self._score)
+        return ranked[:limit] if limit else ranked
+    
+    def record_success(self, model, latency):
+        stats = self.stats.get(model)
+        if stats is None:
+            return
+        stats.calls += 1
+        stats.consecutive_failures = 0
+        stats.open_until = 0.0
+        stats.success_ewma += self.ALPHA * (1.0 - stats.success_ewma)
+        stats.latency_ewma = latency if stats.latency_ewma is None else stats.latency_ewma + self.ALPHA * (latency - stats.latency_ewma)
+        stats.latencies.append(latency)
+    
+    def record_failure(self, model, error):
+        """Record a failed call; returns the error kind from classify_model_error"""
+        kind = classify_model_error(error)
+        stats = self.stats.get(model)
+        if stats is None or kind in ('rate_limit', 'auth'):
+            return kind
+        stats.calls += 1
+        stats.failures += 1
+        stats.consecutive_failures += 1
+        stats.success_ewma -= self.ALPHA * stats.success_ewma
+        stats.last_error = f"{kind}: {str(error)[:80]}"
+        if kind == 'not_found':
+            stats.open_until = time.monotonic() + self.NOT_FOUND_COOLDOWN
+            print(f"🚫 Model '{model}' not available - skipping it for {self.NOT_FOUND_COOLDOWN / 60:.0f} min")
+        elif stats.consecutive_failures >= self.CIRCUIT_FAILURES:
+            stats.open_until = time.monotonic() + self.FAILURE_COOLDOWN
+            print(f"🚫 Model '{model}' failed {stats.consecutive_failures}x in a row - skipping it for {self.FAILURE_COOLDOWN:.0f}s")
+        return kind
+    
+    def format_status(self):
+        """Per-model health lines for /check_api_keys"""
+        lines = []
+        now = time.monotonic()
+        for model in sorted(self.models, key=lambda model: (self.is_open(model), self._score(model))):
+            stats = self.stats[model]
+            if stats.open_until > now:
+                state = f"🔴 off {stats.open_until - now:.0f}s"
+            elif stats.calls == 0:
+                state = "⚪ unused"
+            else:
+                state = "🟢" if stats.success_ewma >= 0.8 and not stats.consecutive_failures else "🟡"
+            line = f"{state} `{model}`"
+            if stats.calls:
+                line += f" · {(stats.calls - stats.failures) / stats.calls * 100:.0f}% ok of {stats.calls}"
+            if stats.latencies:
+                ordered = sorted(stats.latencies)
+                p50 = ordered[len(ordered) // 2]
+                p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+                line += f" · p50 {p50 * 1000:.0f}ms / p95 {p95 * 1000:.0f}ms"
+            lines.append(line)
+        return "\n".join(lines)
+
+model_router = ModelRouter(GROQ_MODELS)
 
 # Initialize key manager (all keys used for all operations)
 groq_key_manager = GroqKeyManager(GROQ_API_KEYS)
+groq_transport.rate_limit_listener = groq_key_manager.record_rate_limit_headers
 
 # Test API keys on startup to verify they work (non-blocking - bot will start even if test fails)
 print(f"\n🔍 Testing Groq API keys on startup (quick validation)...")
@@ -524,17 +912,18 @@ for i, test_key in enumerate(GROQ_API_KEYS, 1):
     try:
         key_short = test_key[:15] + '...'
         client = Groq(api_key=test_key)
-        # Try multiple Groq models to find one that works
-        test_models = ['openai/gpt-oss-120b', 'llama-3.3-70b-versatile', 'llama-3.1-70b-versatile', 'mixtral-8x7b-32768', 'gemma2-9b-it']
+        # Try Groq models (best first) to find one that works - dead models get circuit-broken here
         test_passed_for_key = False
-        for model_name in test_models:
+        for model_name in model_router.candidates():
             try:
                 # Simple test - just try to generate content
+                started = time.perf_counter()
                 response = client.chat.completions.create(
                     model=model_name,
                     messages=[{"role": "user", "content": "Hi"}],
                     max_tokens=10
                 )
+                model_router.record_success(model_name, time.perf_counter() - started)
                 if response and response.choices and len(response.choices) > 0:
                     content = response.choices[0].message.content
                     if content:
@@ -544,6 +933,7 @@ for i, test_key in enumerate(GROQ_API_KEYS, 1):
                         test_passed_for_key = True
                         break  # Found a working model
             except Exception as model_error:
+                model_router.record_failure(model_name, model_error)
                 continue  # Try next model
         
         if not test_passed_for_key:
@@ -572,6 +962,130 @@ else:
 if groq_key_manager.api_keys:
     print(f"✓ Groq key manager initialized with {len(groq_key_manager.api_keys)} key(s)")
 
+# --- DASHBOARD HTTP CLIENT ---
+# LATENCY OPTIMIZATION: One pooled aiohttp session for all dashboard (Vercel) and Discord REST traffic
+DASHBOARD_MAX_CONNECTIONS = max(1, int(os.getenv('DASHBOARD_MAX_CONNECTIONS', '20')))
+DASHBOARD_KEEPALIVE_SECONDS = float(os.getenv('DASHBOARD_KEEPALIVE_SECONDS', '60'))
+DASHBOARD_DNS_CACHE_SECONDS = 300
+
+class DashboardHTTP:
+    """Application-lifetime HTTP client: connection pool, keep-alive, DNS cache and per-endpoint metrics
+    
+    A fresh aiohttp.ClientSession per call paid DNS + TCP + TLS setup to Vercel every time (twice per
+    forum message). Call sites keep their shape - `async with dashboard_http.borrow() as session:` yields
+    this client, whose get/post/delete share one session that is only closed on shutdown.
+    Requests without an explicit timeout get their endpoint's default from ENDPOINT_TIMEOUTS.
+    """
+    
+    DEFAULT_TIMEOUT = 10.0
+    ENDPOINT_TIMEOUTS = {'/api/forum-posts': 5.0, '/api/data': 10.0}
+    
+    def __init__(self, max_connections, keepalive_seconds):
+        self.max_connections = max_connections
+        self.keepalive_seconds = keepalive_seconds
+        self._session = None
+        self.endpoints = {}  # {'GET /api/data': {'calls', 'errors', 'latencies'}}
+        self.connections_opened = 0
+        self.connections_reused = 0
+    
+    @property
+    def session(self):
+        """The shared session, created on first use (needs a running event loop)"""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.max_connections,
+                keepalive_timeout=self.keepalive_seconds,
+                ttl_dns_cache=DASHBOARD_DNS_CACHE_SECONDS
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.DEFAULT_TIMEOUT),
+                trace_configs=[self._trace_config()]
+            )
+        return self._session
+    
+    def _trace_config(self):
+        trace = aiohttp.TraceConfig()
+        trace.on_request_start.append(self._on_request_start)
+        trace.on_request_end.append(self._on_request_end)
+        trace.on_request_exception.append(self._on_request_exception)
+        trace.on_connection_create_end.append(self._on_connection_created)
+        trace.on_connection_reuseconn.append(self._on_connection_reused)
+        return trace
+    
+    def _endpoint(self, method, url):
+        # Collapse IDs (Discord thread IDs etc.) so the metrics stay bounded
+        path = re.sub(r'/\d+', '/:id', url.path)
+        stats = self.endpoints.get(f"{method} {path}")
+        if stats is None:
+            stats = self.endpoints[f"{method} {path}"] = {'calls': 0, 'errors': 0, 'latencies': deque(maxlen=100)}
+        return stats
+    
+    async def _on_request_start(self, session, ctx, params):
+        ctx.started = time.perf_counter()
+    
+    async def _on_request_end(self, session, ctx, params):
+        stats = self._endpoint(params.method, params.url)
+        stats['calls'] += 1
+        if params.response.status >= 400:
+            stats['errors'] += 1
+        stats['latencies'].append(time.perf_counter() - ctx.started)
+    
+    async def _on_request_exception(self, session, ctx, params):
+        stats = self._endpoint(params.method, params.url)
+        stats['calls'] += 1
+        stats['errors'] += 1
+    
+    async def _on_connection_created(self, session, ctx, params):
+        self.connections_opened += 1
+    
+    async def _on_connection_reused(self, session, ctx, params):
+        self.connections_reused += 1
+    
+    def timeout_for(self, url):
+        path = urlsplit(str(url)).path
+        for prefix, seconds in self.ENDPOINT_TIMEOUTS.items():
+            if path.startswith(prefix):
+                return seconds
+        return self.DEFAULT_TIMEOUT
+    
+    def request(self, method, url, **kwargs):
+        """session.request() with the endpoint's default timeout; use as `async with ... as response:`"""
+        if kwargs.get('timeout') is None:
+            kwargs['timeout'] = aiohttp.ClientTimeout(total=self.timeout_for(url))
+        return self.session.request(method, url, **kwargs)
+    
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
+    
+    def post(self, url, **kwargs):
+        return self.request('POST', url, **kwargs)
+    
+    def delete(self, url, **kwargs):
+        return self.request('DELETE', url, **kwargs)
+    
+    @contextlib.asynccontextmanager
+    async def borrow(self):
+        """Drop-in for `async with dashboard_http.borrow() as session:` that reuses the pool (nothing is closed on exit)"""
+        yield self
+    
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+    
+    def format_stats(self):
+        if not self.endpoints:
+            return "No dashboard requests yet"
+        lines = [f"Connections: {self.connections_opened} opened / {self.connections_reused} reused"]
+        for endpoint, stats in sorted(self.endpoints.items(), key=lambda item: -item[1]['calls'])[:6]:
+            ordered = sorted(stats['latencies'])
+            latency = f" · p50 {ordered[len(ordered) // 2] * 1000:.0f}ms" if ordered else ""
+            lines.append(f"`{endpoint}` {stats['calls']} calls, {stats['errors']} errors{latency}")
+        return "\n".join(lines)
+
+dashboard_http = DashboardHTTP(DASHBOARD_MAX_CONNECTIONS, DASHBOARD_KEEPALIVE_SECONDS)
+
 # --- Bot Setup ---
 intents = discord.Intents.default()
 intents.message_content = True  # CRITICAL: Required for reading message content
@@ -608,11 +1122,473 @@ LEADERBOARD_DATA = {
 # Initialize embedding model (lazy load on first use)
 _embedding_model = None
 _pinecone_index = None
-_rag_embeddings = {}  # {entry_id: embedding_vector} - Fallback for non-Pinecone mode
 _rag_embeddings_version = 0  # Increment when RAG database changes
-# MEMORY OPTIMIZATION: Cache query embeddings to avoid re-encoding same queries
-_query_embedding_cache = {}  # {query_hash: embedding_vector}
-_query_cache_max_size = 200  # CPU OPTIMIZATION: Increased cache size to reduce encoding (each vector is ~1.5KB, 200 = ~300KB memory)
+
+def approx_size(value):
+    """Rough memory footprint of a cached value in bytes (NumPy arrays by buffer size, containers recursively)"""
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, (tuple, list)):
+        return sys.getsizeof(value) + sum(approx_size(item) for item in value)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(approx_size(k) + approx_size(v) for k, v in value.items())
+    return sys.getsizeof(value)
+
+class LRUCache:
+    """Thread-safe LRU cache with optional TTL, entry and byte limits, and hit/miss/eviction counters
+    
+    get(), set() and eviction are O(1): get() refreshes an entry's recency and once max_size entries
+    or max_bytes (approx_size of the values, if set) are exceeded the least recently used entries
+    are evicted. Entries older than ttl seconds (if set) count as misses and are dropped.
+    """
+    
+    def __init__(self, name, max_size, ttl=None, max_bytes=None):
+        self.name = name
+        self.max_size = max_size
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._data = OrderedDict()  # {key: (value, stored_at, size_bytes)}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+    
+    def __len__(self):
+        return len(self._data)
+    
+    def __contains__(self, key):
+        """Presence check without touching recency or the hit/miss counters"""
+        with self._lock:
+            item = self._data.get(key)
+            return item is not None and not self._expired(item[1], time.monotonic())
+    
+    def _expired(self, stored_at, now):
+        return self.ttl is not None and now - stored_at > self.ttl
+    
+    def _remove(self, key):
+        self._bytes -= self._data.pop(key)[2]
+    
+    def get(self, key, default=None):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                self.misses += 1
+                return default
+            if self._expired(item[1], time.monotonic()):
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return item[0]
+    
+    def set(self, key, value):
+        size = approx_size(value) if self.max_bytes is not None else 0
+        with self._lock:
+            if key in self._data:
+                self._remove(key)
+            self._data[key] = (value, time.monotonic(), size)
+            self._bytes += size
+            while len(self._data) > self.max_size or (self.max_bytes is not None and self._bytes > self.max_bytes and len(self._data) > 1):
+                oldest = next(iter(self._data))
+                self._remove(oldest)
+                self.evictions += 1
+    
+    def pop(self, key, default=None):
+        with self._lock:
+            if key not in self._data:
+                return default
+            value = self._data[key][0]
+            self._remove(key)
+            return value
+    
+    def purge_expired(self):
+        """Drop every expired entry now (get() only drops the ones it touches). Returns the count removed."""
+        if self.ttl is None:
+            return 0
+        now = time.monotonic()
+        with self._lock:
+            expired = [key for key, (_, stored_at, _) in self._data.items() if self._expired(stored_at, now)]
+            for key in expired:
+                self._remove(key)
+            self.expirations += len(expired)
+        return len(expired)
+    
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self._data),
+            'max_size': self.max_size,
+            'bytes': self._bytes,
+            'max_bytes': self.max_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'expirations': self.expirations,
+            'hit_rate': (self.hits / lookups * 100) if lookups else 0.0
+        }
+    
+    def format_stats(self):
+        stats = self.stats()
+        memory = f" · {stats['bytes'] / 1024:.0f}/{stats['max_bytes'] / 1024:.0f}KB" if stats['max_bytes'] is not None else ""
+        return (f"**{self.name}:** {stats['size']}/{stats['max_size']}{memory} · {stats['hit_rate']:.0f}% hits "
+                f"({stats['hits']} hit / {stats['misses']} miss / {stats['evictions'] + stats['expirations']} evicted)")
+
+# CPU OPTIMIZATION: Cache query embeddings to avoid re-encoding repeated questions
+# Values are float32 arrays (384 x 4 bytes = 1.5KB each, vs several KB as a list of Python floats)
+QUERY_EMBEDDING_CACHE_SIZE = int(os.getenv('QUERY_EMBEDDING_CACHE_SIZE', '1000'))
+QUERY_EMBEDDING_CACHE_TTL = float(os.getenv('QUERY_EMBEDDING_CACHE_TTL', '0')) or None  # Seconds; 0 = never expire
+_query_embedding_cache = LRUCache('Query embeddings', QUERY_EMBEDDING_CACHE_SIZE, QUERY_EMBEDDING_CACHE_TTL)
+
+# COST OPTIMIZATION: Semantic answer cache - paraphrased questions reuse an earlier AI answer
+# Cosine similarity between normalised query embeddings; 0 disables the cache
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv('SEMANTIC_CACHE_THRESHOLD', '0.92'))
+SEMANTIC_CACHE_SIZE = int(os.getenv('SEMANTIC_CACHE_SIZE', '500'))
+
+class SemanticAnswerCache:
+    """Nearest-neighbour cache of AI answers keyed by query embedding
+
+    Each answered query's normalised embedding is stored as a row of one float32 matrix
+    (ring buffer, oldest overwritten first) next to its response. A lookup is a single
+    matrix-vector product; the best row is served if it clears the threshold and was
+    answered against the same knowledge-base version (RagSnapshot.version).
+    """
+
+    def __init__(self, name, max_size, threshold):
+        self.name = name
+        self.max_size = max_size
+        self.threshold = threshold
+        self._matrix = None  # (max_size, dim) float32, allocated on first add
+        self._responses = [None] * max_size
+        self._latencies = [0.0] * max_size  # Seconds the original answer took to generate
+        self._kb_version = None  # Every stored row was answered against this version
+        self._count = 0
+        self._next = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.latency_saved = 0.0
+
+    @property
+    def enabled(self):
+        return self.threshold > 0 and self.max_size > 0
+
+    def __len__(self):
+        return self._count
+
+    @staticmethod
+    def _normalize(vector):
+        vector = np.asarray(vector, dtype=np.float32).ravel()
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else None
+
+    def lookup(self, vector, kb_version):
+        """Return (response, similarity) for the nearest cached query, or None below the threshold"""
+        query = self._normalize(vector)
+        with self._lock:
+            if query is None or not self._count or self._kb_version != kb_version or query.shape[0] != self._matrix.shape[1]:
+                self.misses += 1
+                return None
+            scores = self._matrix[:self._count] @ query
+            best = int(np.argmax(scores))
+            similarity = float(scores[best])
+            if similarity < self.threshold:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.latency_saved += self._latencies[best]
+            return self._responses[best], similarity
+
+    def add(self, vector, response, kb_version, latency):
+        query = self._normalize(vector)
+        if query is None:
+            return
+        with self._lock:
+            if self._matrix is None or self._matrix.shape[1] != query.shape[0] or self._kb_version != kb_version:
+                # Knowledge base changed (or first add) - answers built from the old one can't be served
+                if self._matrix is None or self._matrix.shape[1] != query.shape[0]:
+                    self._matrix = np.zeros((self.max_size, query.shape[0]), dtype=np.float32)
+                self._responses = [None] * self.max_size
+                self._kb_version = kb_version
+                self._count = 0
+                self._next = 0
+            slot = self._next
+            self._matrix[slot] = query
+            self._responses[slot] = response
+            self._latencies[slot] = latency
+            self._next = (slot + 1) % self.max_size
+            self._count = min(self._count + 1, self.max_size)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'size': self._count,
+            'max_size': self.max_size,
+            'threshold': self.threshold,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': (self.hits / lookups * 100) if lookups else 0.0,
+            'latency_saved': self.latency_saved
+        }
+
+    def format_stats(self):
+        stats = self.stats()
+        if not self.enabled:
+            return f"**{self.name}:** disabled"
+        return (f"**{self.name}:** {stats['size']}/{stats['max_size']} · {stats['hit_rate']:.0f}% hits "
+                f"({stats['hits']} hit / {stats['misses']} miss) · ≥{stats['threshold']:.2f} similarity · "
+                f"{stats['latency_saved']:.1f}s saved")
+
+_semantic_answer_cache = SemanticAnswerCache('Semantic answers', SEMANTIC_CACHE_SIZE, SEMANTIC_CACHE_THRESHOLD)
+
+class LocalVectorIndex:
+    """In-process vector index for VECTOR_BACKEND=local
+    
+    All RAG vectors live in one contiguous, L2-normalised float32 matrix, so cosine
+    similarity for every entry is a single matrix-vector product and top-k is an
+    argpartition over the scores. At a few thousand entries that is microseconds.
+    """
+    
+    def __init__(self):
+        # (ids, matrix) is swapped as one tuple so concurrent readers never see a half-built index
+        self._state = ([], np.zeros((0, 0), dtype=np.float32))
+    
+    def __len__(self):
+        return len(self._state[0])
+    
+    @staticmethod
+    def _normalize(vectors):
+        """Return a contiguous float32 copy of vectors with every row scaled to unit length"""
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+    
+    def build(self, ids, vectors, normalized=False):
+        """Replace the whole index with the given ids and their vectors
+        
+        Pass normalized=True for rows that are already unit length (e.g. from the EmbeddingStore);
+        a float32 memory-mapped matrix is then used as-is without copying it into RAM.
+        """
+        ids = list(ids)
+        if not ids:
+            self._state = ([], np.zeros((0, 0), dtype=np.float32))
+            return
+        matrix = np.asarray(vectors).reshape(len(ids), -1)
+        if normalized and matrix.dtype == np.float32:
+            matrix = np.ascontiguousarray(matrix)
+        else:
+            matrix = self._normalize(matrix)
+        self._state = (ids, matrix)
+    
+    def query(self, vector, top_k=5):
+        """Return [(entry_id, cosine_similarity), ...] for the top_k closest entries, best first"""
+        ids, matrix = self._state
+        if not ids:
+            return []
+        query_vector = np.asarray(vector, dtype=np.float32).ravel()
+        norm = np.linalg.norm(query_vector)
+        if norm == 0 or query_vector.shape[0] != matrix.shape[1]:
+            return []
+        scores = matrix @ (query_vector / norm)
+        k = min(top_k, len(ids))
+        if k < len(ids):
+            top = np.argpartition(-scores, k - 1)[:k]
+        else:
+            top = np.arange(len(ids))
+        top = top[np.argsort(-scores[top])]
+        return [(ids[i], float(scores[i])) for i in top]
+
+_local_vector_index = LocalVectorIndex()  # Populated by compute_rag_embeddings() when USE_LOCAL_VECTOR_INDEX
+
+def build_embedding_text(entry):
+    """Exact text that gets embedded for a RAG entry (title + keywords + first 500 chars of content)"""
+    title = entry.get('title', '')
+    keywords = ' '.join(entry.get('keywords', []))
+    content = entry.get('content', '')
+    return f"{title}\n{keywords}\n{content[:500]}"
+
+def embedding_fingerprint(text):
+    """Hash of the embedded text (and model name, so a model change invalidates every row)"""
+    return hashlib.sha1(f"{EMBEDDING_MODEL_NAME}\n{text}".encode('utf-8')).hexdigest()
+
+def index_rag_entries(entries):
+    """({entry_id: entry}, {entry_id: embedding fingerprint}) for the entries that have IDs"""
+    by_id = {entry['id']: entry for entry in entries if entry.get('id')}
+    fingerprints = {entry_id: embedding_fingerprint(build_embedding_text(entry)) for entry_id, entry in by_id.items()}
+    return by_id, fingerprints
+
+class EmbeddingStore:
+    """Persistent RAG embedding cache: a memory-mapped .npy matrix plus an id/fingerprint sidecar
+    
+    Every row is keyed by embedding_fingerprint() of the text that produced it, so a warm
+    restart maps the vectors straight from disk and only entries whose text changed get
+    re-encoded. Rows are stored L2-normalised float32. Files are written to a temp path and
+    swapped in with os.replace, so a crash mid-write never leaves a torn store behind.
+    """
+    
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        self.vectors_path = self.directory / 'rag_vectors.npy'
+        self.sidecar_path = self.directory / 'rag_vectors.json'
+        self.matrix = None
+        self.ids = []
+        self.fingerprints = []
+        self._row_by_fingerprint = {}
+        self._loaded = False
+    
+    def load(self):
+        """Memory-map the stored matrix (once). Missing or mismatched files just mean a cold start."""
+        if self._loaded:
+            return
+        self._loaded = True
+        if not (self.vectors_path.exists() and self.sidecar_path.exists()):
+            return
+        try:
+            sidecar = json.loads(self.sidecar_path.read_text(encoding='utf-8'))
+            if sidecar.get('model') != EMBEDDING_MODEL_NAME:
+                print(f"💾 Embedding store was built with '{sidecar.get('model')}' - ignoring it")
+                return
+            rows = sidecar.get('rows', [])
+            matrix = np.load(self.vectors_path, mmap_mode='r')
+            if matrix.ndim != 2 or matrix.shape[0] != len(rows) or matrix.dtype != np.float32:
+                print("⚠️ Embedding store sidecar does not match vector file - ignoring it")
+                return
+            self._set_rows(matrix, [row[0] for row in rows], [row[1] for row in rows])
+            print(f"💾 Mapped {len(rows)} cached embeddings from {self.vectors_path}")
+        except Exception as e:
+            print(f"⚠️ Could not load embedding store ({e}) - entries will be re-encoded")
+    
+    def _set_rows(self, matrix, ids, fingerprints):
+        self.matrix = matrix
+        self.ids = list(ids)
+        self.fingerprints = list(fingerprints)
+        self._row_by_fingerprint = {fp: row for row, fp in enumerate(self.fingerprints)}
+    
+    def get(self, fingerprint):
+        """Return the stored (normalised) vector for a fingerprint, or None"""
+        row = self._row_by_fingerprint.get(fingerprint)
+        return None if row is None else self.matrix[row]
+    
+    def save(self, ids, fingerprints, matrix, keep_existing=False):
+        """Persist these rows. keep_existing=True merges them into the stored rows instead of replacing them."""
+        matrix = np.asarray(matrix, dtype=np.float32)
+        if keep_existing and self.matrix is not None:
+            given = set(fingerprints)
+            kept = [row for row, fp in enumerate(self.fingerprints) if fp not in given]
+            if kept:
+                ids = [self.ids[row] for row in kept] + list(ids)
+                fingerprints = [self.fingerprints[row] for row in kept] + list(fingerprints)
+                matrix = np.concatenate([self.matrix[kept], matrix])
+        if not ids:
+            return
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            tmp_vectors = self.vectors_path.with_name(self.vectors_path.name + '.tmp')
+            tmp_sidecar = self.sidecar_path.with_name(self.sidecar_path.name + '.tmp')
+            with open(tmp_vectors, 'wb') as f:
+                np.save(f, np.ascontiguousarray(matrix))
+            tmp_sidecar.write_text(json.dumps({
+                'model': EMBEDDING_MODEL_NAME,
+                'dim': int(matrix.shape[1]),
+                'rows': [[entry_id, fp] for entry_id, fp in zip(ids, fingerprints)]
+            }), encoding='utf-8')
+            # Drop our mapping of the old file before replacing it (Windows refuses to replace a mapped file)
+            self.matrix = None
+            os.replace(tmp_vectors, self.vectors_path)
+            os.replace(tmp_sidecar, self.sidecar_path)
+            self._set_rows(np.load(self.vectors_path, mmap_mode='r'), ids, fingerprints)
+        except Exception as e:
+            print(f"⚠️ Could not persist embedding store to {self.directory}: {e}")
+            # Keep serving the fresh vectors from memory for this process
+            self._set_rows(matrix, ids, fingerprints)
+
+    def retain(self, fingerprints):
+        """Drop stored rows whose fingerprint is not in fingerprints (entries that were edited or deleted)"""
+        if self.matrix is None:
+            return
+        keep = [row for row, fp in enumerate(self.fingerprints) if fp in fingerprints]
+        if keep and len(keep) < len(self.fingerprints):
+            self.save([self.ids[row] for row in keep], [self.fingerprints[row] for row in keep], self.matrix[keep])
+
+_embedding_store = EmbeddingStore(EMBEDDING_CACHE_DIR)
+
+# Single worker thread for model loading/encoding: keeps CPU-heavy work off the event loop
+# (Discord heartbeats keep flowing) without running two encodes against the model at once
+_embedding_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='embedding')
+
+async def embed_rag_entries(entries, keep_existing=False, on_batch=None):
+    """Return (ids, fingerprints, matrix) of normalised float32 vectors for the RAG entries that have IDs
+    
+    Vectors are read from the on-disk EmbeddingStore when the entry text is unchanged; only new or edited
+    entries are encoded, EMBEDDING_BATCH_SIZE at a time on the embedding worker thread. The embedding
+    model isn't even loaded when every row is a cache hit. Returns None if the model is unavailable.
+    
+    on_batch(ids, fingerprints, vectors) is awaited for every finished batch (cached rows first) while
+    the next batch is already encoding, so callers can stream vectors straight into upserts.
+    """
+    loop = asyncio.get_running_loop()
+    await loop.run_in_executor(_embedding_executor, _embedding_store.load)
+    entries = [entry for entry in entries if entry.get('id')]
+    ids = [entry['id'] for entry in entries]
+    texts = [build_embedding_text(entry) for entry in entries]
+    fingerprints = [embedding_fingerprint(text) for text in texts]
+    if not entries:
+        return ids, fingerprints, np.zeros((0, 0), dtype=np.float32)
+    
+    # Warm restart with an unchanged knowledge base: hand back the mapped matrix itself (zero copies)
+    if fingerprints == _embedding_store.fingerprints:
+        print(f"💾 All {len(ids)} RAG embeddings loaded from disk (0 encoded)")
+        if on_batch:
+            await on_batch(ids, fingerprints, _embedding_store.matrix)
+        return ids, fingerprints, _embedding_store.matrix
+    
+    cached = [i for i, fp in enumerate(fingerprints) if _embedding_store.get(fp) is not None]
+    missing = [i for i, fp in enumerate(fingerprints) if _embedding_store.get(fp) is None]
+    matrix = None
+    if cached:
+        matrix = np.empty((len(ids), _embedding_store.matrix.shape[1]), dtype=np.float32)
+        for i in cached:
+            matrix[i] = _embedding_store.get(fingerprints[i])
+        if on_batch:
+            await on_batch([ids[i] for i in cached], [fingerprints[i] for i in cached], matrix[cached])
+    
+    if missing:
+        model = await loop.run_in_executor(_embedding_executor, get_embedding_model)
+        if model is None:
+            return None
+        
+        def encode(batch):
+            vectors = model.encode([texts[i] for i in batch], batch_size=EMBEDDING_BATCH_SIZE, convert_to_numpy=True,
+                                   show_progress_bar=False, normalize_embeddings=True)
+            return np.asarray(vectors, dtype=np.float32)
+        
+        batches = [missing[i:i + EMBEDDING_BATCH_SIZE] for i in range(0, len(missing), EMBEDDING_BATCH_SIZE)]
+        started = time.monotonic()
+        pending = loop.run_in_executor(_embedding_executor, encode, batches[0])
+        for n, batch in enumerate(batches):
+            vectors = await pending
+            if n + 1 < len(batches):
+                # Start encoding the next batch while the caller upserts this one
+                pending = loop.run_in_executor(_embedding_executor, encode, batches[n + 1])
+            if matrix is None:
+                matrix = np.empty((len(ids), vectors.shape[1]), dtype=np.float32)
+            matrix[batch] = vectors
+            if on_batch:
+                await on_batch([ids[i] for i in batch], [fingerprints[i] for i in batch], vectors)
+        elapsed = max(time.monotonic() - started, 1e-6)
+        print(f"⚡ Encoded {len(missing)} entries in {elapsed:.2f}s "
+              f"({len(missing) / elapsed:.0f} entries/sec, batch size {EMBEDDING_BATCH_SIZE})")
+    
+    print(f"💾 RAG embeddings: {len(cached)} reused from disk, {len(missing)} encoded")
+    await loop.run_in_executor(_embedding_executor, functools.partial(
+        _embedding_store.save, ids, fingerprints, matrix, keep_existing=keep_existing))
+    return ids, fingerprints, matrix
+
+_embedding_model_lock = threading.Lock()
 
 def get_embedding_model():
     """Lazy load the embedding model (non-blocking, will fallback if fails)"""
@@ -622,12 +1598,18 @@ def get_embedding_model():
     if not ENABLE_EMBEDDINGS:
         return None
     
-    if _embedding_model is None:
+    if _embedding_model is not None:
+        return _embedding_model
+    
+    # Retrieval and indexing threads may ask for the model at the same time - load it once
+    with _embedding_model_lock:
+        if _embedding_model is not None:
+            return _embedding_model
         print("🔧 Loading embedding model for vector search...")
         try:
             # Use a lightweight, fast model for embeddings
             # Model should be pre-cached in Docker image, so this should be fast
-            _embedding_model = SentenceTransformer('all-MiniLM-L6-v2')
+            _embedding_model = SentenceTransformer(EMBEDDING_MODEL_NAME)
             print("✅ Embedding model loaded")
         except Exception as e:
             print(f"⚠️ Failed to load embedding model: {e}")
@@ -694,236 +1676,241 @@ def init_pinecone():
         _pinecone_index = None
         return None
 
-def compute_rag_embeddings():
-    """Compute embeddings for all RAG entries and store ONLY in Pinecone (cost optimization)
+# Per-entry content fingerprint of what the active vector backend currently holds: {entry_id: fingerprint}
+# None = not known yet (Pinecone is inspected once, on the first reconcile after startup)
+_indexed_fingerprints = None
+
+def build_pinecone_metadata(entry, fingerprint):
+    """Metadata stored next to each Pinecone vector (full entry data + the content fingerprint)"""
+    return {
+        'title': entry.get('title', '')[:1000],  # Pinecone metadata limit
+        'content': entry.get('content', '')[:1000],
+        'keywords': ' '.join(entry.get('keywords', []))[:500],
+        'entry_id': entry['id'],  # Store ID for reference
+        'fingerprint': fingerprint
+    }
+
+LEGACY_FINGERPRINT_PREFIX = 'legacy:'
+
+def legacy_embedding_fingerprint(entry):
+    """Fingerprint of the text older bot versions embedded (title + keywords + first 400 chars of content)
     
-    Railway cost optimization: All vector storage and search happens in Pinecone.
-    No local storage unless Pinecone is completely unavailable.
+    Vectors upserted before fingerprints were stored carry none, so they are matched on this instead
+    and adopted as-is while the entry is unchanged; the next edit re-embeds them with build_embedding_text().
     """
-    global _rag_embeddings, _rag_embeddings_version
-    
-    if SKIP_EMBEDDING_BOOTSTRAP:
-        print("⚠️ SKIP_EMBEDDING_BOOTSTRAP=true - skipping embedding computation on this worker. Seed Pinecone externally.")
-        return
-    
-    model = get_embedding_model()
-    if model is None:
-        return
+    title = entry.get('title', '')
+    keywords = ' '.join(entry.get('keywords', []))
+    content = entry.get('content', '')
+    return LEGACY_FINGERPRINT_PREFIX + embedding_fingerprint(f"{title}\n{keywords}\n{content[:400]}")
+
+def load_indexed_fingerprints_from_pinecone(index, entry_ids):
+    """Rebuild {entry_id: fingerprint} from Pinecone metadata
     
-    print(f"🔄 Computing embeddings for {len(RAG_DATABASE)} RAG entries...")
+    Vectors seeded before fingerprints were stored (or by seed_pinecone.py) get a legacy one
+    derived from their title/keywords/content metadata - see legacy_embedding_fingerprint().
+    """
+    ids = set(entry_ids)
+    try:
+        # Serverless indexes can list every id - this also finds orphans the dashboard no longer has
+        for page in index.list():
+            ids.update(page)
+    except Exception as e:
+        print(f"⚠️ Could not list Pinecone ids ({e}) - only checking current RAG entry ids")
+    
+    fingerprints = {}
+    ids = list(ids)
+    for i in range(0, len(ids), 100):
+        fetched = index.fetch(ids=ids[i:i + 100])
+        for vector_id, vector in (fetched.vectors or {}).items():
+            metadata = vector.metadata or {}
+            fingerprints[vector_id] = metadata.get('fingerprint') or legacy_embedding_fingerprint({
+                'title': metadata.get('title', ''),
+                'keywords': [metadata.get('keywords', '')],
+                'content': metadata.get('content', '')
+            })
+    return fingerprints
+
+def plan_vector_sync(by_id, fingerprints, indexed_fingerprints):
+    """Exact diff between RAG entries (as returned by index_rag_entries) and the vector index
+    
+    Returns (adds, updates, delete_ids): entries missing from the index, entries whose
+    embedded text changed, and indexed ids that no longer exist in the RAG database.
+    """
+    adds, updates = [], []
+    for entry_id, entry in by_id.items():
+        known = indexed_fingerprints.get(entry_id)
+        if known is None:
+            adds.append(entry)
+        elif known.startswith(LEGACY_FINGERPRINT_PREFIX):
+            if known != legacy_embedding_fingerprint(entry):
+                updates.append(entry)
+        elif known != fingerprints[entry_id]:
+            updates.append(entry)
+    delete_ids = [entry_id for entry_id in indexed_fingerprints if entry_id not in by_id]
+    return adds, updates, delete_ids
+
+_vector_sync_lock = asyncio.Lock()  # One reconcile at a time (startup backfill and periodic sync can overlap)
+
+# Un-truncated RAG entries from the last dashboard sync, held only until Pinecone has them
+# RAG_DATABASE content is cut to 500 chars, but Pinecone metadata carries up to 1000 (the full answer)
+_pending_vector_entries = None
+
+async def reconcile_vector_index(entries=None):
+    """Bring the active vector backend in line with the RAG entries via an exact add/update/delete plan
+    
+    Only added or edited entries are embedded and upserted, and removed entries are deleted,
+    so a sync after one edit costs one embedding and one upsert instead of a full re-upload.
+    Encoding and Pinecone calls run in worker threads; finished batches stream into upserts.
+    Defaults to the pending un-truncated synced entries, then RAG_DATABASE.
+    Returns a report dict ({'added', 'updated', 'deleted', 'unchanged'}), or None if nothing could be synced.
+    """
+    global _pending_vector_entries
+    async with _vector_sync_lock:
+        if entries is None:
+            entries = _pending_vector_entries if _pending_vector_entries is not None else RAG_DATABASE
+        report = await _reconcile_vector_index(entries)
+        if report is not None and entries is _pending_vector_entries:
+            # MEMORY OPTIMIZATION: Pinecone now has the full content, drop our copy of it
+            _pending_vector_entries = None
+        return report
+
+async def _reconcile_vector_index(entries):
+    global _indexed_fingerprints, _rag_embeddings_version
+    
+    loop = asyncio.get_running_loop()
+    index = None
+    if USE_PINECONE:
+        index = await loop.run_in_executor(None, init_pinecone)
+        if not index:
+            print("⚠️ Cannot sync vectors - Pinecone index not available")
+            return None
+    elif not USE_LOCAL_VECTOR_INDEX:
+        return None
     
-    # COST OPTIMIZATION: Always try Pinecone first - it's much cheaper than Railway CPU
-    index = init_pinecone() if USE_PINECONE else None
+    # Id map + fingerprints only - the BM25 index of a snapshot isn't needed to diff vectors
+    if entries is RAG_DATABASE:
+        snapshot = get_rag_snapshot()
+        by_id, fingerprints = snapshot.by_id, snapshot.fingerprints
+    else:
+        by_id, fingerprints = index_rag_entries(entries)
     
-    if index:
-        # Use Pinecone for storage (cost-effective - offloads from Railway)
-        print("🌲 Storing embeddings in Pinecone (cost-optimized - Railway CPU saved)...")
-        vectors_to_upsert = []
-        
-        for entry in RAG_DATABASE:
-            entry_id = entry.get('id', '')
-            if not entry_id:
-                continue
-            
-            # Combine title, content, and keywords for embedding
-            title = entry.get('title', '')
-            content = entry.get('content', '')
-            keywords = ' '.join(entry.get('keywords', []))
-            
-            # Create a combined text for embedding
-            # CPU OPTIMIZATION: Limit content to 400 chars (balance between quality and CPU cost)
-            # Full content still stored in Pinecone metadata (1000 chars)
-            combined_text = f"{title}\n{keywords}\n{content[:400]}"
-            
+    if _indexed_fingerprints is None:
+        if index:
             try:
-                # Compute embedding (minimal CPU - just encoding)
-                embedding = model.encode(combined_text, convert_to_numpy=True)
-                embedding_list = embedding.tolist()
-                
-                # Prepare metadata (store full entry data in Pinecone)
-                metadata = {
-                    'title': title[:1000],  # Pinecone metadata limit
-                    'content': content[:1000],
-                    'keywords': ' '.join(entry.get('keywords', []))[:500],
-                    'entry_id': entry_id  # Store ID for reference
-                }
-                
-                vectors_to_upsert.append({
-                    'id': entry_id,
-                    'values': embedding_list,
-                    'metadata': metadata
-                })
+                entry_ids = list(by_id)
+                _indexed_fingerprints = await loop.run_in_executor(
+                    None, load_indexed_fingerprints_from_pinecone, index, entry_ids)
+                print(f"🌲 Pinecone holds {len(_indexed_fingerprints)} vectors - diffing against RAG database")
             except Exception as e:
-                print(f"⚠️ Failed to compute embedding for entry {entry_id}: {e}")
-                continue
-        
-        # Batch upsert to Pinecone (upsert in chunks of 100 for efficiency)
-        try:
-            chunk_size = 100
+                print(f"⚠️ Could not read Pinecone state ({e}) - all entries will be upserted")
+                _indexed_fingerprints = {}
+        else:
+            _indexed_fingerprints = {}
+    
+    if SKIP_EMBEDDING_BOOTSTRAP and not _indexed_fingerprints:
+        print("⚠️ Vector index is empty and SKIP_EMBEDDING_BOOTSTRAP=true - not seeding it on this worker. Seed Pinecone externally.")
+        return None
+    
+    adds, updates, delete_ids = plan_vector_sync(by_id, fingerprints, _indexed_fingerprints)
+    report = {
+        'added': len(adds),
+        'updated': len(updates),
+        'deleted': len(delete_ids),
+        'unchanged': len(by_id) - len(adds) - len(updates)
+    }
+    if not (adds or updates or delete_ids):
+        print(f"✅ Vector index up to date ({report['unchanged']} entries unchanged)")
+        return report
+    
+    if USE_LOCAL_VECTOR_INDEX:
+        # The local index holds every vector, so rebuild it from the store (only changed rows get encoded)
+        embedded = await embed_rag_entries(entries)
+        if embedded is None:
+            return None
+        ids, fingerprints, matrix = embedded
+        _local_vector_index.build(ids, matrix, normalized=True)
+        _indexed_fingerprints = dict(zip(ids, fingerprints))
+    else:
+        changed = adds + updates
+        entries_by_id = {entry['id']: entry for entry in changed}
+        chunk_size = 100  # Pinecone upsert/delete chunk size
+        
+        async def upsert_batch(batch_ids, batch_fingerprints, vectors):
+            # Record progress per chunk so a failure part-way resumes from here on the next sync
+            vectors_to_upsert = [
+                {'id': entry_id, 'values': vector.tolist(), 'metadata': build_pinecone_metadata(entries_by_id[entry_id], fp)}
+                for entry_id, fp, vector in zip(batch_ids, batch_fingerprints, vectors)
+            ]
             for i in range(0, len(vectors_to_upsert), chunk_size):
                 chunk = vectors_to_upsert[i:i + chunk_size]
-                index.upsert(vectors=chunk)
-            print(f"✅ Upserted {len(vectors_to_upsert)} embeddings to Pinecone (Railway CPU saved!)")
-            
-            # COST OPTIMIZATION: Clear local storage when using Pinecone to save Railway memory
-            _rag_embeddings = {}
-            print("💡 Cleared local embeddings cache (using Pinecone only - saves Railway memory)")
+                await loop.run_in_executor(None, functools.partial(index.upsert, vectors=chunk))
+                _indexed_fingerprints.update({v['id']: v['metadata']['fingerprint'] for v in chunk})
+        
+        try:
+            if changed:
+                embedded = await embed_rag_entries(changed, keep_existing=True, on_batch=upsert_batch)
+                if embedded is None:
+                    print("⚠️ Cannot sync to Pinecone - embedding model not loaded")
+                    return None
+            for i in range(0, len(delete_ids), chunk_size):
+                chunk = delete_ids[i:i + chunk_size]
+                await loop.run_in_executor(None, functools.partial(index.delete, ids=chunk))
+                for entry_id in chunk:
+                    _indexed_fingerprints.pop(entry_id, None)
         except Exception as e:
-            print(f"⚠️ Failed to upsert to Pinecone: {e}")
-            print("   Falling back to local storage (temporary - fix Pinecone connection)")
-            index = None
-    
-    # COST OPTIMIZATION: Don't use local CPU storage - it's expensive!
-    # If Pinecone is unavailable, just skip embeddings and use keyword search instead
-    if not index:
-        print("⚠️ Pinecone unavailable - skipping embeddings to save Railway CPU costs")
-        print("   Bot will use keyword-based search (free, no CPU cost)")
-        print("   💡 Set PINECONE_API_KEY to enable cost-effective vector search")
-        # Clear any existing embeddings to save memory
-        _rag_embeddings = {}
-        # Don't compute embeddings locally - keyword search is free and doesn't use CPU
-        print("   ✅ Skipped local embedding computation (saves Railway CPU costs)")
+            print(f"⚠️ Pinecone sync failed part-way: {e}")
+            return None
+        await loop.run_in_executor(_embedding_executor, _embedding_store.retain, set(_indexed_fingerprints.values()))
     
     _rag_embeddings_version += 1
-    print(f"✅ Embedding computation complete (version {_rag_embeddings_version})")
+    print(f"🔁 Vector sync ({retrieval_backend_name()}): +{report['added']} added, ~{report['updated']} updated, "
+          f"-{report['deleted']} deleted, {report['unchanged']} unchanged (version {_rag_embeddings_version})")
+    return report
 
-async def compute_embeddings_background():
-    """Background task to compute embeddings without blocking bot startup"""
-    try:
-        # Small delay to let bot finish startup
-        await asyncio.sleep(2)
-        compute_rag_embeddings()
-    except Exception as e:
-        print(f"⚠️ Error in background embedding computation: {e}")
-        print("   Bot will continue with keyword-based search until embeddings are ready")
-
-async def sync_new_entries_to_pinecone(new_rag_entries, old_rag_entries):
-    """MEMORY OPTIMIZATION: Incrementally sync only new RAG entries to Pinecone
+async def compute_rag_embeddings():
+    """Make sure the active vector backend holds embeddings for all RAG entries
     
-    This avoids recomputing all embeddings when only a few entries are added.
-    Works even with SKIP_EMBEDDING_BOOTSTRAP=true to save Railway CPU.
-    
-    Args:
-        new_rag_entries: List of new RAG entries from API
-        old_rag_entries: List of old RAG entries (before update)
+    Pinecone (default): vectors are upserted to the cloud index, nothing is kept on Railway.
+    Local (VECTOR_BACKEND=local): vectors are kept in the in-process LocalVectorIndex.
+    Both go through reconcile_vector_index(), so only missing or changed entries are embedded.
     """
-    if not USE_PINECONE or not ENABLE_EMBEDDINGS:
+    if SKIP_EMBEDDING_BOOTSTRAP:
+        print("⚠️ SKIP_EMBEDDING_BOOTSTRAP=true - skipping embedding computation on this worker. Seed Pinecone externally.")
         return
     
-    model = get_embedding_model()
-    if model is None:
-        print("⚠️ Cannot sync to Pinecone - embedding model not loaded")
+    if not ENABLE_EMBEDDINGS:
         return
     
-    index = init_pinecone()
-    if not index:
-        print("⚠️ Cannot sync to Pinecone - index not available")
-        return
+    # COST OPTIMIZATION: Don't use local CPU storage unless VECTOR_BACKEND=local - it's expensive!
+    # If Pinecone is unavailable, just skip embeddings and use keyword search instead
+    if not USE_LOCAL_VECTOR_INDEX:
+        index = await asyncio.get_running_loop().run_in_executor(None, init_pinecone) if USE_PINECONE else None
+        if not index:
+            print("⚠️ Pinecone unavailable - skipping embeddings to save Railway CPU costs")
+            print("   Bot will use keyword-based search (free, no CPU cost)")
+            print("   💡 Set PINECONE_API_KEY to enable cost-effective vector search")
+            return
     
+    print(f"🔄 Syncing embeddings for {len(RAG_DATABASE)} RAG entries...")
     try:
-        # Get existing vector count from Pinecone
-        stats = index.describe_index_stats()
-        existing_count = stats.total_vector_count
-        
-        # If Pinecone is empty, upload all entries
-        if existing_count == 0:
-            print("🌲 Pinecone is empty - uploading all entries...")
-            compute_rag_embeddings()
-            return
-        
-        # Compare entry IDs to find truly new entries
-        old_entry_ids = {entry.get('id') for entry in old_rag_entries if entry.get('id')}
-        new_entry_ids = {entry.get('id') for entry in new_rag_entries if entry.get('id')}
-        truly_new_ids = new_entry_ids - old_entry_ids
-        
-        if not truly_new_ids:
-            print(f"✅ No new entry IDs detected (all {len(new_entry_ids)} entries already in RAG database)")
-            # Still check Pinecone in case entries were added but RAG_DATABASE wasn't updated properly
-            if len(new_entry_ids) > existing_count:
-                print(f"⚠️ RAG has {len(new_entry_ids)} entries but Pinecone has {existing_count} - checking Pinecone...")
-                # Fetch all new entry IDs from Pinecone to see which are missing
-                try:
-                    batch_size = 100
-                    entry_id_list = list(new_entry_ids)
-                    existing_ids_in_pinecone = set()
-                    for i in range(0, len(entry_id_list), batch_size):
-                        batch = entry_id_list[i:i + batch_size]
-                        try:
-                            fetched_batch = index.fetch(ids=batch)
-                            if fetched_batch.vectors:
-                                existing_ids_in_pinecone.update(fetched_batch.vectors.keys())
-                        except Exception as fetch_err:
-                            print(f"⚠️ Error fetching batch: {fetch_err}")
-                            # If fetch fails, assume they don't exist and upload them
-                    
-                    missing_ids = new_entry_ids - existing_ids_in_pinecone
-                    if missing_ids:
-                        truly_new_ids = missing_ids
-                        print(f"🌲 Found {len(missing_ids)} entries missing from Pinecone")
-                    else:
-                        print(f"✅ All entries already in Pinecone")
-                        return
-                except Exception as e:
-                    print(f"⚠️ Could not verify entries in Pinecone: {e}")
-                    return
-            else:
-                return
-        
-        if truly_new_ids:
-            print(f"🌲 Found {len(truly_new_ids)} new RAG entries by ID comparison - uploading to Pinecone...")
-            new_entries = [entry for entry in new_rag_entries if entry.get('id') in truly_new_ids]
-            
-            vectors_to_upsert = []
-            for entry in new_entries:
-                entry_id = entry.get('id', '')
-                if not entry_id:
-                    continue
-                
-                # Combine title, content, and keywords for embedding
-                title = entry.get('title', '')
-                content = entry.get('content', '')
-                keywords = ' '.join(entry.get('keywords', []))
-                combined_text = f"{title}\n{keywords}\n{content[:500]}"
-                
-                try:
-                    # Compute embedding for new entry only
-                    embedding = model.encode(combined_text, convert_to_numpy=True)
-                    embedding_list = embedding.tolist()
-                    
-                    metadata = {
-                        'title': title[:1000],
-                        'content': content[:1000],
-                        'keywords': ' '.join(entry.get('keywords', []))[:500],
-                        'entry_id': entry_id
-                    }
-                    
-                    vectors_to_upsert.append({
-                        'id': entry_id,
-                        'values': embedding_list,
-                        'metadata': metadata
-                    })
-                except Exception as e:
-                    print(f"⚠️ Failed to compute embedding for entry {entry_id}: {e}")
-                    continue
-            
-            # Upload new entries to Pinecone
-            if vectors_to_upsert:
-                chunk_size = 100
-                for i in range(0, len(vectors_to_upsert), chunk_size):
-                    chunk = vectors_to_upsert[i:i + chunk_size]
-                    index.upsert(vectors=chunk)
-                print(f"✅ Synced {len(vectors_to_upsert)} new entries to Pinecone")
-            else:
-                print("⚠️ No entries to sync after processing")
-        else:
-            print(f"✅ All entries already synced to Pinecone")
+        await reconcile_vector_index()
     except Exception as e:
-        print(f"⚠️ Error syncing new entries to Pinecone: {e}")
-        import traceback
-        traceback.print_exc()
+        print(f"⚠️ Failed to sync embeddings: {e}")
+        print("   Bot will use keyword-based search until the vector index is rebuilt")
+
+async def compute_embeddings_background():
+    """Background task to compute embeddings without blocking bot startup"""
+    try:
+        # Small delay to let bot finish startup
+        await asyncio.sleep(2)
+        await compute_rag_embeddings()
+    except Exception as e:
+        print(f"⚠️ Error in background embedding computation: {e}")
+        print("   Bot will continue with keyword-based search until embeddings are ready")
 
 # Cooldown tracking for /ask command on friends server (1 minute cooldown)
-ask_cooldowns = {}  # {user_id: last_used_timestamp}
+ASK_COOLDOWN_SECONDS = 600  # /ask cooldown on the friend's server (10 minutes)
+ask_cooldowns = LRUCache('/ask cooldowns', 10000, ASK_COOLDOWN_SECONDS)  # {user_id: last_used_timestamp} - entries expire with the cooldown
 
 # Track support notification messages so we can delete them when classification is done
 support_notification_messages = {}  # {thread_id: message_id}
@@ -945,120 +1932,359 @@ BOT_SETTINGS = {
     'last_updated': datetime.now().isoformat()
 }
 
-# --- GROQ API RATE LIMITING (tracked per key now) ---
-from collections import deque
-
-# Track API calls per key (for monitoring)
-groq_api_calls_by_key = {key[:10] + '...': deque(maxlen=100) for key in GROQ_API_KEYS}
+# --- GROQ API RATE LIMITING ---
+# Per-key RPM/TPM token buckets live on GroqKeyManager.limiters (see KeyRateLimiter)
 
 # MEMORY OPTIMIZATION: Cache for AI responses (reduces duplicate API calls)
-ai_response_cache = {}  # {query_hash: (response, timestamp)}
 AI_CACHE_TTL = 7200  # Cache responses for 2 hours (increased to reduce API calls and Railway costs)
 AI_CACHE_MAX_SIZE = 100  # Maximum cache entries (increased to reduce API calls, but still memory-safe)
+AI_CACHE_MAX_BYTES = 2 * 1024 * 1024  # Answers are a few KB each - this only bites on unusually long ones
+ai_response_cache = LRUCache('AI answers', AI_CACHE_MAX_SIZE, AI_CACHE_TTL, AI_CACHE_MAX_BYTES)  # {query_hash: response}
 
-# Hash for data change detection (skip unnecessary syncs)
-last_data_hash = None
-
-async def check_rate_limit(key_manager=None, api_calls_dict=None):
-    """Check if we can make a Groq API call without hitting rate limit
-    Proactively rotates to best key before hitting limits
+class DiskAnswerCache:
+    """SQLite tier behind ai_response_cache so cached AI answers survive restarts and redeploys
     
-    Args:
-        key_manager: The GroqKeyManager to use (defaults to groq_key_manager)
-        api_calls_dict: Dictionary tracking API calls per key (defaults to groq_api_calls_by_key)
+    Same keys (ai_response_cache_key) and TTL as the in-memory LRU. The database is opened on
+    first use rather than at startup, and expired rows (plus the oldest beyond max_entries) are
+    pruned then and every PRUNE_EVERY writes. Methods block on disk I/O - call them from a worker
+    thread. Any SQLite error disables the tier for the rest of the process (answers still get cached in memory).
     """
-    if key_manager is None:
-        key_manager = groq_key_manager
-    if api_calls_dict is None:
-        api_calls_dict = groq_api_calls_by_key
     
-    current_key = key_manager.get_current_key()
-    key_short = current_key[:10] + '...'
-    
-    if key_short not in api_calls_dict:
-        api_calls_dict[key_short] = deque(maxlen=100)
-    
-    api_calls = api_calls_dict[key_short]
-    now = datetime.now()
-    
-    # Remove calls older than 1 minute
-    while api_calls and (now - api_calls[0]).total_seconds() > 60:
-        api_calls.popleft()
-    
-    recent_count = len(api_calls)
-    
-    # Proactive rotation: if we're at 20+ calls (approaching Groq's 30 req/min limit), rotate to a better key
-    if recent_count >= 20:
-        print(f"⚠️ Key {key_short} has {recent_count}/30 calls - proactively rotating to better key")
-        key_manager.rotate_key()
-        new_key = key_manager.get_current_key()
-        new_key_short = new_key[:10] + '...'
-        
-        # Check the new key
-        if new_key_short not in api_calls_dict:
-            api_calls_dict[new_key_short] = deque(maxlen=100)
-        new_api_calls = api_calls_dict[new_key_short]
-        
-        # Clean old calls
-        while new_api_calls and (now - new_api_calls[0]).total_seconds() > 60:
-            new_api_calls.popleft()
-        
-        new_recent_count = len(new_api_calls)
-        
-        if new_recent_count >= 30:
-            # All keys are at limit, must wait
-            if new_api_calls:
-                oldest_call = new_api_calls[0]
-                wait_time = 60 - (now - oldest_call).total_seconds()
-                print(f"⚠️ ALL KEYS AT LIMIT: {new_recent_count}/10 calls. Waiting {wait_time:.1f}s...")
-                return False
-            return True
-        else:
-            print(f"✓ Rotated to key {new_key_short} with {new_recent_count}/30 calls")
-            return True
-    
-    # Check if we're at the hard limit (10 per minute per key)
-    if recent_count >= 10:
-        # Try rotating to a better key
-        key_manager.rotate_key()
-        new_key = key_manager.get_current_key()
-        new_key_short = new_key[:10] + '...'
-        
-        if new_key_short != key_short:
-            print(f"⚠️ Key {key_short} at limit ({recent_count}/10), rotated to {new_key_short}")
-            return True  # Can proceed with new key
-        else:
-            # No better key available, must wait
-            oldest_call = api_calls[0]
-            wait_time = 60 - (now - oldest_call).total_seconds()
-            print(f"⚠️ RATE LIMIT: {recent_count}/10 API calls in last minute. Waiting {wait_time:.1f}s...")
-            return False
+    PRUNE_EVERY = 200
+    
+    def __init__(self, directory, ttl, max_entries):
+        self.path = Path(directory) / 'ai_answers.sqlite3' if directory else None
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._conn = None
+        self._lock = threading.Lock()
+        self._failed = False
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+    
+    @property
+    def enabled(self):
+        return self.path is not None and not self._failed
+    
+    def _connect(self):
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.path), timeout=5, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('CREATE TABLE IF NOT EXISTS answers (key TEXT PRIMARY KEY, response TEXT NOT NULL, stored_at REAL NOT NULL)')
+            conn.execute('CREATE INDEX IF NOT EXISTS answers_stored_at ON answers (stored_at)')
+            self._conn = conn
+            removed = self._prune()
+            count = conn.execute('SELECT COUNT(*) FROM answers').fetchone()[0]
+            print(f"💾 Opened AI answer cache {self.path} ({count} cached answers, {removed} expired removed)")
+        return self._conn
+    
+    def _prune(self):
+        conn = self._conn
+        removed = conn.execute('DELETE FROM answers WHERE stored_at < ?', (time.time() - self.ttl,)).rowcount
+        removed += conn.execute(
+            'DELETE FROM answers WHERE key IN (SELECT key FROM answers ORDER BY stored_at DESC LIMIT -1 OFFSET ?)',
+            (self.max_entries,)
+        ).rowcount
+        conn.commit()
+        return removed
+    
+    def _disable(self, error):
+        self._failed = True
+        print(f"⚠️ AI answer cache on disk disabled ({type(error).__name__}: {error}) - using the in-memory cache only")
+    
+    def get(self, key):
+        """Cached answer for key, or None (missing or older than the TTL)"""
+        if not self.enabled:
+            return None
+        try:
+            with self._lock:
+                row = self._connect().execute('SELECT response, stored_at FROM answers WHERE key = ?', (key,)).fetchone()
+        except (sqlite3.Error, OSError) as e:
+            self._disable(e)
+            return None
+        if row is None or time.time() - row[1] > self.ttl:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return row[0]
     
-    return True
+    def set(self, key, response):
+        if not self.enabled:
+            return
+        try:
+            with self._lock:
+                conn = self._connect()
+                conn.execute('INSERT OR REPLACE INTO answers (key, response, stored_at) VALUES (?, ?, ?)', (key, response, time.time()))
+                conn.commit()
+                self.writes += 1
+                if self.writes % self.PRUNE_EVERY == 0:
+                    self._prune()
+        except (sqlite3.Error, OSError) as e:
+            self._disable(e)
+    
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+    
+    def format_stats(self):
+        if self.path is None:
+            return "**AI answers (disk):** disabled"
+        if self._failed:
+            return "**AI answers (disk):** unavailable"
+        lookups = self.hits + self.misses
+        hit_rate = (self.hits / lookups * 100) if lookups else 0.0
+        return f"**AI answers (disk):** {hit_rate:.0f}% hits ({self.hits} hit / {self.misses} miss) · {self.writes} written"
+
+_disk_answer_cache = DiskAnswerCache(AI_CACHE_DIR, AI_CACHE_TTL, AI_CACHE_DISK_MAX_ENTRIES)
+
+# COST OPTIMIZATION: Single-flight - identical concurrent questions share one in-flight generation
+_inflight_generations = {}  # {cache_key: asyncio.Future resolving to the leader's answer (None if it failed)}
+single_flight_stats = {'leaders': 0, 'coalesced': 0}
+
+# Hash for data change detection (skip unnecessary syncs)
+last_data_hash = None
+last_rag_hash = None  # Content hash of RAG entries (catches edits, not just added/removed IDs)
+# BANDWIDTH OPTIMIZATION: Sync point for conditional (ETag) and delta (?since=version) dashboard syncs
+data_sync_state = {'etag': None, 'version': None, 'last_full_sync': 0.0, 'not_modified': 0, 'deltas': 0, 'full': 0}
 
-def track_api_call(key_manager=None, api_calls_dict=None):
-    """Track that we made a Groq API call
+def track_api_call(lease):
+    """Log that we're making a Groq API call on a leased key (its budget was reserved by lease.reserve)
     
     Args:
-        key_manager: The GroqKeyManager to use (defaults to groq_key_manager)
-        api_calls_dict: Dictionary tracking API calls per key (defaults to groq_api_calls_by_key)
+        lease: The KeyLease the call is made with
     """
-    if key_manager is None:
-        key_manager = groq_key_manager
-    if api_calls_dict is None:
-        api_calls_dict = groq_api_calls_by_key
+    key_manager = lease.manager
+    in_flight = sum(key_manager.key_in_flight.values())
+    print(f"📊 Using key {lease.key_short} ({lease.index + 1}/{len(key_manager.api_keys)}) | "
+          f"{lease.limiter.recent_requests()}/{GROQ_RPM_LIMIT} calls this minute | "
+          f"{key_manager.key_in_flight[lease.key_short]} in flight on this key, {in_flight} total")
+
+# --- FORUM POST CACHE ---
+# BANDWIDTH OPTIMIZATION: The bot is the only writer of its threads' posts, so it keeps them locally
+# and sends the dashboard small per-post deltas instead of GET-all-posts + full-post update per message
+FORUM_POST_CACHE_SIZE = max(1, int(os.getenv('FORUM_POST_CACHE_SIZE', '500')))
+# Deltas are buffered this long and flushed as one request (0 = send each change immediately)
+FORUM_WRITE_BEHIND_SECONDS = max(0.0, float(os.getenv('FORUM_WRITE_BEHIND_SECONDS', '2')))
+
+class ForumPostCache:
+    """Local copy of the dashboard's forum posts, keyed by thread ID, with write-behind deltas
+    
+    load() answers from memory; a miss fetches just that post (?postId=) instead of every post.
+    append_message() and set_status() update the local post immediately and queue the change;
+    every change queued within write_behind seconds (across all threads) goes out as one 'batch'
+    request. Posts the dashboard doesn't know (e.g. its in-memory store was reset) are re-sent in
+    full as an 'update'; so is every post in the batch if the deployment predates 'batch'. Posts
+    whose write fails are marked dirty and re-sent in full (from the local copy, so nothing extra is
+    held in memory) by a retry flush with exponential backoff. Network errors are logged, never
+    raised. Call flush() before shutdown.
+    """
+    
+    MAX_PENDING_POSTS = 200
+    MAX_PENDING_MESSAGES = 1000
+    MAX_RETRY_DELAY = 60.0
+    
+    def __init__(self, max_posts, write_behind=FORUM_WRITE_BEHIND_SECONDS):
+        self._posts = LRUCache('Forum posts', max_posts)
+        self.write_behind = write_behind
+        self._pending = {}  # {postId: {'postId': str, 'messages': [...], 'status': str (optional)}}
+        self._pending_messages = 0
+        self._dirty = set()  # postIds whose last write failed - re-sent in full by the next flush
+        self._retry_delay = None  # Backoff while writes keep failing (None = last flush succeeded)
+        self._flush_task = None
+        self._flush_lock = asyncio.Lock()
+        self.fetches = 0
+        self.changes_queued = 0
+        self.flushes = 0
+        self.requests_sent = 0
+        self.full_resyncs = 0
+        self.flush_latencies = deque(maxlen=100)
+    
+    @property
+    def enabled(self):
+        return 'your-vercel-app' not in DATA_API_URL
+    
+    @staticmethod
+    def _api_url():
+        return DATA_API_URL.replace('/api/data', '/api/forum-posts')
+    
+    def get(self, thread_id):
+        return self._posts.get(str(thread_id))
+    
+    def put(self, post):
+        """Remember a post the bot just sent to the dashboard in full"""
+        if post and post.get('postId'):
+            self._posts.set(str(post['postId']), post)
+    
+    def forget(self, thread_id):
+        post_id = str(thread_id)
+        self._posts.pop(post_id)
+        self._dirty.discard(post_id)
+        pending = self._pending.pop(post_id, None)
+        if pending:
+            self._pending_messages -= len(pending['messages'])
+    
+    async def load(self, thread_id):
+        """The thread's post (cached, or fetched from the dashboard on a miss), or None if it has none"""
+        post = self.get(thread_id)
+        if post is not None or not self.enabled:
+            return post
+        post_id = str(thread_id)
+        self.fetches += 1
+        try:
+            async with dashboard_http.get(self._api_url(), params={'postId': post_id}) as response:
+                if response.status != 200:
+                    return None
+                posts = await response.json()
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+            print(f"⚠️ Could not fetch forum post {post_id}: {e}")
+            return None
+        # Filter locally too - older deployments ignore ?postId= and return every post
+        for candidate in posts or []:
+            if candidate.get('postId') == post_id or candidate.get('id') == f'POST-{post_id}':
+                self.put(candidate)
+                return candidate
+        return None
     
-    current_key = key_manager.get_current_key()
-    key_short = current_key[:10] + '...'
+    async def create(self, post):
+        """Cache a new post and send it to the dashboard now. Returns True if the dashboard accepted it."""
+        self.put(post)
+        self.requests_sent += 1
+        return isinstance(await self._post({'action': 'create', 'post': post}), dict)
+    
+    async def append_message(self, thread_id, message, status=None):
+        """Append one message (and optionally change the status) on the thread's post
+        
+        Returns the post's updated conversation, or None if the thread has no post.
+        """
+        post = await self.load(thread_id)
+        if post is None:
+            return None
+        post.setdefault('conversation', []).append(message)
+        if status:
+            post['status'] = status
+        await self._queue(str(thread_id), message=message, status=status)
+        return post['conversation']
+    
+    async def set_status(self, thread_id, status):
+        """Change the thread's post status. Returns True if the change was queued (False if it has no post)."""
+        post = await self.load(thread_id)
+        if post is None:
+            return False
+        post['status'] = status
+        await self._queue(str(thread_id), status=status)
+        return True
+    
+    async def _queue(self, post_id, message=None, status=None):
+        if not self.enabled:
+            return
+        self.changes_queued += 1
+        pending = self._pending.setdefault(post_id, {'postId': post_id, 'messages': []})
+        if message is not None:
+            pending['messages'].append(message)
+            self._pending_messages += 1
+        if status:
+            pending['status'] = status  # Only the latest status matters
+        if (not self.write_behind or len(self._pending) >= self.MAX_PENDING_POSTS
+                or self._pending_messages >= self.MAX_PENDING_MESSAGES):
+            await self.flush()
+        elif self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_later())
+    
+    async def _flush_later(self, delay=None):
+        await asyncio.sleep(self.write_behind if delay is None else delay)
+        self._flush_task = None  # Changes queued during the flush schedule the next one
+        await self.flush()
+    
+    def _schedule_retry(self):
+        self._retry_delay = min((self._retry_delay or max(self.write_behind, 1.0)) * 2, self.MAX_RETRY_DELAY)
+        if self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_later(self._retry_delay))
+        print(f"⚠️ {len(self._dirty)} forum post(s) not saved to the dashboard - retrying in {self._retry_delay:.0f}s")
+    
+    async def flush(self):
+        """Send every queued change now, as one request"""
+        if self._flush_task is not None and self._flush_task is not asyncio.current_task():
+            self._flush_task.cancel()
+            self._flush_task = None
+        async with self._flush_lock:
+            if not self._pending and not self._dirty:
+                return
+            pending, self._pending, self._pending_messages = self._pending, {}, 0
+            started = time.perf_counter()
+            # Every dirty post is re-sent in full, whether or not it changed since its write failed
+            updates = [update for post_id, update in pending.items() if post_id not in self._dirty]
+            resync = list(self._dirty)
+            if updates:
+                self.requests_sent += 1
+                result = await self._post({'action': 'batch', 'updates': updates}, resync_on=(400, 404))
+                if result == 400:
+                    # Deployment predates 'batch' - fall back to full posts
+                    resync += [update['postId'] for update in updates]
+                elif isinstance(result, dict):
+                    resync += [str(post_id) for post_id in result.get('missing', [])]
+                else:
+                    # Dashboard unreachable - don't hammer it with per-post resyncs in this flush
+                    self._dirty.update(update['postId'] for update in updates)
+                    resync = []
+            for post_id in dict.fromkeys(resync):
+                if not await self._resync(post_id):
+                    break  # The rest stay dirty for the retry
+            self.flushes += 1
+            self.flush_latencies.append(time.perf_counter() - started)
+            if self._dirty:
+                self._schedule_retry()
+            else:
+                self._retry_delay = None
+    
+    async def _resync(self, post_id):
+        """Re-send the full post. Returns False if the write failed (the post stays dirty)."""
+        post = self.get(post_id)
+        if post is None:
+            print(f"⚠️ Forum post {post_id} dropped from the local cache before it could be re-sent")
+            self._dirty.discard(post_id)
+            return True
+        self.full_resyncs += 1
+        self.requests_sent += 1
+        if isinstance(await self._post({'action': 'update', 'post': post}), dict):
+            self._dirty.discard(post_id)
+            return True
+        self._dirty.add(post_id)
+        return False
     
-    if key_short not in api_calls_dict:
-        api_calls_dict[key_short] = deque(maxlen=100)
+    async def _post(self, payload, resync_on=()):
+        """POST payload. Returns the JSON body ({} if none) on success, the status code if it's in resync_on, else None."""
+        if not self.enabled:
+            return None
+        try:
+            async with dashboard_http.post(self._api_url(), json=payload) as response:
+                if response.status == 200:
+                    try:
+                        body = await response.json()
+                    except (aiohttp.ContentTypeError, ValueError):
+                        body = None
+                    return body if isinstance(body, dict) else {}
+                if response.status in resync_on:
+                    return response.status
+                text = await response.text()
+                print(f"⚠️ Forum post {payload.get('action')} failed: Status {response.status}, Response: {text[:100]}")
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            print(f"⚠️ Forum post {payload.get('action')} failed: {e}")
+        return None
     
-    api_calls_dict[key_short].append(datetime.now())
-    usage_stats = key_manager.get_usage_stats()
-    total_keys = len(key_manager.api_keys)
-    current_index = key_manager.current_key_index
-    print(f"📊 Using key {key_short} ({current_index + 1}/{total_keys}) | Calls on this key: {key_manager.current_key_calls}/{key_manager.calls_per_key} | Total usage: {usage_stats}")
+    def format_stats(self):
+        latencies = sorted(self.flush_latencies)
+        latency = (f"flush {latencies[len(latencies) // 2] * 1000:.0f}ms p50 / "
+                   f"{latencies[int(len(latencies) * 0.95)] * 1000:.0f}ms p95") if latencies else "no flushes yet"
+        return (f"{self._posts.format_stats()} · {self.fetches} fetched\n"
+                f"**Forum writes:** {len(self._pending)} posts / {self._pending_messages} messages queued · "
+                f"{len(self._dirty)} awaiting retry · "
+                f"{self.changes_queued} changes in {self.requests_sent} requests ({self.full_resyncs} full resyncs) · {latency}")
+
+forum_post_cache = ForumPostCache(FORUM_POST_CACHE_SIZE)
 
 # --- SATISFACTION ANALYSIS TIMERS ---
 # Track pending satisfaction analysis tasks per thread
@@ -1376,7 +2602,7 @@ class SolvedButton(discord.ui.View):
             if BOT_SETTINGS.get('auto_rag_enabled', True) and self.thread_id not in no_review_threads and rag_entry and 'your-vercel-app' not in DATA_API_URL:
                 data_api_url_rag = DATA_API_URL
                 
-                async with aiohttp.ClientSession() as rag_session:
+                async with dashboard_http.borrow() as rag_session:
                     async with rag_session.get(data_api_url_rag) as get_data_response:
                         current_data = {'ragEntries': [], 'autoResponses': [], 'slashCommands': [], 'pendingRagEntries': []}
                         if get_data_response.status == 200:
@@ -1492,7 +2718,7 @@ class SolvedButton(discord.ui.View):
             print(f"🖼️ Skipping image processing (disabled)")
             
             # ALWAYS try to find RAG entries and use them
-            relevant_docs = find_relevant_rag_entries(user_question)
+            relevant_docs = await find_relevant_rag_entries_async(user_question)
             print(f"📚 Found {len(relevant_docs)} relevant knowledge base entries")
             
             # Generate AI response - ALWAYS use knowledge base if available
@@ -1656,11 +2882,10 @@ class OSLogTutorialSelect(discord.ui.View):
 
 async def update_forum_post_status(thread_id, status):
     """Helper function to update forum post status in dashboard (in-memory only, not persisted)"""
-    # RAILWAY COST OPTIMIZATION: Skip API calls for forum post updates since they're not persisted anyway
-    # Forum posts are in-memory only, so frequent API updates waste Railway bandwidth
-    # Only log the status change locally
-    print(f"ℹ️ Forum post status changed to '{status}' for thread {thread_id} (in-memory only, not persisted)")
-    return
+    # RAILWAY COST OPTIMIZATION: Status changes ride the forum post write-behind queue, coalesced with
+    # the thread's other pending changes into one request instead of a round-trip each
+    if await forum_post_cache.set_status(thread_id, status):
+        print(f"ℹ️ Forum post status changed to '{status}' for thread {thread_id} (queued for dashboard)")
 
 # --- BOT SETTINGS FUNCTIONS ---
 def load_bot_settings():
@@ -1671,9 +2896,137 @@ def load_bot_settings():
     print(f"ℹ️ Bot settings loaded from API during sync")
     return True
 
+# BANDWIDTH OPTIMIZATION: Settings saves send only the changed keys, debounced, instead of GET + POST of the whole dataset
+SETTINGS_SAVE_DEBOUNCE_SECONDS = 1.5
+
+class SettingsWriter:
+    """Debounced, settings-only persistence for BOT_SETTINGS (plus the system prompt)
+    
+    save() records which settings differ from the dashboard's copy and waits for the batch it joined:
+    every save() within SETTINGS_SAVE_DEBOUNCE_SECONDS is written as one 'update_settings' request
+    carrying just those keys and the settingsVersion they were based on. If someone else changed the
+    settings meanwhile the dashboard answers 409 with its current settings; those are adopted for
+    every key we aren't changing and the write is retried once on the new version. Dashboards
+    without 'update_settings' get the legacy full-dataset save instead.
+    """
+    
+    EXCLUDED_KEYS = ('settingsVersion',)
+    
+    def __init__(self, debounce=SETTINGS_SAVE_DEBOUNCE_SECONDS):
+        self.debounce = debounce
+        self.version = None  # settingsVersion of the dashboard copy we diff against (None = unknown)
+        self._persisted = None  # Deep copy of the dashboard's settings as last seen (None = never synced)
+        self.pending = {}  # {key: value} waiting for the next write
+        self._batch = None  # Future shared by every save() waiting on the next write
+        self._flush_task = None
+        self._lock = asyncio.Lock()
+        self.saves = 0
+        self.writes = 0
+        self.conflicts = 0
+        self.bytes_sent = 0
+    
+    def current_settings(self):
+        settings = {k: v for k, v in BOT_SETTINGS.items() if k not in self.EXCLUDED_KEYS}
+        if SYSTEM_PROMPT_TEXT and SYSTEM_PROMPT_TEXT.strip():
+            settings['systemPrompt'] = SYSTEM_PROMPT_TEXT
+        return settings
+    
+    def observe(self, settings):
+        """Record the dashboard's settings (from a sync or a 409) as the base for future diffs"""
+        self._persisted = json.loads(json.dumps(settings))  # Deep copy - list settings are edited in place
+        self.version = settings.get('settingsVersion', self.version)
+    
+    def _diff(self):
+        persisted = self._persisted or {}
+        return {k: v for k, v in self.current_settings().items() if k == 'last_updated' or persisted.get(k) != v}
+    
+    async def save(self):
+        """Queue the current settings for the next write; returns True once they are persisted"""
+        if 'your-vercel-app' in DATA_API_URL:
+            print("⚠ API not configured, cannot save settings")
+            return False
+        self.saves += 1
+        BOT_SETTINGS['last_updated'] = datetime.now().isoformat()
+        self.pending.update(json.loads(json.dumps(self._diff())))
+        if self._batch is None:
+            self._batch = asyncio.get_running_loop().create_future()
+            self._flush_task = asyncio.create_task(self._flush_later())
+        return await asyncio.shield(self._batch)
+    
+    async def _flush_later(self):
+        await asyncio.sleep(self.debounce)
+        await self.flush()
+    
+    async def flush(self):
+        """Write pending changes now (also called on shutdown)"""
+        if self._flush_task is not None and self._flush_task is not asyncio.current_task():
+            self._flush_task.cancel()
+        self._flush_task = None
+        async with self._lock:
+            batch, self._batch = self._batch, None
+            changes, self.pending = self.pending, {}
+            if batch is None:
+                return True
+            try:
+                # Nothing but the timestamp changed - the dashboard already has these settings
+                ok = set(changes) <= {'last_updated'} or await self._write(changes)
+            except Exception as e:
+                print(f"⚠ Error saving bot settings to API: {e}")
+                ok = False
+            if not ok:
+                # Keep failed keys queued (newer changes win) so the next save retries them
+                self.pending = {**changes, **self.pending}
+            if not batch.done():
+                batch.set_result(ok)
+            return ok
+    
+    async def _write(self, changes, retry_on_conflict=True):
+        payload = {'action': 'update_settings', 'changes': changes}
+        if self.version is not None:
+            payload['baseVersion'] = self.version
+        self.bytes_sent += len(json.dumps(payload))
+        async with dashboard_http.post(DATA_API_URL, json=payload) as response:
+            body = await response.json(content_type=None) if response.status in (200, 409) else None
+            if response.status == 409 and isinstance(body, dict):
+                self.conflicts += 1
+                server_settings = body.get('botSettings') or {}
+                print(f"⚠ Bot settings changed on the dashboard (v{body.get('settingsVersion')}) - merging and retrying")
+                # Adopt their values for every key we aren't changing, then retry on their version
+                for key, value in server_settings.items():
+                    if key not in changes and key not in self.EXCLUDED_KEYS and key != 'systemPrompt' and value is not None:
+                        BOT_SETTINGS[key] = value
+                self.observe(server_settings)
+                if retry_on_conflict:
+                    return await self._write(changes, retry_on_conflict=False)
+                return False
+            if response.status != 200:
+                print(f"⚠ Failed to save bot settings: Status {response.status}")
+                return False
+        if not isinstance(body, dict) or 'settingsVersion' not in body:
+            # Dashboard predates 'update_settings' (it treats unknown actions as a no-op data save)
+            return await _save_bot_settings_full()
+        self.writes += 1
+        self.observe({**(self._persisted or {}), **changes, 'settingsVersion': body['settingsVersion']})
+        print(f"✅ Saved {len(changes)} bot setting(s) to API (v{body['settingsVersion']}): {', '.join(sorted(changes))}")
+        return True
+    
+    def format_stats(self):
+        return (f"**Settings saves:** {self.saves} saves in {self.writes} writes · {self.conflicts} conflicts · "
+                f"{self.bytes_sent / 1024:.1f}KB sent · v{self.version if self.version is not None else '?'}")
+
+settings_writer = SettingsWriter()
+
 async def save_bot_settings_to_api():
     """Save bot settings to API (persists across deployments)
     
+    Only the settings that changed are sent (see SettingsWriter); saves within a short window share one write.
+    Settings are persisted in Vercel KV/Redis and survive bot restarts.
+    """
+    return await settings_writer.save()
+
+async def _save_bot_settings_full():
+    """Legacy save for dashboards without 'update_settings': read the whole dataset, merge, write it back
+    
     This saves ALL bot settings including:
     - Tag IDs (issue_type_tag_ids, user_issue_tag_id, bug_tag_id, crash_tag_id, rdp_tag_id)
     - Forum channel IDs
@@ -1688,10 +3041,8 @@ async def save_bot_settings_to_api():
             print("⚠ API not configured, cannot save settings")
             return False
         
-        BOT_SETTINGS['last_updated'] = datetime.now().isoformat()
-        
         # Fetch current data from API
-        async with aiohttp.ClientSession() as session:
+        async with dashboard_http.borrow() as session:
             async with session.get(DATA_API_URL) as get_response:
                 if get_response.status != 200:
                     print(f"⚠ Failed to fetch current data: {get_response.status}")
@@ -1763,9 +3114,156 @@ def save_bot_settings():
         return False
 
 # --- DATA SYNC FUNCTIONS ---
-async def fetch_data_from_api():
-    """Fetch RAG entries, auto-responses, system prompt, and leaderboard from the dashboard API"""
-    global RAG_DATABASE, AUTO_RESPONSES, SYSTEM_PROMPT_TEXT, LEADERBOARD_DATA, last_data_hash
+def optimize_rag_entry(entry):
+    """MEMORY OPTIMIZATION: Copy of a RAG entry with content truncated to 500 chars (full content in Pinecone)"""
+    optimized_entry = entry.copy()
+    if 'content' in optimized_entry and len(optimized_entry['content']) > 500:
+        optimized_entry['content'] = optimized_entry['content'][:500] + "..."
+    return optimized_entry
+
+def merge_synced_entries(current, upserted, deleted):
+    """Apply a sync delta to a list of id'd entries: edits stay in place, new entries are appended"""
+    upserted_by_id = {entry['id']: entry for entry in upserted if entry.get('id')}
+    merged = [upserted_by_id.pop(entry.get('id'), entry) for entry in current if entry.get('id') not in deleted]
+    merged.extend(upserted_by_id.values())
+    return merged
+
+def apply_system_prompt_from_api(new_settings):
+    """Use the dashboard's system prompt if it has a non-empty one"""
+    global SYSTEM_PROMPT_TEXT
+    if new_settings and 'systemPrompt' in new_settings and 'systemPrompt' not in settings_writer.pending:
+        new_prompt = new_settings['systemPrompt']
+        # Only update if new prompt is not None and not empty string
+        if new_prompt is not None and isinstance(new_prompt, str) and len(new_prompt.strip()) > 0:
+            old_prompt = SYSTEM_PROMPT_TEXT
+            SYSTEM_PROMPT_TEXT = new_prompt
+            if old_prompt != SYSTEM_PROMPT_TEXT:
+                print(f"✓ Updated system prompt from API ({len(SYSTEM_PROMPT_TEXT)} characters)")
+            else:
+                print(f"✓ System prompt unchanged ({len(SYSTEM_PROMPT_TEXT)} characters)")
+        elif new_prompt is None or (isinstance(new_prompt, str) and len(new_prompt.strip()) == 0):
+            print(f"⚠️ API returned empty system prompt, keeping existing prompt ({len(SYSTEM_PROMPT_TEXT) if SYSTEM_PROMPT_TEXT else 0} characters)")
+
+def merge_bot_settings_from_api(new_settings):
+    """Merge the dashboard's bot settings over BOT_SETTINGS (system prompt is handled separately)"""
+    # IMPORTANT: Keep defaults, only override with API values (prevents reset on missing fields)
+    # This ensures that if API doesn't have a field, we keep the default
+    # Settings changed locally but not yet written (debounced) keep their local value
+    settings_to_merge = {k: v for k, v in new_settings.items() if k != 'systemPrompt' and k not in settings_writer.pending}
+    settings_writer.observe(new_settings)
+    if settings_to_merge:
+        # Merge: Defaults stay, API overrides only what it has
+        for key, value in settings_to_merge.items():
+            if value is not None:  # Only update if API has a value
+                BOT_SETTINGS[key] = value
+        
+        print(f"✓ Loaded bot settings from API (persisted across deployments)")
+        print(f"   satisfaction_delay={BOT_SETTINGS.get('satisfaction_delay', 30)}s, "
+              f"temperature={BOT_SETTINGS.get('ai_temperature', 1.0)}, "
+              f"retention={BOT_SETTINGS.get('solved_post_retention_days', 30)}d, "
+              f"notification_channel={BOT_SETTINGS.get('support_notification_channel_id', 'Not set')}")
+        
+        # Update task intervals if they changed
+        old_interval = BOT_SETTINGS.get('high_priority_check_interval_hours', 2.0)
+        new_interval = BOT_SETTINGS.get('high_priority_check_interval_hours', 2.0)
+        if old_interval != new_interval and check_old_posts.is_running():
+            try:
+                check_old_posts.change_interval(hours=new_interval)
+                print(f"✓ Updated check_old_posts interval to {new_interval} hours")
+            except Exception as interval_error:
+                print(f"⚠ Could not update check_old_posts interval: {interval_error}")
+
+async def refresh_vector_index(rag_changed, full_entries=None):
+    """COST OPTIMIZATION: Only touch the vector index if RAG data changed
+    
+    Reconciliation diffs per-entry content fingerprints, so an edit costs one embedding + one upsert.
+    full_entries are the un-truncated synced entries; Pinecone metadata is built from them.
+    """
+    global _pending_vector_entries
+    if ENABLE_EMBEDDINGS and (USE_LOCAL_VECTOR_INDEX or USE_PINECONE):
+        if USE_PINECONE and not USE_LOCAL_VECTOR_INDEX and full_entries is not None and (rag_changed or _indexed_fingerprints is None):
+            _pending_vector_entries = full_entries
+        if rag_changed or _indexed_fingerprints is None or _pending_vector_entries is not None:
+            print("🔄 RAG database changed - reconciling vector index...")
+            try:
+                await reconcile_vector_index()
+            except Exception as sync_error:
+                print(f"⚠️ Vector index sync failed: {sync_error}")
+        else:
+            print("✅ Vector index up to date - no sync needed")
+    elif ENABLE_EMBEDDINGS:
+        # COST OPTIMIZATION: Don't compute embeddings locally - use keyword search instead
+        print("⚠️ Pinecone not configured - skipping embeddings to save Railway CPU costs")
+        print("   Bot will use keyword-based search (free, no CPU cost)")
+        print("   💡 Set PINECONE_API_KEY to enable cost-effective vector search")
+    else:
+        print("ℹ Embeddings disabled - using keyword search only (set ENABLE_EMBEDDINGS=true for Pinecone)")
+
+def remember_data_sync_point(etag, version):
+    """Record what the bot now holds so the next sync can be conditional (ETag) or a delta (?since=version)"""
+    data_sync_state['etag'] = etag
+    data_sync_state['version'] = version
+    data_sync_state['last_full_sync'] = time.monotonic()
+
+async def apply_data_delta(delta):
+    """Apply a ?since=<version> delta from the dashboard: only the changed entries (and settings) came back
+    
+    RAG entries and auto-responses are merged by id (upserted entries replace or extend, deleted ids drop),
+    then RAG_DATABASE and its indexes are republished and the vector index reconciled like a full sync.
+    """
+    global AUTO_RESPONSES, last_data_hash, last_rag_hash
+    rag_delta = delta.get('ragEntries') or {}
+    rag_upserted_full = rag_delta.get('upserted', [])
+    rag_upserted = [optimize_rag_entry(entry) for entry in rag_upserted_full]
+    rag_deleted = set(rag_delta.get('deleted', []))
+    auto_delta = delta.get('autoResponses') or {}
+    auto_upserted = auto_delta.get('upserted', [])
+    auto_deleted = set(auto_delta.get('deleted', []))
+    
+    if rag_upserted or rag_deleted:
+        # Unchanged entries embed the same text truncated or not; only the upserted ones need full content
+        full_entries = merge_synced_entries(
+            _pending_vector_entries if _pending_vector_entries is not None else RAG_DATABASE,
+            rag_upserted_full, rag_deleted)
+        replace_rag_database(merge_synced_entries(RAG_DATABASE, rag_upserted, rag_deleted))
+        for entry in rag_upserted:
+            print(f"    ~ RAG entry synced: '{entry.get('title', 'Unknown')}' (ID: {entry.get('id')})")
+        await refresh_vector_index(rag_changed=True, full_entries=full_entries)
+    if auto_upserted or auto_deleted:
+        AUTO_RESPONSES = merge_synced_entries(AUTO_RESPONSES, auto_upserted, auto_deleted)
+    new_settings = delta.get('botSettings')
+    if new_settings:
+        apply_system_prompt_from_api(new_settings)
+        merge_bot_settings_from_api(new_settings)
+    
+    data_sync_state['version'] = delta.get('version')
+    data_sync_state['deltas'] += 1
+    if rag_upserted or rag_deleted or auto_upserted or auto_deleted or new_settings:
+        # Our data no longer matches the last full download, so neither its ETag nor its hashes can vouch for it
+        data_sync_state['etag'] = None
+        last_data_hash = None
+        last_rag_hash = None
+    print(f"✓ Applied data delta v{delta.get('since')} → v{delta.get('version')}: "
+          f"RAG +{len(rag_upserted)}/-{len(rag_deleted)}, auto-responses +{len(auto_upserted)}/-{len(auto_deleted)}"
+          f"{', settings' if new_settings else ''} ({len(RAG_DATABASE)} RAG entries, {len(AUTO_RESPONSES)} auto-responses)")
+
+def format_data_sync_stats():
+    version = data_sync_state['version']
+    last_full = data_sync_state['last_full_sync']
+    full_age = f"{(time.monotonic() - last_full) / 60:.0f}m ago" if last_full else "never"
+    return (f"**Data sync:** every {DATA_SYNC_INTERVAL_MINUTES:g}m · v{version if version is not None else '?'} · "
+            f"{data_sync_state['not_modified']} unchanged / {data_sync_state['deltas']} deltas / "
+            f"{data_sync_state['full']} full (last full {full_age})")
+
+async def fetch_data_from_api(force_full=False):
+    """Fetch RAG entries, auto-responses, system prompt, and leaderboard from the dashboard API
+    
+    BANDWIDTH OPTIMIZATION: Once the bot holds a synced version it asks only for changes since
+    that version (304 if there are none); every DATA_FULL_SYNC_HOURS (or with force_full) it
+    re-downloads everything, conditionally on the last ETag. Dashboards without versioning
+    ignore ?since= and return the full payload, which is handled as a full sync.
+    """
+    global RAG_DATABASE, AUTO_RESPONSES, LEADERBOARD_DATA, last_data_hash, last_rag_hash
     
     # Skip API call if URL is still the placeholder
     if 'your-vercel-app' in DATA_API_URL:
@@ -1773,15 +3271,35 @@ async def fetch_data_from_api():
         load_local_fallback_data()
         return False
     
-    print(f"🔗 Attempting to fetch data from: {DATA_API_URL}")
+    full_sync_due = (force_full or data_sync_state['version'] is None
+                     or time.monotonic() - data_sync_state['last_full_sync'] >= DATA_FULL_SYNC_HOURS * 3600)
+    params = None
+    # Use compression headers to reduce transfer size
+    headers = {'Accept-Encoding': 'gzip, deflate', 'Accept': 'application/json'}
+    if not full_sync_due:
+        params = {'since': str(data_sync_state['version'])}
+        print(f"🔗 Checking dashboard for changes since v{data_sync_state['version']}: {DATA_API_URL}")
+    else:
+        if data_sync_state['etag']:
+            headers['If-None-Match'] = data_sync_state['etag']
+        print(f"🔗 Attempting to fetch data from: {DATA_API_URL}")
     
     try:
-        # Use compression headers to reduce transfer size
-        headers = {'Accept-Encoding': 'gzip, deflate', 'Accept': 'application/json'}
-        async with aiohttp.ClientSession() as session:
-            async with session.get(f"{DATA_API_URL}", headers=headers, timeout=aiohttp.ClientTimeout(total=10)) as response:
+        async with dashboard_http.borrow() as session:
+            async with session.get(f"{DATA_API_URL}", headers=headers, params=params, timeout=aiohttp.ClientTimeout(total=10)) as response:
+                if response.status == 304:
+                    # Nothing downloaded, nothing parsed
+                    data_sync_state['not_modified'] += 1
+                    if full_sync_due:
+                        data_sync_state['last_full_sync'] = time.monotonic()
+                    print(f"✓ Data unchanged (304 Not Modified) - {len(RAG_DATABASE)} RAG entries, {len(AUTO_RESPONSES)} auto-responses")
+                    return True
                 if response.status == 200:
                     data = await response.json()
+                    if data.get('delta'):
+                        await apply_data_delta(data)
+                        return True
+                    data_sync_state['full'] += 1
                     new_rag = data.get('ragEntries', [])
                     new_auto = data.get('autoResponses', [])
                     new_settings = data.get('botSettings', {})
@@ -1795,30 +3313,20 @@ async def fetch_data_from_api():
                     
                     # Check if data actually changed (count or content) - BEFORE updating
                     old_rag_count = len(RAG_DATABASE)
-                    old_rag_entries = RAG_DATABASE.copy()  # Save old entries for comparison
+                    old_rag_by_id = get_rag_snapshot().by_id
                     old_auto_count = len(AUTO_RESPONSES)
                     old_auto_ids = {a.get('id') for a in AUTO_RESPONSES if a.get('id')}
-                    rag_changed = len(new_rag) != old_rag_count
+                    # Hash full entry content so edits to title/content/keywords count as a change
+                    rag_hash = hashlib.md5(json.dumps(new_rag, sort_keys=True).encode()).hexdigest()
+                    rag_changed = rag_hash != last_rag_hash
                     auto_changed = len(new_auto) != old_auto_count
                     
                     # Update system prompt FIRST (before hash check) - always check even if other data unchanged
-                    if new_settings and 'systemPrompt' in new_settings:
-                        new_prompt = new_settings['systemPrompt']
-                        # Only update if new prompt is not None and not empty string
-                        if new_prompt is not None and isinstance(new_prompt, str) and len(new_prompt.strip()) > 0:
-                            old_prompt = SYSTEM_PROMPT_TEXT
-                            SYSTEM_PROMPT_TEXT = new_prompt
-                            if old_prompt != SYSTEM_PROMPT_TEXT:
-                                print(f"✓ Updated system prompt from API ({len(SYSTEM_PROMPT_TEXT)} characters)")
-                            else:
-                                print(f"✓ System prompt unchanged ({len(SYSTEM_PROMPT_TEXT)} characters)")
-                        elif new_prompt is None or (isinstance(new_prompt, str) and len(new_prompt.strip()) == 0):
-                            print(f"⚠️ API returned empty system prompt, keeping existing prompt ({len(SYSTEM_PROMPT_TEXT) if SYSTEM_PROMPT_TEXT else 0} characters)")
+                    apply_system_prompt_from_api(new_settings)
                     
                     # Check if data actually changed using hash
-                    import hashlib
                     data_to_hash = json.dumps({
-                        'rag': [r.get('id') for r in new_rag],
+                        'rag': rag_hash,
                         'auto': [a.get('id') for a in new_auto],
                         'leaderboard': LEADERBOARD_DATA.get('month', '')
                     }, sort_keys=True)
@@ -1826,104 +3334,29 @@ async def fetch_data_from_api():
                     
                     if last_data_hash == current_hash:
                         print(f"✓ Data unchanged (hash match) - skipping update to save resources")
+                        remember_data_sync_point(response.headers.get('ETag'), data.get('version'))
                         return True
                     
                     # MEMORY OPTIMIZATION: Truncate RAG entry content in memory (full content stored in Pinecone)
                     # Keep only first 500 chars of content for keyword search, rest is in Pinecone metadata
-                    optimized_rag = []
-                    for entry in new_rag:
-                        optimized_entry = entry.copy()
-                        # Truncate content to save memory (full content available from Pinecone)
-                        if 'content' in optimized_entry and len(optimized_entry['content']) > 500:
-                            optimized_entry['content'] = optimized_entry['content'][:500] + "..."
-                        optimized_rag.append(optimized_entry)
+                    optimized_rag = [optimize_rag_entry(entry) for entry in new_rag]
                     
                     # CRITICAL: Completely replace RAG_DATABASE to ensure deleted entries are removed
-                    # Clear old entries first to prevent stale data
-                    RAG_DATABASE.clear()
-                    RAG_DATABASE.extend(optimized_rag)
+                    # Id map, fingerprints and keyword index are rebuilt and swapped in together with it
+                    replace_rag_database(optimized_rag)
                     AUTO_RESPONSES = new_auto
                     LEADERBOARD_DATA = new_leaderboard
                     last_data_hash = current_hash
+                    last_rag_hash = rag_hash
                     print(f"💾 Memory optimized: RAG entries truncated to 500 chars (full content in Pinecone)")
                     print(f"🔄 RAG_DATABASE updated: {len(RAG_DATABASE)} entries (deleted entries removed)")
                     
-                    # COST OPTIMIZATION: Only recompute embeddings if RAG data changed
-                    # All embeddings stored in Pinecone (saves Railway CPU/memory costs)
-                    if ENABLE_EMBEDDINGS:
-                        if rag_changed and USE_PINECONE:
-                            # CRITICAL: When RAG changes, we need to sync deletions too
-                            # Get current IDs from new_rag
-                            new_rag_ids = {e.get('id') for e in new_rag if e.get('id')}
-                            old_rag_ids = {e.get('id') for e in old_rag_entries if e.get('id')}
-                            deleted_ids = old_rag_ids - new_rag_ids
-                            
-                            if deleted_ids:
-                                print(f"🗑️ Detected {len(deleted_ids)} deleted RAG entries - removing from Pinecone...")
-                                try:
-                                    index = init_pinecone()
-                                    if index:
-                                        # Delete vectors from Pinecone
-                                        index.delete(ids=list(deleted_ids))
-                                        print(f"✅ Removed {len(deleted_ids)} entries from Pinecone")
-                                except Exception as delete_error:
-                                    print(f"⚠️ Could not delete entries from Pinecone: {delete_error}")
-                            
-                            # MEMORY OPTIMIZATION: Incremental sync - only upload new entries to Pinecone
-                            print("🔄 RAG database changed - syncing new entries to Pinecone...")
-                            await sync_new_entries_to_pinecone(new_rag, old_rag_entries)
-                        elif SKIP_EMBEDDING_BOOTSTRAP:
-                            print("⚠️ Embeddings enabled but SKIP_EMBEDDING_BOOTSTRAP=true. Not computing embeddings on this worker. Seed Pinecone externally.")
-                        elif len(RAG_DATABASE) > 0:
-                            # Check if Pinecone has embeddings, if not compute them
-                            if USE_PINECONE:
-                                index = init_pinecone()
-                                if index:
-                                    try:
-                                        stats = index.describe_index_stats()
-                                        if stats.total_vector_count == 0:
-                                            print("🔄 Pinecone index empty - uploading initial embeddings...")
-                                            compute_rag_embeddings()
-                                        else:
-                                            print(f"✅ Pinecone has {stats.total_vector_count} vectors - no recompute needed")
-                                    except:
-                                        print("🔄 Computing initial embeddings for Pinecone...")
-                                        compute_rag_embeddings()
-                            else:
-                                # COST OPTIMIZATION: Don't compute embeddings locally - use keyword search instead
-                                print("⚠️ Pinecone not configured - skipping embeddings to save Railway CPU costs")
-                                print("   Bot will use keyword-based search (free, no CPU cost)")
-                                print("   💡 Set PINECONE_API_KEY to enable cost-effective vector search")
-                    else:
-                        print("ℹ Embeddings disabled - using keyword search only (set ENABLE_EMBEDDINGS=true for Pinecone)")
+                    await refresh_vector_index(rag_changed, full_entries=new_rag)
                     
                     # Load bot settings from API (persists across deployments!)
                     # Note: System prompt already updated above before hash check
                     if new_settings:
-                        # IMPORTANT: Keep defaults, only override with API values (prevents reset on missing fields)
-                        # This ensures that if API doesn't have a field, we keep the default
-                        settings_to_merge = {k: v for k, v in new_settings.items() if k != 'systemPrompt'}
-                        if settings_to_merge:
-                            # Merge: Defaults stay, API overrides only what it has
-                            for key, value in settings_to_merge.items():
-                                if value is not None:  # Only update if API has a value
-                                    BOT_SETTINGS[key] = value
-                            
-                            print(f"✓ Loaded bot settings from API (persisted across deployments)")
-                            print(f"   satisfaction_delay={BOT_SETTINGS.get('satisfaction_delay', 30)}s, "
-                                  f"temperature={BOT_SETTINGS.get('ai_temperature', 1.0)}, "
-                                  f"retention={BOT_SETTINGS.get('solved_post_retention_days', 30)}d, "
-                                  f"notification_channel={BOT_SETTINGS.get('support_notification_channel_id', 'Not set')}")
-                            
-                            # Update task intervals if they changed
-                            old_interval = BOT_SETTINGS.get('high_priority_check_interval_hours', 2.0)
-                            new_interval = BOT_SETTINGS.get('high_priority_check_interval_hours', 2.0)
-                            if old_interval != new_interval and check_old_posts.is_running():
-                                try:
-                                    check_old_posts.change_interval(hours=new_interval)
-                                    print(f"✓ Updated check_old_posts interval to {new_interval} hours")
-                                except Exception as interval_error:
-                                    print(f"⚠ Could not update check_old_posts interval: {interval_error}")
+                        merge_bot_settings_from_api(new_settings)
                     else:
                         # No settings in API yet - save our defaults to establish them
                         print(f"ℹ️ No settings in API - saving defaults to establish baseline")
@@ -1936,10 +3369,9 @@ async def fetch_data_from_api():
                         if rag_changed:
                             print(f"  → RAG entries changed: {len(new_rag)} (was {old_rag_count})")
                             # Log new RAG entry titles for debugging
-                            old_rag_ids = {e.get('id') for e in RAG_DATABASE}
                             for rag in new_rag:
                                 rag_id = rag.get('id')
-                                if rag_id and rag_id not in old_rag_ids:
+                                if rag_id and rag_id not in old_rag_by_id:
                                     print(f"    + New RAG entry: '{rag.get('title', 'Unknown')}' (ID: {rag_id})")
                                     print(f"      Keywords: {', '.join(rag.get('keywords', []))}")
                         if auto_changed:
@@ -1957,6 +3389,7 @@ async def fetch_data_from_api():
                             print(f"     - {rag.get('title', 'Unknown')} (ID: {rag.get('id', 'N/A')})")
                         if len(RAG_DATABASE) > 5:
                             print(f"     ... and {len(RAG_DATABASE) - 5} more")
+                    remember_data_sync_point(response.headers.get('ETag'), data.get('version'))
                     return True
                 elif response.status == 404:
                     print(f"⚠ Dashboard API not found (404) at {DATA_API_URL}. Check your URL configuration.")
@@ -2025,7 +3458,7 @@ async def save_leaderboard_to_api():
         return  # Skip if not configured
     
     try:
-        async with aiohttp.ClientSession() as session:
+        async with dashboard_http.borrow() as session:
             payload = {'action': 'update_leaderboard', 'leaderboard': LEADERBOARD_DATA}
             async with session.post(DATA_API_URL, json=payload, timeout=aiohttp.ClientTimeout(total=5)) as response:
                 if response.status == 200:
@@ -2036,16 +3469,20 @@ async def save_leaderboard_to_api():
     return False
 
 def load_local_fallback_data():
-    """Load fallback data if API is unavailable"""
-    global RAG_DATABASE, AUTO_RESPONSES
-    RAG_DATABASE = [
+    """Load fallback data if API is unavailable (the last synced data is kept if there is any)"""
+    global AUTO_RESPONSES
+    if data_sync_state['last_full_sync']:
+        # A failed periodic sync must not replace the real knowledge base with the sample entries
+        print(f"ℹ Keeping last synced data ({len(RAG_DATABASE)} RAG entries, {len(AUTO_RESPONSES)} auto-responses)")
+        return
+    replace_rag_database([
         {
             'id': 'RAG-001',
             'title': 'Character Resets Instead of Converting Honey',
             'content': "This issue typically occurs when the 'Auto-Deposit' setting is enabled, but the main 'Gather' task is not set to pause during the conversion process. The macro incorrectly prioritizes gathering, causing it to reset the character's position and interrupt honey conversion. To fix this, go to Script Settings > Tasks > Gather and check the box 'Pause While Converting Honey'. Alternatively, you can disable 'Auto-Deposit' in the Hive settings.",
             'keywords': ['honey', 'pollen', 'convert', 'reset', 'resets', 'resetting', 'gather', 'auto-deposit', 'stuck', 'hive'],
         },
-    ]
+    ])
     AUTO_RESPONSES = [
         {
             'id': 'AR-001',
@@ -2115,7 +3552,7 @@ async def analyze_conversation(conversation_text: str):
             return None
         
         # Use Groq to analyze the conversation
-        models_to_try = ['openai/gpt-oss-120b', 'llama-3.3-70b-versatile', 'llama-3.1-70b-versatile', 'mixtral-8x7b-32768']
+        models_to_try = model_router.candidates(MODEL_ATTEMPTS_PER_ANSWER)
         
         analysis_prompt = f"""Analyze the following support conversation and extract key information to create a knowledge base entry.
 
@@ -2136,24 +3573,27 @@ Respond in JSON format only:
 
 Return ONLY valid JSON, no other text."""
 
+        estimated_tokens = len(analysis_prompt) // 4 + 1000
         for model_name in models_to_try:
+            lease = key_manager.checkout(estimated_tokens)
             try:
-                client = key_manager.get_client_with_retry()
+                await lease.reserve(estimated_tokens)
+                client = lease.client
+                call_started = time.perf_counter()
                 
-                response = await asyncio.get_event_loop().run_in_executor(
-                    None,
-                    lambda: client.chat.completions.create(
-                        model=model_name,
-                        messages=[
-                            {"role": "system", "content": "You are a helpful assistant that analyzes support conversations and creates structured knowledge base entries. Always respond with valid JSON only."},
-                            {"role": "user", "content": analysis_prompt}
-                        ],
-                        temperature=0.3,
-                        max_tokens=1000
-                    )
+                response = await client.chat.completions.create(
+                    model=model_name,
+                    messages=[
+                        {"role": "system", "content": "You are a helpful assistant that analyzes support conversations and creates structured knowledge base entries. Always respond with valid JSON only."},
+                        {"role": "user", "content": analysis_prompt}
+                    ],
+                    temperature=0.3,
+                    max_tokens=1000
                 )
                 
                 if response and response.choices and len(response.choices) > 0:
+                    lease.success()
+                    model_router.record_success(model_name, time.perf_counter() - call_started)
                     content = response.choices[0].message.content.strip()
                     # Extract JSON from response (handle cases where there's extra text)
                     import json
@@ -2170,7 +3610,13 @@ Return ONLY valid JSON, no other text."""
                 continue
             except Exception as e:
                 print(f"⚠️ Error analyzing conversation with {model_name}: {e}")
+                if isinstance(e, RateLimitError):
+                    lease.rate_limited()
+                else:
+                    model_router.record_failure(model_name, e)
                 continue
+            finally:
+                lease.release()
         
         print("⚠️ Failed to analyze conversation - all models failed")
         return None
@@ -2516,8 +3962,133 @@ def get_auto_response(query: str) -> str | None:
     
     return None
 
-def find_relevant_rag_entries(query, db=RAG_DATABASE, top_k=5, similarity_threshold=0.2):
-    """Find relevant RAG entries using vector similarity search (Pinecone or local fallback)
+_DISCORD_MARKUP_PATTERN = re.compile(r'<(?:@[!&]?|#)\d+>|<a?:\w+:\d+>')  # Mentions, channels, roles, custom emoji
+_NON_WORD_PATTERN = re.compile(r'[^\w\s]+')  # Punctuation and unicode emoji
+
+def normalize_query(query):
+    """Canonical form of a question for cache keys: lowercase, no Discord mentions/emoji/punctuation, single spaces"""
+    text = _DISCORD_MARKUP_PATTERN.sub(' ', query.lower())
+    text = _NON_WORD_PATTERN.sub(' ', text).replace('_', ' ')
+    return ' '.join(text.split())
+
+def get_query_embedding(model, query):
+    """Encode a query for vector search (float32 array), reusing cached embeddings for repeated questions
+    
+    The cache key is the normalised question, so near-verbatim repeats ("Macro crashes!!" vs
+    "macro crashes @Support") share one encode.
+    """
+    # CPU OPTIMIZATION: Cache query embeddings to avoid re-encoding same queries
+    query_key = hashlib.md5(normalize_query(query).encode()).hexdigest()
+    
+    cached = _query_embedding_cache.get(query_key)
+    if cached is not None:
+        print(f"💾 Using cached query embedding (CPU saved!)")
+        return cached
+    
+    # Compute query embedding with optimized settings for faster encoding
+    query_embedding = model.encode(
+        query, 
+        convert_to_numpy=True,
+        show_progress_bar=False,  # Disable progress bar to save CPU
+        batch_size=1,  # Single query, no batching overhead
+        normalize_embeddings=False  # Pinecone / LocalVectorIndex handle normalization
+    )
+    query_embedding = np.asarray(query_embedding, dtype=np.float32)
+    _query_embedding_cache.set(query_key, query_embedding)
+    return query_embedding
+
+def embed_query_for_answer_cache(query):
+    """Query embedding for the semantic answer cache, or None if embeddings are unavailable
+
+    Retrieval has usually just encoded the same question, so this is normally a query-embedding cache hit.
+    """
+    model = get_embedding_model()
+    if model is None:
+        return None
+    return get_query_embedding(model, query)
+
+def retrieval_backend_name():
+    """Human-readable name of the retrieval backend in use (for logs and embed footers)"""
+    if USE_LOCAL_VECTOR_INDEX:
+        return 'Local vector'
+    if USE_PINECONE:
+        return 'Pinecone'
+    return 'Keyword'
+
+def select_vector_matches(matches, db, similarity_threshold, source_label):
+    """Turn raw vector matches into RAG entries - shared by the Pinecone and local backends
+    
+    Args:
+        matches: List of (entry_id, similarity, metadata) sorted best first. metadata is the
+            Pinecone metadata dict, or None when the match came from the local index.
+        db: RAG database used to resolve entry IDs
+        similarity_threshold: Minimum cosine similarity score (0.0-1.0)
+        source_label: Prefix for log lines (e.g. "🌲 Pinecone search")
+    
+    Returns:
+        List of relevant RAG entries sorted by similarity
+    """
+    results = []
+    all_matches = []
+    if db is RAG_DATABASE:
+        entries_by_id = get_rag_snapshot().by_id
+    else:
+        entries_by_id = {entry['id']: entry for entry in db if entry.get('id')}
+    for entry_id, similarity_score, metadata in matches:
+        # Try to get entry from local db first (for keywords and structure) - O(1) id lookup
+        local_entry = entries_by_id.get(entry_id)
+        if local_entry and metadata is not None:
+            # MEMORY OPTIMIZATION: Prefer Pinecone metadata (full content) over local db (truncated)
+            entry = local_entry.copy()
+            entry['content'] = metadata.get('content', local_entry.get('content', ''))
+        elif local_entry:
+            entry = local_entry
+        elif metadata is not None:
+            # Fallback: reconstruct from metadata if not in local db
+            entry = {
+                'id': entry_id,
+                'title': metadata.get('title', 'Unknown'),
+                'content': metadata.get('content', ''),
+                'keywords': metadata.get('keywords', '').split() if metadata.get('keywords') else []
+            }
+        else:
+            # Local index is ahead of/behind RAG_DATABASE for this ID - nothing to show
+            continue
+        
+        all_matches.append({
+            'entry': entry,
+            'similarity': similarity_score
+        })
+        
+        # Scores are cosine similarity (0-1), filter by threshold
+        if similarity_score >= similarity_threshold:
+            results.append({
+                'entry': entry,
+                'similarity': similarity_score
+            })
+    
+    # Log all matches for debugging (even below threshold)
+    if all_matches:
+        top_similarity = all_matches[0]['similarity']
+        print(f"{source_label}: Found {len(matches)} total matches, {len(results)} above threshold {similarity_threshold}")
+        print(f"   Top similarity: {top_similarity:.3f}")
+        for i, item in enumerate(all_matches[:5], 1):
+            entry_title = item['entry'].get('title', 'Unknown')
+            above_threshold = "✓" if item['similarity'] >= similarity_threshold else "⚠"
+            print(f"   {above_threshold} {i}. '{entry_title}' (similarity: {item['similarity']:.3f})")
+    else:
+        print(f"⚠️ {source_label} returned no matches at all")
+        print(f"   Total RAG entries in database: {len(db)}")
+    
+    # If no results above threshold but we have matches, use top match anyway (lenient fallback)
+    if not results and all_matches:
+        print(f"⚠️ No matches above threshold {similarity_threshold}, but using top match anyway (similarity: {all_matches[0]['similarity']:.3f})")
+        results = [all_matches[0]]
+    
+    return [item['entry'] for item in results]
+
+def find_relevant_rag_entries_vector(query, db=RAG_DATABASE, top_k=5, similarity_threshold=0.2):
+    """Vector-only retrieval (local index or Pinecone)
     
     Args:
         query: User's question
@@ -2526,7 +4097,7 @@ def find_relevant_rag_entries(query, db=RAG_DATABASE, top_k=5, similarity_thresh
         similarity_threshold: Minimum cosine similarity score (0.0-1.0)
     
     Returns:
-        List of relevant RAG entries sorted by similarity
+        List of relevant RAG entries sorted by similarity, or None if vector search is unavailable/failed
     """
     model = get_embedding_model()
     
@@ -2534,7 +4105,23 @@ def find_relevant_rag_entries(query, db=RAG_DATABASE, top_k=5, similarity_thresh
     if model is None:
         print("⚠️ Using keyword-based search (embeddings not available)")
         print(f"   DEBUG: ENABLE_EMBEDDINGS={ENABLE_EMBEDDINGS}, USE_PINECONE={USE_PINECONE}, FORCE_KEYWORD_SEARCH={FORCE_KEYWORD_SEARCH}")
-        return find_relevant_rag_entries_keyword(query, db)
+        return None
+    
+    # In-process index: no network round-trip, just a dot product over the embedding matrix
+    if USE_LOCAL_VECTOR_INDEX:
+        if len(_local_vector_index) == 0:
+            print("⚠️ Local vector index not built yet - using keyword-based search")
+            return None
+        try:
+            query_embedding = get_query_embedding(model, query)
+            matches = [(entry_id, score, None) for entry_id, score in _local_vector_index.query(query_embedding, top_k)]
+            return select_vector_matches(matches, db, similarity_threshold, "🧮 Local vector search")
+        except Exception as e:
+            print(f"⚠️ Error in local vector search: {e}")
+            import traceback
+            traceback.print_exc()
+            print("   Falling back to keyword-based search")
+            return None
     
     # Try Pinecone first if available
     if USE_PINECONE:
@@ -2543,145 +4130,268 @@ def find_relevant_rag_entries(query, db=RAG_DATABASE, top_k=5, similarity_thresh
     
     if index:
         try:
-            # CPU OPTIMIZATION: Cache query embeddings to avoid re-encoding same queries
-            import hashlib
-            query_hash = hashlib.md5(query.lower().strip().encode()).hexdigest()
-            
-            if query_hash in _query_embedding_cache:
-                query_embedding_list = _query_embedding_cache[query_hash]
-                print(f"💾 Using cached query embedding (CPU saved!)")
-            else:
-                # CPU OPTIMIZATION: Use Pinecone for all vector operations (saves Railway CPU)
-                # Compute query embedding with optimized settings for faster encoding
-                query_embedding = model.encode(
-                    query, 
-                    convert_to_numpy=True,
-                    show_progress_bar=False,  # Disable progress bar to save CPU
-                    batch_size=1,  # Single query, no batching overhead
-                    normalize_embeddings=False  # Pinecone handles normalization
-                )
-                query_embedding_list = query_embedding.tolist()
-                
-                # Cache the embedding (with size limit to prevent memory bloat)
-                if len(_query_embedding_cache) >= _query_cache_max_size:
-                    # Remove oldest entry (simple FIFO)
-                    oldest_key = next(iter(_query_embedding_cache))
-                    del _query_embedding_cache[oldest_key]
-                _query_embedding_cache[query_hash] = query_embedding_list
+            query_embedding = get_query_embedding(model, query)
             
             # Query Pinecone (all similarity computation happens in Pinecone cloud)
             query_results = index.query(
-                vector=query_embedding_list,
+                vector=query_embedding.tolist(),
                 top_k=top_k,
                 include_metadata=True,
                 include_values=False
             )
             
-            # Process results - reconstruct entries from Pinecone metadata
-            # This avoids needing to store full entries in Railway memory
-            results = []
-            all_matches = []
-            for match in query_results.matches:
-                entry_id = match.id
-                metadata = match.metadata or {}
-                similarity_score = float(match.score)
-                
-                # MEMORY OPTIMIZATION: Prefer Pinecone metadata (full content) over local db (truncated)
-                # Local db has truncated content to save memory, Pinecone has full content
-                entry = None
-                # Try to get entry from local db first (for keywords and structure)
-                local_entry = next((e for e in db if e.get('id') == entry_id), None)
-                if local_entry:
-                    # Use local entry but replace content with full content from Pinecone
-                    entry = local_entry.copy()
-                    entry['content'] = metadata.get('content', local_entry.get('content', ''))
-                else:
-                    # Fallback: reconstruct from metadata if not in local db
-                    entry = {
-                        'id': entry_id,
-                        'title': metadata.get('title', 'Unknown'),
-                        'content': metadata.get('content', ''),
-                        'keywords': metadata.get('keywords', '').split() if metadata.get('keywords') else []
-                    }
-                
-                all_matches.append({
-                    'entry': entry,
-                    'similarity': similarity_score
-                })
-                
-                # Pinecone returns scores as similarity (0-1), filter by threshold
-                if similarity_score >= similarity_threshold:
-                    results.append({
-                        'entry': entry,
-                        'similarity': similarity_score
-                    })
-            
-            # Log all matches for debugging (even below threshold)
-            if all_matches:
-                top_similarity = all_matches[0]['similarity']
-                print(f"🌲 Pinecone search: Found {len(query_results.matches)} total matches, {len(results)} above threshold {similarity_threshold}")
-                print(f"   Top similarity: {top_similarity:.3f}")
-                for i, item in enumerate(all_matches[:5], 1):
-                    entry_title = item['entry'].get('title', 'Unknown')
-                    above_threshold = "✓" if item['similarity'] >= similarity_threshold else "⚠"
-                    print(f"   {above_threshold} {i}. '{entry_title}' (similarity: {item['similarity']:.3f})")
-            else:
-                print(f"⚠️ Pinecone returned no matches at all")
-                print(f"   Total RAG entries in database: {len(db)}")
-            
-            # If no results above threshold but we have matches, use top match anyway (lenient fallback)
-            if not results and all_matches:
-                print(f"⚠️ No matches above threshold {similarity_threshold}, but using top match anyway (similarity: {all_matches[0]['similarity']:.3f})")
-                results = [all_matches[0]]
-            
-            return [item['entry'] for item in results]
+            # Reconstruct entries from Pinecone metadata (avoids storing full entries in Railway memory)
+            matches = [(match.id, float(match.score), match.metadata or {}) for match in query_results.matches]
+            return select_vector_matches(matches, db, similarity_threshold, "🌲 Pinecone search")
             
         except Exception as e:
             print(f"⚠️ Error in Pinecone search: {e}")
             import traceback
             traceback.print_exc()
             print("   Falling back to keyword-based search (saves Railway CPU costs)")
-            return find_relevant_rag_entries_keyword(query, db)
+            return None
     
-    # COST OPTIMIZATION: Don't use local CPU-based vector search - it's expensive!
-    # If Pinecone is not available, use keyword search instead (free, no CPU cost)
+    # COST OPTIMIZATION: Don't use local CPU-based vector search unless VECTOR_BACKEND=local
+    # If Pinecone is not available, the caller uses keyword search instead (free, no CPU cost)
     print("⚠️ Pinecone not available - using keyword-based search (cost-effective, no CPU cost)")
-    print("   💡 Set PINECONE_API_KEY to enable cost-effective vector search")
-    return find_relevant_rag_entries_keyword(query, db)
+    print("   💡 Set PINECONE_API_KEY (or VECTOR_BACKEND=local) to enable vector search")
+    return None
 
-def find_relevant_rag_entries_keyword(query, db=RAG_DATABASE):
-    """Fallback keyword-based search (used when embeddings unavailable)
+RRF_K = 60  # Standard reciprocal-rank fusion constant - dampens the weight of any single ranking
+
+def fuse_rankings(rankings, top_k=5, k=RRF_K):
+    """Reciprocal-rank fusion: each entry scores sum(1 / (k + rank)) over every ranking it appears in
     
-    MEMORY OPTIMIZATION: Works with truncated content (full content available from Pinecone)
+    Entries are matched by ID. The first ranking's copy of an entry wins, so pass the vector
+    results first (they may carry full Pinecone content instead of the truncated local copy).
+    """
+    scores = {}
+    entries = {}
+    for ranking in rankings:
+        for rank, entry in enumerate(ranking or [], 1):
+            key = entry.get('id') or id(entry)
+            scores[key] = scores.get(key, 0.0) + 1.0 / (k + rank)
+            entries.setdefault(key, entry)
+    best = sorted(scores, key=scores.get, reverse=True)[:top_k]
+    return [entries[key] for key in best]
+
+def combine_retrieval_results(vector_results, keyword_results, top_k=5):
+    """Final ranking for RETRIEVAL_MODE: fuse both retrievers in hybrid mode, otherwise keywords are only a fallback"""
+    if RETRIEVAL_MODE == 'hybrid':
+        return fuse_rankings([vector_results, keyword_results], top_k)
+    return vector_results if vector_results is not None else keyword_results
+
+def find_relevant_rag_entries(query, db=RAG_DATABASE, top_k=5, similarity_threshold=0.2):
+    """Find relevant RAG entries using vector similarity search (local index, Pinecone, or keyword fallback)
+    
+    With RETRIEVAL_MODE=hybrid, vector and keyword rankings are fused with reciprocal-rank fusion.
+    
+    Args:
+        query: User's question
+        db: RAG database to search (defaults to RAG_DATABASE)
+        top_k: Number of top results to return
+        similarity_threshold: Minimum cosine similarity score (0.0-1.0)
+    
+    Returns:
+        List of relevant RAG entries sorted by relevance
     """
-    query_words = set(query.lower().split())
-    stopwords = {'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by', 'is', 'was', 'are', 'be'}
-    query_words = {word for word in query_words if word not in stopwords}
+    vector_results = find_relevant_rag_entries_vector(query, db, top_k, similarity_threshold)
+    if vector_results is not None and RETRIEVAL_MODE != 'hybrid':
+        return vector_results
+    return combine_retrieval_results(vector_results, find_relevant_rag_entries_keyword(query, db, top_k), top_k)
+
+# Separate from the indexing executor so a knowledge-base re-index never queues ahead of a user's question
+_retrieval_executor = ThreadPoolExecutor(max_workers=RETRIEVAL_MAX_WORKERS, thread_name_prefix='retrieval')
 
-    scored_entries = []
-    for entry in db:
-        score = 0
-        entry_title = entry.get('title', '').lower()
-        entry_content = entry.get('content', '').lower()
-        entry_keywords = ' '.join(entry.get('keywords', [])).lower()
+# Rolling per-source retrieval timings in ms (shown in /status)
+retrieval_timings = {'vector': deque(maxlen=100), 'keyword': deque(maxlen=100), 'total': deque(maxlen=100)}
 
-        for word in query_words:
-            if word in entry_title:
-                score += 5
-            if word in entry_keywords:
-                score += 3
-            if word in entry_content:
-                score += 1
+def _timed(func, *args):
+    """Run func(*args) and return (result, elapsed_ms)"""
+    started = time.perf_counter()
+    result = func(*args)
+    return result, (time.perf_counter() - started) * 1000
+
+async def find_relevant_rag_entries_async(query, db=RAG_DATABASE, top_k=5, similarity_threshold=0.2, timeout=None, with_timings=False, deadline=None):
+    """Async find_relevant_rag_entries - same inputs and outputs, but never blocks the event loop
+    
+    Query encoding and the vector search (local index or Pinecone round-trip) run on the bounded
+    retrieval pool. If they take longer than timeout seconds (default RETRIEVAL_TIMEOUT_SECONDS),
+    keyword search answers instead; the slow search finishes in its thread and is discarded.
+    A deadline shortens that timeout to whatever is left of the answer's budget.
+    In hybrid mode the BM25 keyword search runs while the vector search is in flight.
+    
+    Returns the entries, or (entries, {'vector': ms, 'keyword': ms, 'total': ms}) if with_timings=True.
+    """
+    timeout = RETRIEVAL_TIMEOUT_SECONDS if timeout is None else timeout
+    if deadline is not None:
+        timeout = deadline.cap(timeout)
+    loop = asyncio.get_running_loop()
+    started = time.perf_counter()
+    timings = {}
+    search = loop.run_in_executor(_retrieval_executor, _timed, find_relevant_rag_entries_vector, query, db, top_k, similarity_threshold)
+    
+    keyword_results = None
+    if RETRIEVAL_MODE == 'hybrid':
+        # Sub-millisecond BM25 lookup - run it here while the vector search is in flight
+        keyword_results, timings['keyword'] = _timed(find_relevant_rag_entries_keyword, query, db, top_k)
+    
+    try:
+        vector_results, timings['vector'] = await asyncio.wait_for(search, timeout)
+    except asyncio.TimeoutError:
+        print(f"⏱️ Vector search exceeded {timeout:.1f}s - falling back to keyword-based search")
+        vector_results, timings['vector'] = None, timeout * 1000
+    
+    if keyword_results is None and vector_results is None:
+        keyword_results, timings['keyword'] = _timed(find_relevant_rag_entries_keyword, query, db, top_k)
+    results = combine_retrieval_results(vector_results, keyword_results, top_k)
+    
+    timings['total'] = (time.perf_counter() - started) * 1000
+    for source, elapsed_ms in timings.items():
+        retrieval_timings[source].append(elapsed_ms)
+    print(f"⏱️ Retrieval ({RETRIEVAL_MODE}): " + ", ".join(f"{source} {ms:.1f}ms" for source, ms in timings.items()))
+    return (results, timings) if with_timings else results
+
+def format_latency_samples(timings):
+    """'**Name:** avg, p95' line per non-empty sample deque"""
+    lines = []
+    for source, samples in timings.items():
+        if samples:
+            ordered = sorted(samples)
+            p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+            lines.append(f"**{source.replace('_', ' ').title()}:** {sum(ordered) / len(ordered):.1f}ms avg, {p95:.1f}ms p95")
+    return lines
+
+def format_retrieval_timings():
+    """Average/p95 retrieval latency per source for /status"""
+    lines = [f"**Mode:** {RETRIEVAL_MODE} ({retrieval_backend_name()})"]
+    lines.extend(format_latency_samples(retrieval_timings))
+    if len(lines) == 1:
+        lines.append("No searches yet")
+    return "\n".join(lines)
+
+_KEYWORD_TOKEN_PATTERN = re.compile(r'[a-z0-9]+')
+KEYWORD_STOPWORDS = frozenset({'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by', 'is', 'was', 'are', 'be'})
+
+def tokenize_for_search(text):
+    """Lowercase word tokens - whole words only, so 'in' no longer matches inside 'installation'"""
+    return _KEYWORD_TOKEN_PATTERN.findall(text.lower())
+
+class KeywordIndex:
+    """BM25 inverted index over RAG entries (keyword search / FORCE_KEYWORD_SEARCH mode)
+    
+    Title, keywords and content are scored as separate BM25 fields and combined with the
+    same boosts the old substring scan used (title 5, keywords 3, content 1). Every
+    (term, entry) score is precomputed at build time, so a query is just one postings-list
+    walk per query term - sub-millisecond even with thousands of entries.
+    """
+    FIELD_WEIGHTS = {'title': 5.0, 'keywords': 3.0, 'content': 1.0}
+    K1 = 1.2
+    B = 0.75
+    
+    def __init__(self, entries=()):
+        self.entries = list(entries)
+        self._postings = {}  # {term: [(entry_index, bm25_score), ...]}
+        if not self.entries:
+            return
+        
+        field_tokens = {
+            field: [tokenize_for_search(self._field_text(entry, field)) for entry in self.entries]
+            for field in self.FIELD_WEIGHTS
+        }
+        avg_lengths = {
+            field: max(sum(len(tokens) for tokens in docs) / len(docs), 1.0)
+            for field, docs in field_tokens.items()
+        }
+        
+        term_scores = {}  # {term: {entry_index: weighted BM25 tf component}}
+        for field, weight in self.FIELD_WEIGHTS.items():
+            for doc, tokens in enumerate(field_tokens[field]):
+                if not tokens:
+                    continue
+                length_norm = self.K1 * (1 - self.B + self.B * len(tokens) / avg_lengths[field])
+                for term, tf in Counter(tokens).items():
+                    docs = term_scores.setdefault(term, {})
+                    docs[doc] = docs.get(doc, 0.0) + weight * tf * (self.K1 + 1) / (tf + length_norm)
+        
+        total = len(self.entries)
+        for term, docs in term_scores.items():
+            idf = math.log(1 + (total - len(docs) + 0.5) / (len(docs) + 0.5))
+            self._postings[term] = [(doc, score * idf) for doc, score in docs.items()]
+    
+    @staticmethod
+    def _field_text(entry, field):
+        if field == 'keywords':
+            return ' '.join(entry.get('keywords', []))
+        return entry.get(field, '') or ''
+    
+    def __len__(self):
+        return len(self.entries)
+    
+    @property
+    def term_count(self):
+        return len(self._postings)
+    
+    def search(self, query, top_k=5):
+        """Return [(entry, score), ...] for the top_k best BM25 matches, best first"""
+        terms = {term for term in tokenize_for_search(query) if term not in KEYWORD_STOPWORDS}
+        scores = {}
+        for term in terms:
+            for doc, score in self._postings.get(term, ()):
+                scores[doc] = scores.get(doc, 0.0) + score
+        best = heapq.nlargest(top_k, scores.items(), key=lambda item: item[1])
+        return [(self.entries[doc], score) for doc, score in best]
+
+class RagSnapshot:
+    """The knowledge base plus everything derived from it, published as one object
+    
+    Built once per RAG_DATABASE replacement: the id -> entry map, each entry's embedding
+    fingerprint and the BM25 keyword index. Readers (including retrieval worker threads)
+    grab _rag_snapshot once and can never see a new entry list with stale indexes.
+    """
+    
+    def __init__(self, entries=(), version=0):
+        self.entries = list(entries)
+        self.version = version  # Bumped on every replacement - cache keys can include it
+        self.by_id, self.fingerprints = index_rag_entries(self.entries)
+        # Same content -> same value across restarts (unlike version), for caches that outlive the process
+        self.content_version = hashlib.sha1(
+            '\n'.join(f"{entry_id}:{fp}" for entry_id, fp in sorted(self.fingerprints.items())).encode('utf-8')
+        ).hexdigest()[:16]
+        self.keyword_index = KeywordIndex(self.entries)
 
-        if score > 0:
-            scored_entries.append({'entry': entry, 'score': score})
+_rag_snapshot = RagSnapshot()
 
-    scored_entries.sort(key=lambda x: x['score'], reverse=True)
+def replace_rag_database(entries):
+    """Swap in a new knowledge base: derived indexes are built first, then published together with RAG_DATABASE
     
-    if scored_entries:
-        print(f"📊 Keyword search: Found {len(scored_entries)} relevant entries (top score: {scored_entries[0]['score']})")
+    RAG_DATABASE is updated in place (slice assignment) so every db=RAG_DATABASE default keeps pointing at it.
+    """
+    global _rag_snapshot
+    started = time.perf_counter()
+    snapshot = RagSnapshot(entries, version=_rag_snapshot.version + 1)
+    _rag_snapshot = snapshot
+    RAG_DATABASE[:] = snapshot.entries
+    print(f"🔤 RAG indexes built (v{snapshot.version}): {len(snapshot.by_id)} ids, "
+          f"{snapshot.keyword_index.term_count} keyword terms in {(time.perf_counter() - started) * 1000:.1f}ms")
+
+def get_rag_snapshot(db=RAG_DATABASE):
+    """Prebuilt snapshot for RAG_DATABASE (replace_rag_database is its only writer); any other list gets a throwaway one"""
+    if db is RAG_DATABASE:
+        return _rag_snapshot
+    return RagSnapshot(db)
+
+def find_relevant_rag_entries_keyword(query, db=RAG_DATABASE, top_k=5):
+    """Fallback keyword-based search (used when embeddings unavailable)
+    
+    Uses the prebuilt BM25 index from the RAG snapshot (see get_rag_snapshot).
+    MEMORY OPTIMIZATION: Works with truncated content (full content available from Pinecone)
+    """
+    matches = get_rag_snapshot(db).keyword_index.search(query, top_k)
+    if matches:
+        print(f"📊 Keyword search: Found {len(matches)} relevant entries (top score: {matches[0][1]:.2f})")
     
-    return [item['entry'] for item in scored_entries[:5]]
+    return [entry for entry, _ in matches]
 
 SYSTEM_PROMPT = (
     "═══════════════════════════════════════════════════════════════════════════════\n"
@@ -3412,31 +5122,216 @@ def format_ai_response_embed(response_text, title="✅ Solution", color=0x2ECC71
     
     embed.description = description
     
-    # Add footer - USE_PINECONE is a global variable
+    # Add footer with the retrieval backend that produced the entries
     if relevant_docs:
-        # Access global USE_PINECONE variable
-        global USE_PINECONE
-        source = 'Pinecone' if USE_PINECONE else 'Keyword'
+        source = retrieval_backend_name()
         embed.set_footer(text=f"Based on {len(relevant_docs)} entries • {source}")
     else:
         embed.set_footer(text="Revolution Macro AI")
     
     return embed
 
-async def generate_ai_response(query, context_entries, image_parts=None):
+def markdown_safe_preview(text, limit=4000):
+    """Partial answer text that is safe to render mid-stream
+    
+    Cuts back to the last whitespace (no half words or half ** markers) and closes any
+    code fence, inline code span or bold run the cut leaves open.
+    """
+    text = text[:limit]
+    if text and not text[-1].isspace():
+        boundary = max(text.rfind(' '), text.rfind('\n'))
+        if boundary > 0:
+            text = text[:boundary]
+    text = clean_ai_response(text).rstrip()
+    if text.count('```') % 2:
+        return text + '\n```'
+    if text.replace('```', '').count('`') % 2:
+        text += '`'
+    if text.count('**') % 2:
+        text += '**'
+    return text
+
+# Rolling answer latency in ms (shown in /status): time to first visible text, and to the final answer
+answer_timings = {'first_visible': deque(maxlen=100), 'complete': deque(maxlen=100)}
+
+class StreamingAnswerMessage:
+    """Discord answer message that fills in while the AI response streams
+    
+    feed() is called with each token delta. The message is sent on the first delta and then
+    edited in place at most once per STREAM_EDIT_INTERVAL (one edit in flight at a time, so a
+    slow edit never blocks the stream). finish() replaces the preview with the final formatted
+    embed, or sends it fresh if nothing was streamed (cache hit, non-streaming fallback).
+    
+    Args:
+        send: Coroutine function that posts a message and returns it (thread.send,
+              or a followup.send partial with wait=True)
+        title/color: Used for the in-progress embed
+        started_at: time.perf_counter() when the user asked (for time-to-first-visible-answer)
+    """
+    
+    def __init__(self, send, title="✅ Solution", color=0x2ECC71, started_at=None, interval=STREAM_EDIT_INTERVAL):
+        self.send = send
+        self.title = title
+        self.color = color
+        self.interval = interval
+        self.started_at = started_at if started_at is not None else time.perf_counter()
+        self.message = None
+        self.first_visible_ms = None
+        self._parts = []
+        self._pending = None
+        self._last_edit = 0.0
+    
+    @property
+    def text(self):
+        return ''.join(self._parts)
+    
+    def reset(self):
+        self._parts = []
+    
+    def feed(self, delta):
+        self._parts.append(delta)
+        if (self._pending is None or self._pending.done()) and time.monotonic() - self._last_edit >= self.interval:
+            self._last_edit = time.monotonic()
+            self._pending = asyncio.create_task(self._show(markdown_safe_preview(self.text)))
+    
+    def _preview_embed(self, text):
+        embed = discord.Embed(title=f"**{self.title}**", description=f"{text} ▌", color=self.color)
+        embed.set_footer(text="Revolution Macro AI • typing...")
+        return embed
+    
+    async def _show(self, text):
+        if not text:
+            return
+        try:
+            if self.message is None:
+                self.message = await self.send(embed=self._preview_embed(text))
+                self.first_visible_ms = (time.perf_counter() - self.started_at) * 1000
+                print(f"⚡ First answer text visible after {self.first_visible_ms:.0f}ms")
+            else:
+                await self.message.edit(embed=self._preview_embed(text))
+        except Exception as e:
+            print(f"⚠️ Streaming edit failed: {type(e).__name__}: {str(e)[:100]}")
+    
+    async def finish(self, embed, view=None):
+        """Show the final embed (edit the streamed message or send a new one); returns the message"""
+        if self._pending is not None:
+            try:
+                await self._pending
+            except Exception:
+                pass
+        kwargs = {'embed': embed}
+        if view is not None:
+            kwargs['view'] = view
+        if self.message is not None:
+            await self.message.edit(**kwargs)
+        else:
+            self.message = await self.send(**kwargs)
+        complete_ms = (time.perf_counter() - self.started_at) * 1000
+        answer_timings['first_visible'].append(self.first_visible_ms if self.first_visible_ms is not None else complete_ms)
+        answer_timings['complete'].append(complete_ms)
+        return self.message
+
+async def stream_chat_completion(client, on_delta, timeout, deadline=None, **kwargs):
+    """Run a streaming chat completion, passing each text delta to on_delta; returns the full text
+    
+    timeout bounds the wait for every chunk (including the first) rather than the whole answer,
+    so long answers aren't cut off while a stalled stream still fails fast.
+    A deadline additionally caps every wait at what is left of the answer's budget.
+    """
+    deadline = deadline or Deadline()
+    stream = await asyncio.wait_for(client.chat.completions.create(stream=True, **kwargs), timeout=deadline.cap(timeout))
+    parts = []
+    chunks = stream.__aiter__()
+    try:
+        while True:
+            try:
+                chunk = await asyncio.wait_for(chunks.__anext__(), timeout=deadline.cap(timeout))
+            except StopAsyncIteration:
+                break
+            delta = chunk.choices[0].delta.content if chunk.choices else None
+            if delta:
+                parts.append(delta)
+                on_delta(delta)
+    finally:
+        await stream.close()
+    return ''.join(parts)
+
+def degraded_answer(relevant_docs):
+    """Best answer without the AI: the top knowledge base entry, or a hand-off to staff if there is none"""
+    if relevant_docs:
+        top_doc = relevant_docs[0]
+        doc_title = top_doc.get('title', 'Relevant Entry')
+        doc_content = top_doc.get('content', '')
+        content_preview = doc_content[:1500] + "..." if len(doc_content) > 1500 else doc_content
+        return f"I found information in my knowledge base about **{doc_title}**:\n\n{content_preview}\n\n*Note: I'm having trouble connecting to my AI service right now, but here's the relevant information from my knowledge base.*"
+    return "I couldn't find specific information in my knowledge base for your question, and I'm having trouble connecting to my AI service right now. A human support agent will help you shortly."
+
+def ai_response_cache_key(query, context_entries):
+    """ai_response_cache / single-flight key: the question, the IDs of its context entries and the knowledge base version
+    
+    Uses the content version (not the per-process counter) so keys stay valid for the on-disk tier after a restart.
+    """
+    context_ids = [c.get('id', '') for c in context_entries] if context_entries else []
+    return hashlib.md5(f"{query.lower()}:{':'.join(sorted(context_ids))}:{_rag_snapshot.content_version}".encode()).hexdigest()
+
+async def generate_ai_response(query, context_entries, image_parts=None, stream_to=None, deadline=None):
     """Generate an AI response using Groq API with knowledge base context - SIMPLIFIED
     
     Args:
         query: The user's question
         context_entries: Relevant RAG entries to use as context
         image_parts: Optional images to include
-    """
-    from datetime import datetime, timedelta
-    import hashlib
+        stream_to: Optional StreamingAnswerMessage; the first-round models stream their tokens into it
+        deadline: Optional Deadline; every key wait and model attempt spends only what is left of it
     
+    Concurrent calls for the same question and context (e.g. a burst of identical posts after a
+    game update) are coalesced: the first one generates, the rest await its answer.
+    Raises DeadlineExceeded when the deadline runs out before a model answers.
+    """
+    deadline = deadline or Deadline()
+    if image_parts:
+        return await _generate_ai_response(query, context_entries, image_parts, stream_to, deadline)
+    
+    cache_key = ai_response_cache_key(query, context_entries)
+    leader = _inflight_generations.get(cache_key)
+    if leader is not None:
+        single_flight_stats['coalesced'] += 1
+        leader.waiters += 1
+        print(f"🔗 Identical question already generating - waiting for it ({leader.waiters} coalesced)")
+        try:
+            result = await asyncio.wait_for(asyncio.shield(leader), deadline.timeout())
+        except asyncio.TimeoutError as e:
+            raise DeadlineExceeded(f"{deadline.seconds:.0f}s answer deadline reached while waiting for an identical generation") from e
+        if result is not None:
+            return result
+        # The leader failed (or ran out of its own deadline) - generate with our own budget
+        print(f"⚠️ Coalesced generation failed - generating independently")
+        return await _generate_ai_response(query, context_entries, image_parts, stream_to, deadline)
+    
+    flight = asyncio.get_running_loop().create_future()
+    flight.waiters = 0
+    _inflight_generations[cache_key] = flight
+    single_flight_stats['leaders'] += 1
+    result = None
+    try:
+        result = await _generate_ai_response(query, context_entries, image_parts, stream_to, deadline)
+        return result
+    finally:
+        if _inflight_generations.get(cache_key) is flight:
+            del _inflight_generations[cache_key]
+        if flight.waiters:
+            print(f"🔗 Shared one generation with {flight.waiters} identical request(s)")
+        flight.set_result(result)
+
+def format_single_flight_stats():
+    stats = single_flight_stats
+    return (f"**Single-flight:** {stats['coalesced']} coalesced into {stats['leaders']} generation(s)"
+            f" · {len(_inflight_generations)} in flight")
+
+async def _generate_ai_response(query, context_entries, image_parts, stream_to, deadline):
+    """generate_ai_response without single-flight coalescing (see there for the arguments)"""
     # Use the main key manager (all keys available for all operations)
     key_manager = groq_key_manager
-    api_calls_dict = groq_api_calls_by_key
     
     if not key_manager:
         raise Exception("No key manager available")
@@ -3450,20 +5345,42 @@ async def generate_ai_response(query, context_entries, image_parts=None):
     # Check cache first (skip if images provided)
     if not image_parts:
         # Create cache key from query + context IDs
-        context_ids = [c.get('id', '') for c in context_entries] if context_entries else []
-        cache_key = hashlib.md5(f"{query.lower()}:{':'.join(sorted(context_ids))}".encode()).hexdigest()
-        
-        # Check if we have a cached response
-        if cache_key in ai_response_cache:
-            cached_response, cached_time = ai_response_cache[cache_key]
-            age = (datetime.now() - cached_time).total_seconds()
-            if age < AI_CACHE_TTL:
-                print(f"✓ Using cached AI response (age: {int(age)}s)")
+        cache_key = ai_response_cache_key(query, context_entries)
+        
+        # Check if we have a cached response (LRU + TTL: expired entries count as misses)
+        cached_response = ai_response_cache.get(cache_key)
+        if cached_response is not None:
+            print(f"✓ Using cached AI response")
+            return cached_response
+        
+        # COST OPTIMIZATION: Then the on-disk tier (answers from before the last restart)
+        if _disk_answer_cache.enabled:
+            cached_response = await asyncio.get_running_loop().run_in_executor(None, _disk_answer_cache.get, cache_key)
+            if cached_response is not None:
+                ai_response_cache.set(cache_key, cached_response)
+                print(f"✓ Using cached AI response from disk")
                 return cached_response
-            else:
-                # Expired, remove from cache
-                del ai_response_cache[cache_key]
-    
+
+    # COST OPTIMIZATION: Semantic cache - serve an answer to a paraphrase of an already-answered question
+    query_vector = None
+    kb_version = _rag_snapshot.version
+    if not image_parts and _semantic_answer_cache.enabled:
+        try:
+            loop = asyncio.get_running_loop()
+            query_vector = await asyncio.wait_for(
+                loop.run_in_executor(_retrieval_executor, embed_query_for_answer_cache, query),
+                timeout=deadline.cap(RETRIEVAL_TIMEOUT_SECONDS)
+            )
+        except Exception as e:
+            print(f"⚠️ Semantic cache lookup skipped: {type(e).__name__}: {str(e)[:100]}")
+        if query_vector is not None:
+            cached = _semantic_answer_cache.lookup(query_vector, kb_version)
+            if cached:
+                cached_response, similarity = cached
+                print(f"✓ Using semantically cached AI response (similarity: {similarity:.3f})")
+                return cached_response
+    generation_started = time.perf_counter()
+
     # DISABLED: Image processing
     image_parts = None
     
@@ -3476,15 +5393,8 @@ async def generate_ai_response(query, context_entries, image_parts=None):
     temperature = BOT_SETTINGS.get('ai_temperature', 1.0)
     max_tokens = BOT_SETTINGS.get('ai_max_tokens', 2048)
     
-    # Try Groq models in order - fast, cheap inference
-    models_to_try = [
-        'openai/gpt-oss-120b',  # Primary model
-        'llama-3.3-70b-versatile',  # Latest and most capable fallback
-        'llama-3.1-70b-versatile',  # Previous generation, very reliable
-        'mixtral-8x7b-32768',  # Good for longer context
-        'gemma2-9b-it',  # Lightweight fallback
-        'llama-3.1-8b-instant'  # Fastest fallback
-    ]
+    # Try the healthiest Groq models first - dead models are circuit-broken by the router
+    models_to_try = model_router.candidates(MODEL_ATTEMPTS_PER_ANSWER)
     
     # Log knowledge base usage
     if context_entries:
@@ -3494,173 +5404,153 @@ async def generate_ai_response(query, context_entries, image_parts=None):
     else:
         print(f"⚠️ No knowledge base entries provided - using AI general knowledge")
     
-    # Check rate limit before making API call
-    if not await check_rate_limit(key_manager, api_calls_dict):
-        print(f"⚠️ Rate limit reached, waiting before generating response...")
-        # Wait for rate limit to clear
-        current_key = key_manager.get_current_key()
-        key_short = current_key[:10] + '...'
-        api_calls = api_calls_dict.get(key_short, deque())
-        if api_calls:
-            oldest_call = api_calls[0]
-            wait_time = 60 - (datetime.now() - oldest_call).total_seconds()
-            if wait_time > 0:
-                print(f"   Waiting {wait_time:.1f}s for rate limit to clear...")
-                await asyncio.sleep(wait_time)
-        # Try rotating to a different key
-        key_manager.rotate_key(force_round_robin=True)
+    # Build user context WITH KNOWLEDGE BASE
+    user_context = build_user_context(query, context_entries)
+    
+    # Build messages for Groq API
+    messages = []
+    if system_instruction:
+        messages.append({"role": "system", "content": system_instruction})
+    messages.append({"role": "user", "content": user_context})
+    estimated_tokens = estimate_request_tokens(messages, max_tokens)
     
-    # Use key manager for automatic rotation
-    current_key = key_manager.get_current_key()
-    print(f"🤖 Generating AI response with key {current_key[:15]}...")
+    print(f"🤖 Generating AI response ({sum(key_manager.key_in_flight.values())} other generation(s) in flight)...")
     
     for model_name in models_to_try:
+        deadline.check(f"trying '{model_name}'")
+        # Each attempt leases its own key - outcomes are reported against that key, never a shared index
+        lease = key_manager.checkout(estimated_tokens)
+        current_key = lease.key
         try:
             print(f"🔧 Trying Groq model '{model_name}'...")
             
-            # Get Groq client with key rotation
+            # Reserve RPM/TPM budget BEFORE the call (waits only as long as the buckets require, never past the deadline)
+            await lease.reserve(estimated_tokens, deadline)
+            
+            # Get the pooled Groq client for the leased key
             try:
-                client = key_manager.get_client_with_retry()
+                client = lease.client
             except Exception as e:
                 print(f"   ⚠️ Failed to get Groq client: {str(e)[:200]}")
                 continue
             
-            # Build user context WITH KNOWLEDGE BASE
-            user_context = build_user_context(query, context_entries)
-            
             # Generate response - log which key is being used
-            current_key = key_manager.get_current_key()
             key_short = current_key[:15] + '...'
             print(f"💬 Calling Groq API with key {key_short} and model {model_name}...")
+            track_api_call(lease)
             
-            # Track the API call BEFORE making it to prevent race conditions
-            track_api_call(key_manager, api_calls_dict)
-            
-            # Build messages for Groq API
-            messages = []
-            if system_instruction:
-                messages.append({"role": "system", "content": system_instruction})
-            messages.append({"role": "user", "content": user_context})
-            
-            loop = asyncio.get_event_loop()
-            
-            # Define function outside lambda to avoid closure issues
-            def generate_sync():
-                try:
-                    response = client.chat.completions.create(
+            try:
+                print(f"   📡 Making API call to Groq{' (streaming)' if stream_to is not None else ''}...")
+                call_started = time.perf_counter()
+                if stream_to is not None:
+                    # LATENCY OPTIMIZATION: Show tokens as they arrive; the 15s timeout applies to each chunk
+                    stream_to.reset()  # Drop partial text from a previous failed model
+                    response = None
+                    streamed_text = await stream_chat_completion(
+                        client, stream_to.feed, 15.0, deadline,
                         model=model_name,
                         messages=messages,
                         temperature=temperature,
                         max_tokens=max_tokens
                     )
-                    return response
-                except Exception as sync_error:
-                    # Re-raise with more context
-                    raise Exception(f"API call failed in sync context: {type(sync_error).__name__}: {str(sync_error)}") from sync_error
-            
-            try:
-                print(f"   📡 Making API call to Groq...")
-                # Reduced timeout from 30s to 15s for faster failure and retry
-                response = await asyncio.wait_for(
-                    loop.run_in_executor(None, generate_sync),
-                    timeout=15.0
-                )
+                else:
+                    # Reduced timeout from 30s to 15s for faster failure and retry
+                    # On timeout wait_for cancels the request, which closes its connection
+                    response = await asyncio.wait_for(
+                        client.chat.completions.create(
+                            model=model_name,
+                            messages=messages,
+                            temperature=temperature,
+                            max_tokens=max_tokens
+                        ),
+                        timeout=deadline.cap(15.0)
+                    )
                 print(f"   ✓ Received response from API")
-            except asyncio.TimeoutError:
-                print(f"   ⚠️ Timeout waiting for API response from '{model_name}' (30s)")
-                key_manager.mark_key_error(current_key, is_rate_limit=False)
-                await asyncio.sleep(0.5)  # Brief delay before trying next model
+            except asyncio.TimeoutError as api_error:
+                if deadline.expired:
+                    # Cut off by the answer's budget, not the model's fault
+                    raise DeadlineExceeded(f"{deadline.seconds:.0f}s answer deadline reached while waiting for '{model_name}'") from api_error
+                print(f"   ⚠️ Timeout waiting for API response from '{model_name}' (15s)")
+                model_router.record_failure(model_name, api_error)
+                lease.error()
+                continue
+            except RateLimitError as api_error:
+                # 429 - the transport already retired this key until Groq's reset time,
+                # so the next lease goes straight to a key with budget (no sleep needed)
+                print(f"   ❌ RATE LIMIT on key {lease.key_short}: next attempt uses another key ({str(api_error)[:120]})")
+                lease.rate_limited()
                 continue
             except Exception as api_error:
-                error_str = str(api_error).lower()
                 print(f"   ⚠️ API call failed: {str(api_error)[:200]}")
-                
-                # Handle quota vs rate limits differently
-                if 'quota' in error_str or 'limit' in error_str:
-                    # Quota or rate limit exceeded
-                    key_short_err = current_key[:10] + '...'
-                    print(f"   ❌ QUOTA/RATE LIMIT: Rotating to next key")
-                    key_manager.key_rate_limited[key_short_err] = True
-                    key_manager.key_rate_limit_time[key_short_err] = datetime.now()
-                    key_manager.rotate_key(force_round_robin=True)
-                elif 'rate limit' in error_str or '429' in error_str:
-                    # Per-minute rate limit (temporary)
-                    key_short_err = current_key[:10] + '...'
-                    key_manager.key_rate_limited[key_short_err] = True
-                    key_manager.key_rate_limit_time[key_short_err] = datetime.now()
-                    key_manager.rotate_key(force_round_robin=True)
-                # Try next model (with brief delay to avoid rate limit hammering)
-                await asyncio.sleep(0.3)
-                continue
-            
-            # Extract response text from Groq response
-            if not response or not response.choices or len(response.choices) == 0:
-                print(f"   ⚠️ Empty response from Groq API")
-                key_manager.mark_key_error(current_key, is_rate_limit=False)
+                # Try the next model straight away - the router skips it next time if it keeps failing
+                model_router.record_failure(model_name, api_error)
                 continue
             
-            choice = response.choices[0]
-            if not hasattr(choice, 'message') or not hasattr(choice.message, 'content'):
-                print(f"   ⚠️ Response object missing content: {type(response)}")
-                key_manager.mark_key_error(current_key, is_rate_limit=False)
-                continue
+            if stream_to is not None:
+                response_text = streamed_text
+            else:
+                # Extract response text from Groq response
+                if not response or not response.choices or len(response.choices) == 0:
+                    print(f"   ⚠️ Empty response from Groq API")
+                    model_router.record_failure(model_name, Exception("empty response"))
+                    lease.error()
+                    continue
+                
+                choice = response.choices[0]
+                if not hasattr(choice, 'message') or not hasattr(choice.message, 'content'):
+                    print(f"   ⚠️ Response object missing content: {type(response)}")
+                    model_router.record_failure(model_name, Exception("response missing content"))
+                    lease.error()
+                    continue
+                
+                response_text = choice.message.content
+                usage = getattr(response, 'usage', None)
+                lease.limiter.record_usage(estimated_tokens, getattr(usage, 'total_tokens', None))
             
-            # Mark the current key as successful (API call succeeded)
-            key_manager.mark_key_success(current_key)
+            # Mark the leased key as successful (API call succeeded)
+            lease.success()
             print(f"✅ API call succeeded with key {key_short}")
             
-            response_text = choice.message.content
-            
             # Clean the response to remove LaTeX formatting and unwanted artifacts
             response_text = clean_ai_response(response_text)
             
             # Check if response is empty
             if not response_text or len(response_text.strip()) == 0:
                 print(f"   ⚠️ Empty response from '{model_name}', trying next model...")
+                model_router.record_failure(model_name, Exception("empty response"))
                 continue
+            model_router.record_success(model_name, time.perf_counter() - call_started)
             
             # Cache the response (if no images) - MEMORY OPTIMIZED
             if not image_parts and 'cache_key' in locals():
-                # MEMORY OPTIMIZATION: Enforce max cache size before adding
-                if len(ai_response_cache) >= AI_CACHE_MAX_SIZE:
-                    # Remove oldest entries first (FIFO)
-                    sorted_cache = sorted(ai_response_cache.items(), key=lambda x: x[1][1])
-                    entries_to_remove = len(ai_response_cache) - AI_CACHE_MAX_SIZE + 1
-                    for old_key, _ in sorted_cache[:entries_to_remove]:
-                        del ai_response_cache[old_key]
-                    print(f"💾 Cleaned {entries_to_remove} old cache entries (memory saved)")
-                
-                # Also clean expired entries (prevent memory leaks)
-                current_time = datetime.now()
-                expired_keys = [
-                    key for key, (_, timestamp) in ai_response_cache.items()
-                    if (current_time - timestamp).total_seconds() > AI_CACHE_TTL
-                ]
-                for key in expired_keys:
-                    del ai_response_cache[key]
-                if expired_keys:
-                    print(f"💾 Cleaned {len(expired_keys)} expired cache entries")
-                
-                # Now add new entry
-                ai_response_cache[cache_key] = (response_text, datetime.now())
+                # MEMORY OPTIMIZATION: O(1) insert; the LRU evicts the least recently used entry when full
+                ai_response_cache.set(cache_key, response_text)
+                if _disk_answer_cache.enabled:
+                    await asyncio.get_running_loop().run_in_executor(None, _disk_answer_cache.set, cache_key, response_text)
                 print(f"✓ Cached AI response (cache size: {len(ai_response_cache)}/{AI_CACHE_MAX_SIZE})")
-            
+
+            if query_vector is not None:
+                _semantic_answer_cache.add(query_vector, response_text, kb_version, time.perf_counter() - generation_started)
+
             # Success!
             print(f"✅ SUCCESS! Got {len(response_text)} character response from '{model_name}'")
             if context_entries:
                 print(f"   📚 Response based on {len(context_entries)} knowledge base entries")
             return response_text
                 
-        except asyncio.TimeoutError:
+        except DeadlineExceeded:
+            raise
+        except asyncio.TimeoutError as e:
             # Timeout is transient - don't mark as permanent error, just try next model
             print(f"   ⚠️ Timeout with '{model_name}' (transient), trying next model...")
+            model_router.record_failure(model_name, e)
             continue
         except Exception as e:
             error_msg = str(e).lower()
             error_type = type(e).__name__
-            current_key = key_manager.get_current_key()
             
             print(f"   ❌ '{model_name}' failed: {error_type}: {str(e)[:200]}")
+            model_router.record_failure(model_name, e)
             
             # Print full traceback for debugging
             import traceback
@@ -3686,14 +5576,11 @@ async def generate_ai_response(query, context_entries, image_parts=None):
                     print(f"   💡 Check billing: https://console.cloud.google.com/billing")
                     print(f"   💡 Or use keys from different Google accounts.")
                 # Mark as rate limited temporarily so we don't keep trying this key
-                key_manager.key_rate_limited[key_short] = True
-                key_manager.key_rate_limit_time[key_short] = datetime.now()
+                lease.rate_limited()
                 continue
-            elif 'rate limit' in error_msg.lower() or ('429' in error_msg and 'quota' not in error_msg.lower()):
+            elif isinstance(e, RateLimitError):
                 # Actual rate limit (per-minute) - temporary, will reset
-                key_short = current_key[:10] + '...'
-                key_manager.key_rate_limited[key_short] = True
-                key_manager.key_rate_limit_time[key_short] = datetime.now()
+                lease.rate_limited()
                 print(f"   ⚠️ Rate limit detected (temporary, per-minute), will try next key/model...")
                 continue
             elif 'api key' in error_msg or 'auth' in error_msg or '403' in error_msg or 'permission denied' in error_msg or 'leaked' in error_msg:
@@ -3702,7 +5589,7 @@ async def generate_ai_response(query, context_entries, image_parts=None):
                 print(f"   ⚠️ Possible API key issue (might be transient)...")
                 if 'leaked' in error_msg:
                     # Leaked keys are definitely invalid - mark after checking
-                    key_manager.mark_key_error(current_key, is_rate_limit=False)
+                    lease.error()
                     print(f"   ❌ API key appears to be leaked. Get a new key: https://aistudio.google.com/app/apikey")
                 else:
                     # Other auth errors might be transient - don't mark immediately
@@ -3718,90 +5605,83 @@ async def generate_ai_response(query, context_entries, image_parts=None):
                 # Transient error - don't mark as permanent error, just try next model
                 print(f"   ⚠️ Transient error, trying next model...")
                 continue
+        finally:
+            lease.release()
     
     # All models failed - try one more round with best key (reduced attempts for speed)
+    deadline.check("the retry round")
     print(f"\n⚠️ First round of models failed, trying one more time with best key...")
-    await asyncio.sleep(0.5)  # Brief delay to avoid rate limit hammering
     
-    # Try one more round with just 2 attempts (faster than trying all keys)
+    # Try one more round with just 2 attempts (faster than trying all keys), each on a different key
+    tried_keys = set()
     for attempt in range(min(2, len(key_manager.api_keys))):
-        current_key = key_manager.get_current_key()
-        if not current_key:
-            break
+        deadline.check(f"retry attempt {attempt + 1}")
+        async with key_manager.lease(estimated_tokens, exclude=tried_keys) as lease:
+            tried_keys.add(lease.key)
+            key_short = lease.key[:15] + '...'
+            print(f"🔄 Retry attempt {attempt + 1}: Trying key {key_short} with fallback models...")
             
-        key_short = current_key[:15] + '...'
-        print(f"🔄 Retry attempt {attempt + 1}: Trying key {key_short} with fallback models...")
-        
-        # Try the most reliable Groq models first
-        retry_models = ['openai/gpt-oss-120b', 'llama-3.1-70b-versatile', 'llama-3.3-70b-versatile', 'mixtral-8x7b-32768']
-        
-        for model_name in retry_models:
-            try:
-                client = Groq(api_key=current_key)
-                
-                user_context = build_user_context(query, context_entries)
-                messages = []
-                if system_instruction:
-                    messages.append({"role": "system", "content": system_instruction})
-                messages.append({"role": "user", "content": user_context})
-                
-                print(f"   🔄 Retrying with {model_name}...")
-                loop = asyncio.get_event_loop()
-                
-                def generate_sync():
-                    try:
-                        return client.chat.completions.create(
-                            model=model_name,
-                            messages=messages,
-                            temperature=temperature,
-                            max_tokens=max_tokens
-                        )
-                    except Exception as sync_error:
-                        raise Exception(f"API call failed: {type(sync_error).__name__}: {str(sync_error)}") from sync_error
-                
+            # The healthiest model right now (the router has already seen this answer's failures)
+            retry_models = model_router.candidates(1)
+            
+            for model_name in retry_models:
                 try:
-                    # Reduced timeout for retry attempts (faster failure)
-                    response = await asyncio.wait_for(
-                        loop.run_in_executor(None, generate_sync),
-                        timeout=12.0
-                    )
+                    client = lease.client
+                    await lease.reserve(estimated_tokens, deadline)
                     
-                    if response and response.choices and len(response.choices) > 0:
-                        content = response.choices[0].message.content
-                        if content and len(content.strip()) > 0:
-                            # Clean the response to remove LaTeX formatting
-                            content = clean_ai_response(content)
+                    print(f"   🔄 Retrying with {model_name}...")
+                    call_started = time.perf_counter()
+                    
+                    try:
+                        # Reduced timeout for retry attempts (faster failure)
+                        response = await asyncio.wait_for(
+                            client.chat.completions.create(
+                                model=model_name,
+                                messages=messages,
+                                temperature=temperature,
+                                max_tokens=max_tokens
+                            ),
+                            timeout=deadline.cap(12.0)
+                        )
+                        
+                        if response and response.choices and len(response.choices) > 0:
+                            content = response.choices[0].message.content
                             if content and len(content.strip()) > 0:
-                                key_manager.mark_key_success(current_key)
-                                print(f"✅ RETRY SUCCESS! Got response from {model_name} on retry attempt {attempt + 1}")
-                                if context_entries:
-                                    print(f"   📚 Response based on {len(context_entries)} knowledge base entries")
-                                return content
-                except Exception as retry_error:
-                    error_str = str(retry_error).lower()
-                    if 'quota' in error_str or 'rate limit' in error_str or '429' in error_str:
+                                # Clean the response to remove LaTeX formatting
+                                content = clean_ai_response(content)
+                                if content and len(content.strip()) > 0:
+                                    lease.success()
+                                    model_router.record_success(model_name, time.perf_counter() - call_started)
+                                    if query_vector is not None:
+                                        _semantic_answer_cache.add(query_vector, content, kb_version, time.perf_counter() - generation_started)
+                                    print(f"✅ RETRY SUCCESS! Got response from {model_name} on retry attempt {attempt + 1}")
+                                    if context_entries:
+                                        print(f"   📚 Response based on {len(context_entries)} knowledge base entries")
+                                    return content
+                    except RateLimitError:
                         print(f"   ⚠️ Key still rate limited, trying next key...")
-                        key_manager.rotate_key(force_round_robin=True)
+                        lease.rate_limited()
                         break  # Try next key
+                    except Exception as retry_error:
+                        if deadline.expired:
+                            raise DeadlineExceeded(f"{deadline.seconds:.0f}s answer deadline reached while waiting for '{model_name}'") from retry_error
+                        model_router.record_failure(model_name, retry_error)
+                        continue  # Try next model
+                except DeadlineExceeded:
+                    raise
+                except Exception as e:
                     continue  # Try next model
-            except Exception as e:
-                continue  # Try next model
-        
-        # Rotate to next key for next attempt
-        key_manager.rotate_key(force_round_robin=True)
-        await asyncio.sleep(0.5)  # Small delay between key rotations
     
     # All retries failed
     print(f"\n{'='*60}")
     print(f"❌ ALL MODELS AND RETRIES FAILED!")
     print(f"{'='*60}")
     try:
-        current_key_short = key_manager.get_current_key()[:20] if key_manager.get_current_key() else "N/A"
         total_keys = len(key_manager.api_keys)
         usage_stats = key_manager.get_usage_stats()
         
         print(f"   Total API keys loaded: {total_keys}")
-        print(f"   Current key: {current_key_short}...")
+        print(f"   Key leases: {key_manager.format_lease_status()}")
         print(f"   Query attempted: {query[:100]}")
         print(f"   Context entries: {len(context_entries)}")
         
@@ -3812,7 +5692,8 @@ async def generate_ai_response(query, context_entries, image_parts=None):
             rate_limited = "🔴 RATE LIMITED" if stats.get('rate_limited', False) else "🟢 OK"
             success_rate = stats.get('success_rate', 0)
             total_calls = stats.get('total_calls', 0)
-            print(f"     {key_short}: {rate_limited} | {total_calls} calls | {success_rate:.0f}% success")
+            print(f"     {key_short}: {rate_limited} | {total_calls} calls | {success_rate:.0f}% success | "
+                  f"{stats.get('in_flight', 0)} in flight | {stats.get('utilization', 0):.0%} of budget used")
             if not stats.get('rate_limited', False):
                 all_quota_limited = False
         
@@ -3898,7 +5779,7 @@ async def get_unsolved_tag(forum_channel):
         return None
 
 # --- PERIODIC DATA SYNC ---
-@tasks.loop(hours=6)  # Sync every 6 hours (reduced frequency to save CPU costs)
+@tasks.loop(minutes=DATA_SYNC_INTERVAL_MINUTES)  # Cheap: unchanged data is a 304, changes come back as deltas
 async def sync_data_task():
     """Periodically sync data from the dashboard"""
     await fetch_data_from_api()
@@ -3970,7 +5851,6 @@ async def before_sync_task():
 async def cleanup_processed_threads():
     """Clean up old processed threads and prevent memory leaks - MEMORY OPTIMIZED"""
     global processed_threads, support_notification_messages, thread_images, thread_response_type, not_solved_retry_count
-    global ai_response_cache, _query_embedding_cache
     global satisfaction_timers, escalated_threads, no_review_threads, processing_threads, ask_cooldowns
     
     try:
@@ -4068,32 +5948,11 @@ async def cleanup_processed_threads():
             processing_threads.discard(thread_id)
             cleanup_count += 1
         
-        # Clean up ask_cooldowns (older than 1 hour)
-        old_cooldowns = [
-            user_id for user_id, timestamp in ask_cooldowns.items()
-            if (now - timestamp).total_seconds() > 3600  # 1 hour
-        ]
-        for user_id in old_cooldowns:
-            del ask_cooldowns[user_id]
-            cleanup_count += 1
-        
-        # MEMORY OPTIMIZATION: Clean up caches aggressively
-        # Clean expired AI response cache
-        current_time = datetime.now()
-        expired_ai_cache = [
-            key for key, (_, timestamp) in ai_response_cache.items()
-            if (current_time - timestamp).total_seconds() > AI_CACHE_TTL
-        ]
-        for key in expired_ai_cache:
-            del ai_response_cache[key]
-        
-        # Limit query embedding cache size (keep it small)
-        if len(_query_embedding_cache) > _query_cache_max_size:
-            # Remove oldest entries (simple FIFO)
-            excess = len(_query_embedding_cache) - _query_cache_max_size
-            for _ in range(excess):
-                oldest_key = next(iter(_query_embedding_cache))
-                del _query_embedding_cache[oldest_key]
+        # MEMORY OPTIMIZATION: Caches are size-bounded LRUs - just drop expired entries early
+        old_cooldowns = ask_cooldowns.purge_expired()
+        cleanup_count += old_cooldowns
+        expired_ai_cache = ai_response_cache.purge_expired()
+        expired_query_embeddings = _query_embedding_cache.purge_expired()
         
         # MEMORY OPTIMIZATION: Clear old leaderboard data (keep only current month)
         if LEADERBOARD_DATA.get('scores'):
@@ -4105,12 +5964,12 @@ async def cleanup_processed_threads():
                 if old_scores_count > 0:
                     print(f"   💾 Cleared {old_scores_count} old leaderboard entries (new month)")
         
-        if cleanup_count > 0 or expired_ai_cache or len(_query_embedding_cache) > _query_cache_max_size:
-            print(f"🧹 Memory cleanup: Removed {len(old_threads)} threads, {len(old_notifications)} notifications, {len(old_images)} images, {len(old_response_types)} response types, {len(old_retry_counts)} retry counts, {len(old_timers)} timers, {len(old_escalated)} escalated, {len(old_no_review)} no_review, {len(old_processing)} processing, {len(old_cooldowns)} cooldowns")
+        if cleanup_count > 0 or expired_ai_cache or expired_query_embeddings:
+            print(f"🧹 Memory cleanup: Removed {len(old_threads)} threads, {len(old_notifications)} notifications, {len(old_images)} images, {len(old_response_types)} response types, {len(old_retry_counts)} retry counts, {len(old_timers)} timers, {len(old_escalated)} escalated, {len(old_no_review)} no_review, {len(old_processing)} processing, {old_cooldowns} cooldowns, {expired_ai_cache} AI answers")
             if expired_ai_cache:
-                print(f"   💾 Also cleaned {len(expired_ai_cache)} expired AI cache entries")
-            if len(_query_embedding_cache) > _query_cache_max_size:
-                print(f"   💾 Trimmed query embedding cache to {_query_cache_max_size} entries")
+                print(f"   💾 Also cleaned {expired_ai_cache} expired AI cache entries")
+            if expired_query_embeddings:
+                print(f"   💾 Also dropped {expired_query_embeddings} expired query embeddings")
     except Exception as e:
         print(f"⚠️ Error in cleanup_processed_threads: {e}")
         import traceback
@@ -4220,7 +6079,7 @@ async def notify_support_channel_summary(ping_support=False):
         
         forum_api_url = DATA_API_URL.replace('/api/data', '/api/forum-posts')
         
-        async with aiohttp.ClientSession() as session:
+        async with dashboard_http.borrow() as session:
             headers = {'Content-Type': 'application/json', 'Accept': 'application/json'}
             async with session.get(forum_api_url, headers=headers) as response:
                 if response.status != 200:
@@ -4333,7 +6192,16 @@ async def on_ready():
     # COST OPTIMIZATION: Only compute embeddings if Pinecone is available
     # Never compute embeddings locally - it's expensive and increases Railway costs!
     if ENABLE_EMBEDDINGS and len(RAG_DATABASE) > 0:
-        if USE_PINECONE:
+        if USE_LOCAL_VECTOR_INDEX:
+            # fetch_data_from_api() builds the local index when RAG data loads
+            if len(_local_vector_index) > 0:
+                print(f"✅ Local vector index has {len(_local_vector_index)} vectors - ready to use!")
+            elif SKIP_EMBEDDING_BOOTSTRAP:
+                print("⚠️ Local vector index empty and SKIP_EMBEDDING_BOOTSTRAP=true - using keyword search")
+            else:
+                print("🔄 Local vector index empty - computing embeddings in background...")
+                bot.loop.create_task(compute_embeddings_background())
+        elif USE_PINECONE:
             # Check if Pinecone needs initial embeddings
             index = init_pinecone()
             if index:
@@ -4667,6 +6535,9 @@ async def send_forum_post_to_api(thread, owner_name, owner_id, owner_avatar_url,
             }
         }
         
+        # Later messages on this thread are sent as deltas against this cached copy
+        forum_post_cache.put(post_data['post'])
+        
         # Use compression to reduce transfer size
         headers = {
             'Content-Type': 'application/json',
@@ -4674,7 +6545,7 @@ async def send_forum_post_to_api(thread, owner_name, owner_id, owner_avatar_url,
             'Accept-Encoding': 'gzip, deflate'
         }
         
-        async with aiohttp.ClientSession() as session:
+        async with dashboard_http.borrow() as session:
             async with session.post(forum_api_url, json=post_data, headers=headers, timeout=aiohttp.ClientTimeout(total=5)) as response:
                 if response.status == 200:
                     print(f"✅ Forum post sent to dashboard (in-memory only, not persisted to save costs): '{thread.name}' by {owner_name}")
@@ -4908,6 +6779,8 @@ async def on_thread_create(thread):
         print(f"⚠ Could not send greeting (Discord restriction): {e}")
         # Continue anyway - the important part is answering the question
     user_question = f"{thread.name}\n{initial_message}"
+    answer_started = time.perf_counter()  # Time-to-first-visible-answer is measured from here
+    answer_deadline = Deadline(FORUM_ANSWER_DEADLINE_SECONDS)  # Degraded answer instead of hanging past this
     
     # RESOURCE EFFICIENT: Track issue for daily summary (simple keyword extraction, no AI)
     track_issue_for_daily_summary(thread.id, thread.name, initial_message)
@@ -5021,60 +6894,38 @@ async def on_thread_create(thread):
     else:
         # PRIORITIZE PINECONE: Use Pinecone vector search first (same as /ask command)
         print(f"🔍 Forum post: Searching RAG database for: '{user_question[:50]}...'")
-        relevant_docs = find_relevant_rag_entries(user_question, RAG_DATABASE, top_k=5, similarity_threshold=0.2)
+        relevant_docs = await find_relevant_rag_entries_async(user_question, RAG_DATABASE, top_k=5, similarity_threshold=0.2, deadline=answer_deadline)
         
         # Log Pinecone results
         if relevant_docs:
-            print(f"📊 Forum post: Found {len(relevant_docs)} relevant RAG entries using {'Pinecone' if USE_PINECONE else 'keyword'} search")
+            print(f"📊 Forum post: Found {len(relevant_docs)} relevant RAG entries using {retrieval_backend_name()} search")
             for i, doc in enumerate(relevant_docs[:3], 1):
                 print(f"   {i}. '{doc.get('title', 'Unknown')}'")
         else:
-            print(f"⚠ Forum post: No RAG entries found via {'Pinecone' if USE_PINECONE else 'keyword'} search")
+            print(f"⚠ Forum post: No RAG entries found via {retrieval_backend_name()} search")
             # Fallback to keyword matching if Pinecone found nothing
             print(f"🔍 Falling back to keyword-based search...")
-            query_words = set(user_question.lower().split())
-            stopwords = {'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by', 'is', 'was', 'are', 'be'}
-            query_words = {word for word in query_words if word not in stopwords}
-            
-            all_scored_entries = []
-            for entry in RAG_DATABASE:
-                score = 0
-                entry_title = entry.get('title', '').lower()
-                entry_keywords = ' '.join(entry.get('keywords', [])).lower()
-                entry_content = entry.get('content', '').lower()
-                
-                for word in query_words:
-                    if f" {word} " in f" {entry_title} " or entry_title.startswith(word) or entry_title.endswith(word):
-                        score += 5
-                    elif word in entry_title:
-                        score += 3
-                    if f" {word} " in f" {entry_keywords} " or entry_keywords.startswith(word) or entry_keywords.endswith(word):
-                        score += 4
-                    elif word in entry_keywords:
-                        score += 2
-                    if word in entry_content:
-                        score += 1
-                
-                if score > 0:
-                    all_scored_entries.append({'entry': entry, 'score': score})
-                    print(f"   ✓ Keyword match: '{entry.get('title', 'Unknown')}' (score: {score})")
-            
-            all_scored_entries.sort(key=lambda x: x['score'], reverse=True)
-            relevant_docs = [item['entry'] for item in all_scored_entries[:5]]
+            relevant_docs = find_relevant_rag_entries_keyword(user_question, RAG_DATABASE)
+            for doc in relevant_docs:
+                print(f"   ✓ Keyword match: '{doc.get('title', 'Unknown')}'")
         
         # Use Pinecone results (or keyword fallback) as confident_docs
         confident_docs = relevant_docs
 
         if confident_docs:
             # Found matches in knowledge base - use top entries
-            num_to_use = min(3, len(confident_docs))  # Use up to 3 best matches
+            num_to_use = min(RAG_CONTEXT_ENTRIES, len(confident_docs))  # Use only the best matches (fewer prompt tokens)
             bot_response_text = None
+            answer_stream = StreamingAnswerMessage(thread.send, "✅ Solution", 0x2ECC71, answer_started) if STREAM_AI_RESPONSES else None
             try:
-                bot_response_text = await generate_ai_response(user_question, confident_docs[:num_to_use], image_parts)
+                bot_response_text = await generate_ai_response(user_question, confident_docs[:num_to_use], image_parts, stream_to=answer_stream, deadline=answer_deadline)
                 if not bot_response_text or len(bot_response_text.strip()) == 0:
                     # Fallback if response is empty
                     bot_response_text = None  # Will trigger fallback below
                     print(f"⚠️ generate_ai_response returned empty, using fallback")
+            except DeadlineExceeded as deadline_error:
+                print(f"⏱️ {deadline_error} - answering with the top knowledge base entry")
+                bot_response_text = None  # Will trigger fallback below
             except Exception as ai_error:
                 print(f"❌ Error generating AI response: {ai_error}")
                 import traceback
@@ -5084,11 +6935,7 @@ async def on_thread_create(thread):
             # Ensure we have a response before sending - show RAG content directly if AI failed
             if not bot_response_text or len(bot_response_text.strip()) == 0:
                 # Final fallback - show RAG content directly
-                top_doc = confident_docs[0]
-                doc_title = top_doc.get('title', 'Relevant Entry')
-                doc_content = top_doc.get('content', '')
-                content_preview = doc_content[:1500] + "..." if len(doc_content) > 1500 else doc_content
-                bot_response_text = f"I found information in my knowledge base about **{doc_title}**:\n\n{content_preview}\n\n*Note: I'm having trouble connecting to my AI service right now, but here's the relevant information from my knowledge base.*"
+                bot_response_text = degraded_answer(confident_docs)
                 print(f"⚠️ Using RAG content fallback for '{thread.name}'")
             
             # Send AI response - FORMATTED WITH STRUCTURE
@@ -5127,7 +6974,10 @@ async def on_thread_create(thread):
                 
                 # Add solved button
                 solved_view = SolvedButton(thread_id, conversation)
-                await thread.send(embed=ai_embed, view=solved_view)
+                if answer_stream is not None:
+                    await answer_stream.finish(ai_embed, solved_view)  # Replaces the streamed preview
+                else:
+                    await thread.send(embed=ai_embed, view=solved_view)
                 thread_response_type[thread_id] = 'ai'  # Track that we gave an AI response
                 
                 # Show which entries were used in terminal
@@ -5183,6 +7033,7 @@ async def on_thread_create(thread):
         else:
             # No confident match - generate AI response using general Revolution Macro knowledge
             print(f"⚠ No confident RAG match found. Attempting AI response with general knowledge...")
+            answer_stream = None
             
             try:
                 # Build context from auto-responses to give AI some Revolution Macro knowledge
@@ -5209,7 +7060,9 @@ async def on_thread_create(thread):
                 
                 # Use generate_ai_response to ensure images are processed correctly
                 # Pass image_parts so vision model is used if images are present
-                bot_response_text = await generate_ai_response(user_question, [general_context_entry], image_parts)
+                if STREAM_AI_RESPONSES:
+                    answer_stream = StreamingAnswerMessage(thread.send, "💡 Here's What I Found", 0x5865F2, answer_started)
+                bot_response_text = await generate_ai_response(user_question, [general_context_entry], image_parts, stream_to=answer_stream, deadline=answer_deadline)
                 
                 # Format general AI response into structured embed
                 general_ai_embed = format_ai_response_embed(
@@ -5245,7 +7098,10 @@ async def on_thread_create(thread):
                 
                 # Add satisfaction buttons (pass images for escalation)
                 button_view = SolvedButton(thread_id, conversation, 'ai', image_parts)
-                await thread.send(embed=general_ai_embed, view=button_view)
+                if answer_stream is not None:
+                    await answer_stream.finish(general_ai_embed, button_view)
+                else:
+                    await thread.send(embed=general_ai_embed, view=button_view)
                 thread_response_type[thread_id] = 'ai'  # Track that we gave an AI response
                 
                 # Classify issue and remove notification if present
@@ -5262,7 +7118,12 @@ async def on_thread_create(thread):
                 import traceback
                 traceback.print_exc()
                 # Fallback: shorter message
-                bot_response_text = "I couldn't find specific information in my knowledge base for your question, and I'm having trouble connecting to my AI service right now. A human support agent will help you shortly."
+                bot_response_text = degraded_answer([])
+                if answer_stream is not None and answer_stream.message is not None:
+                    try:
+                        await answer_stream.message.delete()  # Don't leave a half-streamed answer above the fallback
+                    except Exception:
+                        pass
                 
                 try:
                     fallback_embed = discord.Embed(
@@ -5386,7 +7247,6 @@ async def on_message(message):
     if 'your-vercel-app' not in DATA_API_URL:
         try:
             thread = message.channel
-            forum_api_url = DATA_API_URL.replace('/api/data', '/api/forum-posts')
             
             # Get user info with full Discord data
             user_name = message.author.display_name or message.author.name
@@ -5394,682 +7254,557 @@ async def on_message(message):
             user_avatar = message.author.avatar
             avatar_url = f'https://cdn.discordapp.com/avatars/{user_id}/{user_avatar}.png' if user_avatar else f'https://cdn.discordapp.com/avatars/{user_id}/default.png'
             
-            # Fetch current post to update conversation
-            async with aiohttp.ClientSession() as session:
-                # Get current post
-                async with session.get(forum_api_url) as get_response:
-                    current_posts = []
-                    if get_response.status == 200:
-                        current_posts = await get_response.json()
-                    
-                    # Find matching post
-                    matching_post = None
-                    for post in current_posts:
-                        if post.get('postId') == str(thread.id) or post.get('id') == f'POST-{thread.id}':
-                            matching_post = post
-                            break
-                    
-                    # Build updated conversation
-                    # Extract embed content for bot messages
-                    message_content = message.content
-                    if is_bot_message and not message_content and message.embeds:
-                        # Extract text from embed
-                        embed = message.embeds[0]
-                        embed_parts = []
-                        if embed.title:
-                            embed_parts.append(f"**{embed.title}**")
-                        if embed.description:
-                            embed_parts.append(embed.description)
-                        # Add fields if any
-                        for field in embed.fields[:2]:  # Limit to first 2 fields to keep it concise
-                            if field.name and field.value:
-                                embed_parts.append(f"{field.name}: {field.value}")
-                        message_content = "\n".join(embed_parts) if embed_parts else '[Embed message]'
-                    elif not message_content:
-                        message_content = '[Embed message]'
-                    
-                    new_message = {
-                        'author': 'Bot' if is_bot_message else 'User',
-                        'content': message_content,
-                        'timestamp': message.created_at.isoformat() if hasattr(message.created_at, 'isoformat') else datetime.now().isoformat()
-                    }
+            # BANDWIDTH OPTIMIZATION: The thread's post comes from the local cache (a miss fetches just that post)
+            matching_post = await forum_post_cache.load(thread.id)
+            
+            # Build updated conversation
+            # Extract embed content for bot messages
+            message_content = message.content
+            if is_bot_message and not message_content and message.embeds:
+                # Extract text from embed
+                embed = message.embeds[0]
+                embed_parts = []
+                if embed.title:
+                    embed_parts.append(f"**{embed.title}**")
+                if embed.description:
+                    embed_parts.append(embed.description)
+                # Add fields if any
+                for field in embed.fields[:2]:  # Limit to first 2 fields to keep it concise
+                    if field.name and field.value:
+                        embed_parts.append(f"{field.name}: {field.value}")
+                message_content = "\n".join(embed_parts) if embed_parts else '[Embed message]'
+            elif not message_content:
+                message_content = '[Embed message]'
+            
+            new_message = {
+                'author': 'Bot' if is_bot_message else 'User',
+                'content': message_content,
+                'timestamp': message.created_at.isoformat() if hasattr(message.created_at, 'isoformat') else datetime.now().isoformat()
+            }
+            
+            if matching_post:
+                # Update existing post - only the new message goes to the dashboard (status unchanged)
+                conversation = await forum_post_cache.append_message(thread.id, new_message)
+                
+                # Check if there was a bot response before this user message
+                has_bot_response = any(msg.get('author') == 'Bot' for msg in conversation)
+                print(f"📊 Conversation has {len(conversation)} messages, bot response: {has_bot_response}")
+                
+                # Start delayed satisfaction analysis if bot has already responded and this is a USER message
+                # BUT: Don't respond if thread has been escalated to human support
+                new_status = matching_post.get('status', 'Unsolved')
+                thread_id = thread.id
+                
+                # Check if thread is escalated to human - if so, bot stays silent
+                if thread_id in escalated_threads:
+                    print(f"🔇 Thread {thread_id} escalated to human support - bot will not respond")
+                    # Just update the conversation (done above), don't trigger any bot responses
+                elif not is_bot_message and has_bot_response and matching_post.get('status') not in ['Solved', 'Closed', 'High Priority']:
+                    # Check if the user is staff/admin - if so, don't trigger satisfaction analysis
+                    user_who_sent = message.author
+                    is_staff_user = is_staff_or_admin(user_who_sent) if isinstance(user_who_sent, discord.Member) else False
                     
-                    if matching_post:
-                        # Update existing post
-                        conversation = matching_post.get('conversation', [])
-                        conversation.append(new_message)
-                        
-                        # Check if there was a bot response before this user message
-                        has_bot_response = any(msg.get('author') == 'Bot' for msg in conversation)
-                        print(f"📊 Conversation has {len(conversation)} messages, bot response: {has_bot_response}")
-                        
-                        # Start delayed satisfaction analysis if bot has already responded and this is a USER message
-                        # BUT: Don't respond if thread has been escalated to human support
-                        new_status = matching_post.get('status', 'Unsolved')
-                        thread_id = thread.id
-                        
-                        # Check if thread is escalated to human - if so, bot stays silent
-                        if thread_id in escalated_threads:
-                            print(f"🔇 Thread {thread_id} escalated to human support - bot will not respond")
-                            # Just update the conversation, don't trigger any bot responses
-                            post_update = {
-                                'action': 'update',
-                                'post': {
-                                    **matching_post,
-                                    'conversation': conversation,
-                                    'status': matching_post.get('status', 'Human Support')  # Keep as Human Support
-                                }
-                            }
-                        elif not is_bot_message and has_bot_response and matching_post.get('status') not in ['Solved', 'Closed', 'High Priority']:
-                            # Check if the user is staff/admin - if so, don't trigger satisfaction analysis
-                            user_who_sent = message.author
-                            is_staff_user = is_staff_or_admin(user_who_sent) if isinstance(user_who_sent, discord.Member) else False
-                            
-                            if is_staff_user:
-                                print(f"ℹ User {user_who_sent.name} is staff/admin - skipping satisfaction analysis")
-                                # Just update conversation, no bot response
-                                post_update = {
-                                    'action': 'update',
-                                    'post': {
-                                        **matching_post,
-                                        'conversation': conversation,
-                                        'status': new_status
-                                    }
-                                }
-                            else:
-                                # Check if satisfaction analysis is enabled
-                                satisfaction_enabled = BOT_SETTINGS.get('satisfaction_analysis_enabled', True)
-                                if not satisfaction_enabled:
-                                    print(f"ℹ️ Satisfaction analysis is disabled - skipping analysis for thread {thread_id}")
-                                    # Just update conversation, no bot response
-                                    post_update = {
-                                        'action': 'update',
-                                        'post': {
-                                            **matching_post,
-                                            'conversation': conversation,
-                                            'status': new_status
-                                        }
-                                    }
-                                else:
-                                    # Update conversation immediately
-                                    post_update = {
-                                        'action': 'update',
-                                        'post': {
-                                            **matching_post,
-                                            'conversation': conversation,
-                                            'status': new_status
-                                        }
-                                    }
-                                    # Capture the user who sent the message for later use
-                                    captured_user = message.author
+                    if is_staff_user:
+                        print(f"ℹ User {user_who_sent.name} is staff/admin - skipping satisfaction analysis")
+                        # Just update conversation (done above), no bot response
+                    else:
+                        # Check if satisfaction analysis is enabled
+                        satisfaction_enabled = BOT_SETTINGS.get('satisfaction_analysis_enabled', True)
+                        if not satisfaction_enabled:
+                            print(f"ℹ️ Satisfaction analysis is disabled - skipping analysis for thread {thread_id}")
+                            # Just update conversation (done above), no bot response
+                        else:
+                            # Conversation was already updated above, before waiting for the user to finish typing
+                            # Capture the user who sent the message for later use
+                            captured_user = message.author
+                            try:
+                                delay = BOT_SETTINGS.get('satisfaction_delay', 15)
+                                await asyncio.sleep(delay)  # Wait for user to finish typing
+                                
+                                # Get the thread channel
+                                thread_channel = bot.get_channel(thread_id)
+                                if not thread_channel:
+                                    print(f"⚠ Could not find thread channel {thread_id}")
+                                    return
+                                
+                                # Get all recent user messages (last 5)
+                                recent_user_messages = [msg.get('content') for msg in conversation[-5:] if msg.get('author') == 'User']
+                                
+                                print(f"📝 Analyzing {len(recent_user_messages)} user message(s): {recent_user_messages}")
+                                
+                                if not recent_user_messages:
+                                    print(f"⚠ No user messages found for analysis")
+                                    return
+                                
+                                satisfaction = await analyze_user_satisfaction(recent_user_messages)
+                                print(f"📊 Analysis result: satisfied={satisfaction.get('satisfied')}, wants_human={satisfaction.get('wants_human')}, confidence={satisfaction.get('confidence')}, is_followup={satisfaction.get('is_followup')}")
+                                
+                                # Update status based on analysis
+                                updated_status = matching_post.get('status', 'Unsolved')
+                                response_type = thread_response_type.get(thread_id)  # Get what type of response we gave
+                                
+                                # CHECK FOR FOLLOW-UP INFORMATION FIRST
+                                # If user is providing follow-up info (not just satisfaction), generate a new AI response
+                                if satisfaction.get('is_followup') and not satisfaction.get('satisfied') and not satisfaction.get('wants_human'):
+                                    print(f"💬 User provided follow-up information - generating new AI response based on conversation")
+                                    
+                                    # Build conversation context from full conversation history
+                                    conversation_text = ""
+                                    for msg in conversation:
+                                        author = msg.get('author', 'Unknown')
+                                        content = msg.get('content', '')
+                                        if author == 'User':
+                                            conversation_text += f"User: {content}\n"
+                                        elif author == 'Bot':
+                                            conversation_text += f"Assistant: {content}\n"
+                                    
+                                    # Get the latest user message as the query
+                                    latest_user_msg = recent_user_messages[-1] if recent_user_messages else ""
+                                    
+                                    # Search for relevant RAG entries using the conversation context
+                                    search_query = f"{conversation_text}\n\nUser's latest question: {latest_user_msg}"
+                                    relevant_docs = await find_relevant_rag_entries_async(search_query, RAG_DATABASE, top_k=5, similarity_threshold=0.2)
+                                    
+                                    if relevant_docs:
+                                        print(f"📚 Found {len(relevant_docs)} relevant RAG entries for follow-up")
+                                    else:
+                                        print(f"⚠️ No relevant RAG entries found for follow-up")
+                                    
+                                    # Generate AI response using conversation context
                                     try:
-                                        delay = BOT_SETTINGS.get('satisfaction_delay', 15)
-                                        await asyncio.sleep(delay)  # Wait for user to finish typing
-                                        
-                                        # Get the thread channel
-                                        thread_channel = bot.get_channel(thread_id)
-                                        if not thread_channel:
-                                            print(f"⚠ Could not find thread channel {thread_id}")
-                                            return
+                                        # Use conversation context as the query
+                                        bot_response_text = await generate_ai_response(
+                                            f"Conversation so far:\n{conversation_text}\n\nUser's latest message: {latest_user_msg}",
+                                            relevant_docs[:RAG_CONTEXT_ENTRIES] if relevant_docs else [],
+                                            None
+                                        )
                                         
-                                        # Get all recent user messages (last 5)
-                                        recent_user_messages = [msg.get('content') for msg in conversation[-5:] if msg.get('author') == 'User']
-                                        
-                                        print(f"📝 Analyzing {len(recent_user_messages)} user message(s): {recent_user_messages}")
-                                        
-                                        if not recent_user_messages:
-                                            print(f"⚠ No user messages found for analysis")
+                                        if bot_response_text and len(bot_response_text.strip()) > 0:
+                                            # Format response into structured embed
+                                            ai_embed = format_ai_response_embed(
+                                                bot_response_text,
+                                                title="💡 Follow-up Response",
+                                                color=0x5865F2,
+                                                relevant_docs=relevant_docs[:2] if relevant_docs else None
+                                            )
+                                            ai_embed.add_field(
+                                                name="💬 Did this help?",
+                                                value="Let me know by clicking a button below!",
+                                                inline=False
+                                            )
+                                            
+                                            # Add solved button with updated conversation
+                                            solved_view = SolvedButton(thread_id, conversation)
+                                            await thread_channel.send(embed=ai_embed, view=solved_view)
+                                            thread_response_type[thread_id] = 'ai'  # Track that we gave an AI response
+                                            
+                                            # Update conversation in database
+                                            bot_message = {
+                                                'author': 'Bot',
+                                                'content': bot_response_text,
+                                                'timestamp': datetime.now().isoformat()
+                                            }
+                                            print(f"✅ Generated follow-up AI response for thread {thread_id}")
+                                            
+                                            # Send just the new message and status to the API
+                                            if await forum_post_cache.append_message(thread_id, bot_message, status='AI Response') is not None:
+                                                print(f"✅ Updated conversation in database")
+                                            
+                                            # Don't continue with satisfaction analysis - we already responded
                                             return
-                                        
-                                        satisfaction = await analyze_user_satisfaction(recent_user_messages)
-                                        print(f"📊 Analysis result: satisfied={satisfaction.get('satisfied')}, wants_human={satisfaction.get('wants_human')}, confidence={satisfaction.get('confidence')}, is_followup={satisfaction.get('is_followup')}")
-                                        
-                                        # Update status based on analysis
-                                        updated_status = matching_post.get('status', 'Unsolved')
-                                        response_type = thread_response_type.get(thread_id)  # Get what type of response we gave
-                                        
-                                        # CHECK FOR FOLLOW-UP INFORMATION FIRST
-                                        # If user is providing follow-up info (not just satisfaction), generate a new AI response
-                                        if satisfaction.get('is_followup') and not satisfaction.get('satisfied') and not satisfaction.get('wants_human'):
-                                            print(f"💬 User provided follow-up information - generating new AI response based on conversation")
+                                        else:
+                                            print(f"⚠️ AI response was empty, falling through to satisfaction analysis")
+                                    except Exception as followup_error:
+                                        print(f"❌ Error generating follow-up response: {followup_error}")
+                                        import traceback
+                                        traceback.print_exc()
+                                        # Fall through to satisfaction analysis
+                                
+                                # DEBUG: Log escalation decision factors
+                                print(f"🔍 Escalation Decision Factors:")
+                                print(f"   Response type: {response_type}")
+                                print(f"   Satisfied: {satisfaction.get('satisfied')}")
+                                print(f"   Wants human: {satisfaction.get('wants_human')}")
+                                print(f"   Confidence: {satisfaction.get('confidence')}")
+                                
+                                # ESCALATION LOGIC:
+                                # 1. Auto-response → if unsatisfied → AI response
+                                # 2. AI response → if unsatisfied → Human support
+                                # 3. Explicit human request → Human support immediately
+                                
+                                if satisfaction.get('satisfied') and satisfaction.get('confidence', 0) > 60:
+                                        # User is satisfied - mark as solved
+                                    updated_status = 'Solved'
+                                    
+                                    # Send shorter satisfaction confirmation embed
+                                    confirm_embed = discord.Embed(
+                                        title="✅ Great! Issue Solved",
+                                        description="Glad I could help! This post will now be locked.",
+                                        color=0x2ECC71
+                                    )
+                                    confirm_embed.add_field(
+                                        name="💬 More Questions?",
+                                        value="Create a new post anytime!",
+                                        inline=False
+                                    )
+                                    confirm_embed.set_footer(text="Revolution Macro Support")
+                                    await thread_channel.send(embed=confirm_embed)
+                                    print(f"✅ User satisfaction detected - marking thread {thread_id} as Solved")
+                                    
+                                    # Apply "Resolved" tag and remove "Unsolved" tag if it exists
+                                    try:
+                                        forum_channel = bot.get_channel(SUPPORT_FORUM_CHANNEL_ID)
+                                        if forum_channel:
+                                            resolved_tag = await get_resolved_tag(forum_channel)
+                                            unsolved_tag = await get_unsolved_tag(forum_channel)
+                                            
+                                            # Get current tags
+                                            current_tags = list(thread_channel.applied_tags)
+                                            
+                                            # Remove unsolved tag if present
+                                            if unsolved_tag and unsolved_tag in current_tags:
+                                                current_tags.remove(unsolved_tag)
+                                                print(f"🏷️ Removed '{unsolved_tag.name}' tag from thread {thread_id}")
+                                            
+                                            # Add resolved tag if not present
+                                            if resolved_tag and resolved_tag not in current_tags:
+                                                current_tags.append(resolved_tag)
+                                                print(f"🏷️ Applied '{resolved_tag.name}' tag to thread {thread_id}")
+                                            
+                                            # Update tags
+                                            await thread_channel.edit(applied_tags=current_tags)
+                                    except Exception as tag_error:
+                                        print(f"⚠ Could not update tags: {tag_error}")
+                                    
+                                    # Lock/archive the thread
+                                    try:
+                                        await thread_channel.edit(archived=True, locked=True)
+                                        print(f"🔒 Thread {thread_id} locked and archived successfully")
+                                    except discord.errors.Forbidden as perm_error:
+                                        print(f"❌ Bot lacks 'Manage Threads' permission to lock thread {thread_id}")
+                                        print(f"   Error: {perm_error}")
+                                        # Send notification that thread couldn't be locked
+                                        try:
+                                            lock_fail_embed = discord.Embed(
+                                                title="⚠️ Thread Not Locked",
+                                                description="This thread has been marked as Solved, but I don't have permission to lock it. Please give me the **Manage Threads** permission.",
+                                                color=0xF39C12
+                                            )
+                                            await thread_channel.send(embed=lock_fail_embed)
+                                        except:
+                                            pass
+                                    except Exception as lock_error:
+                                        print(f"❌ Error locking thread {thread_id}: {lock_error}")
+                                        import traceback
+                                        traceback.print_exc()
+                                    
+                                    # Automatically create RAG entry from this solved conversation (if enabled)
+                                    try:
+                                        # Check if auto-RAG is enabled
+                                        if not BOT_SETTINGS.get('auto_rag_enabled', True):
+                                            print(f"ℹ️ Auto-RAG creation is disabled - skipping RAG entry for thread {thread_id}")
+                                        else:
+                                            print(f"📝 Attempting to create RAG entry from solved conversation...")
                                             
-                                            # Build conversation context from full conversation history
-                                            conversation_text = ""
+                                            # Format conversation for analysis
+                                            formatted_lines = []
                                             for msg in conversation:
                                                 author = msg.get('author', 'Unknown')
                                                 content = msg.get('content', '')
-                                                if author == 'User':
-                                                    conversation_text += f"User: {content}\n"
-                                                elif author == 'Bot':
-                                                    conversation_text += f"Assistant: {content}\n"
-                                            
-                                            # Get the latest user message as the query
-                                            latest_user_msg = recent_user_messages[-1] if recent_user_messages else ""
+                                                formatted_lines.append(f"<@{author}> Said: {content}")
                                             
-                                            # Search for relevant RAG entries using the conversation context
-                                            search_query = f"{conversation_text}\n\nUser's latest question: {latest_user_msg}"
-                                            relevant_docs = find_relevant_rag_entries(search_query, RAG_DATABASE, top_k=5, similarity_threshold=0.2)
+                                            conversation_text = "\n".join(formatted_lines)
                                             
-                                            if relevant_docs:
-                                                print(f"📚 Found {len(relevant_docs)} relevant RAG entries for follow-up")
-                                            else:
-                                                print(f"⚠️ No relevant RAG entries found for follow-up")
+                                            # Analyze conversation to create RAG entry
+                                            rag_entry = await analyze_conversation(conversation_text)
                                             
-                                            # Generate AI response using conversation context
-                                            try:
-                                                # Use conversation context as the query
-                                                bot_response_text = await generate_ai_response(
-                                                    f"Conversation so far:\n{conversation_text}\n\nUser's latest message: {latest_user_msg}",
-                                                    relevant_docs[:3] if relevant_docs else [],
-                                                    None
-                                                )
+                                            # Check if thread was manually closed with no_review (don't create RAG)
+                                            if thread_id in no_review_threads:
+                                                print(f"🚫 Thread {thread_id} marked as no_review - skipping auto-RAG creation")
+                                            elif rag_entry and 'your-vercel-app' not in DATA_API_URL:
+                                                # Create pending RAG entry (requires approval)
+                                                data_api_url_rag = DATA_API_URL
                                                 
-                                                if bot_response_text and len(bot_response_text.strip()) > 0:
-                                                    # Format response into structured embed
-                                                    ai_embed = format_ai_response_embed(
-                                                        bot_response_text,
-                                                        title="💡 Follow-up Response",
-                                                        color=0x5865F2,
-                                                        relevant_docs=relevant_docs[:2] if relevant_docs else None
-                                                    )
-                                                    ai_embed.add_field(
-                                                        name="💬 Did this help?",
-                                                        value="Let me know by clicking a button below!",
-                                                        inline=False
-                                                    )
-                                                    
-                                                    # Add solved button with updated conversation
-                                                    solved_view = SolvedButton(thread_id, conversation)
-                                                    await thread_channel.send(embed=ai_embed, view=solved_view)
-                                                    thread_response_type[thread_id] = 'ai'  # Track that we gave an AI response
-                                                    
-                                                    # Update conversation in database
-                                                    bot_message = {
-                                                        'author': 'Bot',
-                                                        'content': bot_response_text,
-                                                        'timestamp': datetime.now().isoformat()
-                                                    }
-                                                    conversation.append(bot_message)
-                                                    
-                                                    # Update post with new conversation
-                                                    post_update = {
-                                                        'action': 'update',
-                                                        'post': {
-                                                            **matching_post,
-                                                            'conversation': conversation,
-                                                            'status': 'AI Response'
+                                                async with dashboard_http.borrow() as rag_session:
+                                                    async with rag_session.get(data_api_url_rag) as get_data_response:
+                                                        current_data = {'ragEntries': [], 'autoResponses': [], 'slashCommands': [], 'pendingRagEntries': []}
+                                                        if get_data_response.status == 200:
+                                                            current_data = await get_data_response.json()
+                                                        
+                                                        # Create conversation preview for review
+                                                        conversation_preview = conversation_text[:500] + "..." if len(conversation_text) > 500 else conversation_text
+                                                        
+                                                        # Create new PENDING RAG entry
+                                                        new_pending_entry = {
+                                                            'id': f'PENDING-{datetime.now().strftime("%Y%m%d%H%M%S")}',
+                                                            'title': rag_entry.get('title', 'Auto-generated from solved thread'),
+                                                            'content': rag_entry.get('content', ''),
+                                                            'keywords': rag_entry.get('keywords', []),
+                                                            'createdAt': datetime.now().isoformat(),
+                                                            'source': 'Auto-satisfaction',
+                                                            'threadId': str(thread_id),
+                                                            'conversationPreview': conversation_preview
+                                                        }
+                                                        
+                                                        pending_entries = current_data.get('pendingRagEntries', [])
+                                                        pending_entries.append(new_pending_entry)
+                                                        
+                                                        # Save to API (must include ALL fields)
+                                                        save_data = {
+                                                            'ragEntries': current_data.get('ragEntries', []),
+                                                            'autoResponses': current_data.get('autoResponses', []),
+                                                            'slashCommands': current_data.get('slashCommands', []),
+                                                            'botSettings': current_data.get('botSettings', {}),
+                                                            'pendingRagEntries': pending_entries
                                                         }
-                                                    }
-                                                    
-                                                    print(f"✅ Generated follow-up AI response for thread {thread_id}")
-                                                    
-                                                    # Send update to API
-                                                    async with aiohttp.ClientSession() as update_session:
+                                                        
+                                                        print(f"💾 Saving pending RAG entry to API for review...")
+                                                        print(f"   Total pending entries: {len(pending_entries)}")
+                                                        print(f"   New pending entry: '{new_pending_entry['title']}'")
+                                                        
                                                         headers = {'Content-Type': 'application/json', 'Accept': 'application/json'}
-                                                        async with update_session.post(forum_api_url, json=post_update, headers=headers, timeout=aiohttp.ClientTimeout(total=5)) as update_resp:
-                                                            if update_resp.status == 200:
-                                                                print(f"✅ Updated conversation in database")
+                                                        async with rag_session.post(data_api_url_rag, json=save_data, headers=headers, timeout=aiohttp.ClientTimeout(total=10)) as save_response:
+                                                            response_text = await save_response.text()
+                                                            if save_response.status == 200:
+                                                                print(f"✅ Created pending RAG entry for review: '{new_pending_entry['title']}'")
+                                                                print(f"   API response: {response_text[:200]}")
+                                                                
+                                                                # Send shorter notification in thread
+                                                                rag_notification = discord.Embed(
+                                                                    title="📋 Entry Saved for Review",
+                                                                    description=f"**{new_pending_entry['title']}**\n\nThis will be reviewed and added to help future users!",
+                                                                    color=0xF39C12
+                                                                )
+                                                                rag_notification.set_footer(text="Revolution Macro • Pending Approval")
+                                                                await thread_channel.send(embed=rag_notification)
                                                             else:
-                                                                print(f"⚠️ Failed to update conversation: {update_resp.status}")
-                                                    
-                                                    # Don't continue with satisfaction analysis - we already responded
-                                                    return
-                                                else:
-                                                    print(f"⚠️ AI response was empty, falling through to satisfaction analysis")
-                                            except Exception as followup_error:
-                                                print(f"❌ Error generating follow-up response: {followup_error}")
-                                                import traceback
-                                                traceback.print_exc()
-                                                # Fall through to satisfaction analysis
-                                        
-                                        # DEBUG: Log escalation decision factors
-                                        print(f"🔍 Escalation Decision Factors:")
-                                        print(f"   Response type: {response_type}")
-                                        print(f"   Satisfied: {satisfaction.get('satisfied')}")
-                                        print(f"   Wants human: {satisfaction.get('wants_human')}")
-                                        print(f"   Confidence: {satisfaction.get('confidence')}")
+                                                                print(f"❌ Failed to create pending RAG entry!")
+                                                                print(f"   Status: {save_response.status}")
+                                                                print(f"   Response: {response_text[:300]}")
+                                                                print(f"   URL: {data_api_url_rag}")
+                                                                print(f"   Payload: {len(pending_entries)} pending entries")
+                                            else:
+                                                print(f"ℹ Skipping RAG entry creation (no entry generated or API not configured)")
+                                    except Exception as rag_error:
+                                        print(f"⚠ Error auto-creating RAG entry: {rag_error}")
+                                        import traceback
+                                        traceback.print_exc()
+                                
+                                elif not satisfaction.get('satisfied') and satisfaction.get('confidence', 0) > 60:
+                                    # User is unsatisfied - check escalation path
+                                    
+                                    # STEP 1: Check if they EXPLICITLY asked for human (e.g., "I want to talk to a person")
+                                    if satisfaction.get('wants_human') and response_type == 'ai':
+                                        # They got AI and explicitly want human - escalate
+                                        updated_status = 'Human Support'
+                                        escalated_threads.add(thread_id)
                                         
-                                        # ESCALATION LOGIC:
-                                        # 1. Auto-response → if unsatisfied → AI response
-                                        # 2. AI response → if unsatisfied → Human support
-                                        # 3. Explicit human request → Human support immediately
+                                        human_embed = discord.Embed(
+                                            title="👨‍💼 Support Team Notified",
+                                            description="Got it! I've notified our support team. They'll help you soon.",
+                                            color=0x3498DB
+                                        )
+                                        human_embed.add_field(
+                                            name="⏰ Response Time",
+                                            value="Usually under 24 hours",
+                                            inline=True
+                                        )
+                                        human_embed.add_field(
+                                            name="📸 Tip",
+                                            value="Send screenshots if you have any!",
+                                            inline=True
+                                        )
+                                        human_embed.set_footer(text="Revolution Macro Support Team")
+                                        await thread_channel.send(embed=human_embed)
+                                        print(f"👥 User explicitly requested human support after AI - thread {thread_id} escalated")
+                                    
+                                    # STEP 2: They got auto-response and are unsatisfied - try AI
+                                    elif response_type == 'auto':
+                                        print(f"🔄 ESCALATION PATH: Auto → AI (user unsatisfied with auto-response, trying AI follow-up...)")
                                         
-                                        if satisfaction.get('satisfied') and satisfaction.get('confidence', 0) > 60:
-                                                # User is satisfied - mark as solved
-                                            updated_status = 'Solved'
+                                        try:
+                                            # Get the user's question from conversation
+                                            user_messages = [msg.get('content', '') for msg in conversation if msg.get('author') == 'User']
+                                            user_question = ' '.join(user_messages[:2]) if user_messages else "Help with this issue"
+                                            
+                                            print(f"📝 Generating AI response for: {user_question[:50]}...")
+                                            
+                                            # Try to find RAG entries
+                                            relevant_docs = await find_relevant_rag_entries_async(user_question)
+                                            
+                                            # Generate AI response (ALWAYS, with or without RAG)
+                                            # Note: on_message handler doesn't have access to original images
+                                            if relevant_docs:
+                                                print(f"📚 Found {len(relevant_docs)} RAG entries for AI response")
+                                                ai_response = await generate_ai_response(user_question, relevant_docs[:2], None)
+                                            else:
+                                                print(f"💭 No RAG entries - AI using general knowledge")
+                                                ai_response = await generate_ai_response(user_question, [], None)
                                             
-                                            # Send shorter satisfaction confirmation embed
-                                            confirm_embed = discord.Embed(
-                                                title="✅ Great! Issue Solved",
-                                                description="Glad I could help! This post will now be locked.",
-                                                color=0x2ECC71
+                                            print(f"✅ AI response generated ({len(ai_response)} chars)")
+                                            
+                                            # Send the AI response
+                                            # Truncate description if too long (Discord limit is 4096 characters)
+                                            max_description_length = 4096
+                                            truncated_response = ai_response
+                                            if len(ai_response) > max_description_length:
+                                                truncated_response = ai_response[:max_description_length-3] + "..."
+                                            
+                                            ai_embed = discord.Embed(
+                                                title="💡 Let Me Try Again",
+                                                description=truncated_response,
+                                                color=0x5865F2
                                             )
-                                            confirm_embed.add_field(
-                                                name="💬 More Questions?",
-                                                value="Create a new post anytime!",
+                                            ai_embed.add_field(
+                                                name="💬 Better?",
+                                                value="Let me know by clicking a button below!",
                                                 inline=False
                                             )
-                                            confirm_embed.set_footer(text="Revolution Macro Support")
-                                            await thread_channel.send(embed=confirm_embed)
-                                            print(f"✅ User satisfaction detected - marking thread {thread_id} as Solved")
-                                            
-                                            # Apply "Resolved" tag and remove "Unsolved" tag if it exists
-                                            try:
-                                                forum_channel = bot.get_channel(SUPPORT_FORUM_CHANNEL_ID)
-                                                if forum_channel:
-                                                    resolved_tag = await get_resolved_tag(forum_channel)
-                                                    unsolved_tag = await get_unsolved_tag(forum_channel)
-                                                    
-                                                    # Get current tags
-                                                    current_tags = list(thread_channel.applied_tags)
-                                                    
-                                                    # Remove unsolved tag if present
-                                                    if unsolved_tag and unsolved_tag in current_tags:
-                                                        current_tags.remove(unsolved_tag)
-                                                        print(f"🏷️ Removed '{unsolved_tag.name}' tag from thread {thread_id}")
-                                                    
-                                                    # Add resolved tag if not present
-                                                    if resolved_tag and resolved_tag not in current_tags:
-                                                        current_tags.append(resolved_tag)
-                                                        print(f"🏷️ Applied '{resolved_tag.name}' tag to thread {thread_id}")
-                                                    
-                                                    # Update tags
-                                                    await thread_channel.edit(applied_tags=current_tags)
-                                            except Exception as tag_error:
-                                                print(f"⚠ Could not update tags: {tag_error}")
+                                            ai_embed.set_footer(text="Revolution Macro AI")
                                             
-                                            # Lock/archive the thread
-                                            try:
-                                                await thread_channel.edit(archived=True, locked=True)
-                                                print(f"🔒 Thread {thread_id} locked and archived successfully")
-                                            except discord.errors.Forbidden as perm_error:
-                                                print(f"❌ Bot lacks 'Manage Threads' permission to lock thread {thread_id}")
-                                                print(f"   Error: {perm_error}")
-                                                # Send notification that thread couldn't be locked
-                                                try:
-                                                    lock_fail_embed = discord.Embed(
-                                                        title="⚠️ Thread Not Locked",
-                                                        description="This thread has been marked as Solved, but I don't have permission to lock it. Please give me the **Manage Threads** permission.",
-                                                        color=0xF39C12
-                                                    )
-                                                    await thread_channel.send(embed=lock_fail_embed)
-                                                except:
-                                                    pass
-                                            except Exception as lock_error:
-                                                print(f"❌ Error locking thread {thread_id}: {lock_error}")
-                                                import traceback
-                                                traceback.print_exc()
+                                            # Add solved button - use existing conversation
+                                            solved_view = SolvedButton(thread_id, conversation)
+                                            await thread_channel.send(embed=ai_embed, view=solved_view)
+                                            thread_response_type[thread_id] = 'ai'
+                                            updated_status = 'AI Response'
+                                            print(f"✅ SENT AI FOLLOW-UP RESPONSE to thread {thread_id}")
                                             
-                                            # Automatically create RAG entry from this solved conversation (if enabled)
+                                        except Exception as ai_error:
+                                            print(f"❌ ERROR generating AI follow-up: {ai_error}")
+                                            import traceback
+                                            traceback.print_exc()
+                                            # Even if AI fails, send something
                                             try:
-                                                # Check if auto-RAG is enabled
-                                                if not BOT_SETTINGS.get('auto_rag_enabled', True):
-                                                    print(f"ℹ️ Auto-RAG creation is disabled - skipping RAG entry for thread {thread_id}")
-                                                else:
-                                                    print(f"📝 Attempting to create RAG entry from solved conversation...")
-                                                    
-                                                    # Format conversation for analysis
-                                                    formatted_lines = []
-                                                    for msg in conversation:
-                                                        author = msg.get('author', 'Unknown')
-                                                        content = msg.get('content', '')
-                                                        formatted_lines.append(f"<@{author}> Said: {content}")
-                                                    
-                                                    conversation_text = "\n".join(formatted_lines)
-                                                    
-                                                    # Analyze conversation to create RAG entry
-                                                    rag_entry = await analyze_conversation(conversation_text)
-                                                    
-                                                    # Check if thread was manually closed with no_review (don't create RAG)
-                                                    if thread_id in no_review_threads:
-                                                        print(f"🚫 Thread {thread_id} marked as no_review - skipping auto-RAG creation")
-                                                    elif rag_entry and 'your-vercel-app' not in DATA_API_URL:
-                                                        # Create pending RAG entry (requires approval)
-                                                        data_api_url_rag = DATA_API_URL
-                                                        
-                                                        async with aiohttp.ClientSession() as rag_session:
-                                                            async with rag_session.get(data_api_url_rag) as get_data_response:
-                                                                current_data = {'ragEntries': [], 'autoResponses': [], 'slashCommands': [], 'pendingRagEntries': []}
-                                                                if get_data_response.status == 200:
-                                                                    current_data = await get_data_response.json()
-                                                                
-                                                                # Create conversation preview for review
-                                                                conversation_preview = conversation_text[:500] + "..." if len(conversation_text) > 500 else conversation_text
-                                                                
-                                                                # Create new PENDING RAG entry
-                                                                new_pending_entry = {
-                                                                    'id': f'PENDING-{datetime.now().strftime("%Y%m%d%H%M%S")}',
-                                                                    'title': rag_entry.get('title', 'Auto-generated from solved thread'),
-                                                                    'content': rag_entry.get('content', ''),
-                                                                    'keywords': rag_entry.get('keywords', []),
-                                                                    'createdAt': datetime.now().isoformat(),
-                                                                    'source': 'Auto-satisfaction',
-                                                                    'threadId': str(thread_id),
-                                                                    'conversationPreview': conversation_preview
-                                                                }
-                                                                
-                                                                pending_entries = current_data.get('pendingRagEntries', [])
-                                                                pending_entries.append(new_pending_entry)
-                                                                
-                                                                # Save to API (must include ALL fields)
-                                                                save_data = {
-                                                                    'ragEntries': current_data.get('ragEntries', []),
-                                                                    'autoResponses': current_data.get('autoResponses', []),
-                                                                    'slashCommands': current_data.get('slashCommands', []),
-                                                                    'botSettings': current_data.get('botSettings', {}),
-                                                                    'pendingRagEntries': pending_entries
-                                                                }
-                                                                
-                                                                print(f"💾 Saving pending RAG entry to API for review...")
-                                                                print(f"   Total pending entries: {len(pending_entries)}")
-                                                                print(f"   New pending entry: '{new_pending_entry['title']}'")
-                                                                
-                                                                headers = {'Content-Type': 'application/json', 'Accept': 'application/json'}
-                                                                async with rag_session.post(data_api_url_rag, json=save_data, headers=headers, timeout=aiohttp.ClientTimeout(total=10)) as save_response:
-                                                                    response_text = await save_response.text()
-                                                                    if save_response.status == 200:
-                                                                        print(f"✅ Created pending RAG entry for review: '{new_pending_entry['title']}'")
-                                                                        print(f"   API response: {response_text[:200]}")
-                                                                        
-                                                                        # Send shorter notification in thread
-                                                                        rag_notification = discord.Embed(
-                                                                            title="📋 Entry Saved for Review",
-                                                                            description=f"**{new_pending_entry['title']}**\n\nThis will be reviewed and added to help future users!",
-                                                                            color=0xF39C12
-                                                                        )
-                                                                        rag_notification.set_footer(text="Revolution Macro • Pending Approval")
-                                                                        await thread_channel.send(embed=rag_notification)
-                                                                    else:
-                                                                        print(f"❌ Failed to create pending RAG entry!")
-                                                                        print(f"   Status: {save_response.status}")
-                                                                        print(f"   Response: {response_text[:300]}")
-                                                                        print(f"   URL: {data_api_url_rag}")
-                                                                        print(f"   Payload: {len(pending_entries)} pending entries")
-                                                    else:
-                                                        print(f"ℹ Skipping RAG entry creation (no entry generated or API not configured)")
-                                            except Exception as rag_error:
-                                                print(f"⚠ Error auto-creating RAG entry: {rag_error}")
-                                                import traceback
-                                                traceback.print_exc()
-                                        
-                                        elif not satisfaction.get('satisfied') and satisfaction.get('confidence', 0) > 60:
-                                            # User is unsatisfied - check escalation path
-                                            
-                                            # STEP 1: Check if they EXPLICITLY asked for human (e.g., "I want to talk to a person")
-                                            if satisfaction.get('wants_human') and response_type == 'ai':
-                                                # They got AI and explicitly want human - escalate
+                                                fallback_embed = discord.Embed(
+                                                    title="💡 Let Me Try Again",
+                                                    description="I'm having trouble generating a detailed response. Let me get a human to help you with this!",
+                                                    color=0xF39C12
+                                                )
+                                                await thread_channel.send(embed=fallback_embed)
                                                 updated_status = 'Human Support'
                                                 escalated_threads.add(thread_id)
-                                                
-                                                human_embed = discord.Embed(
-                                                    title="👨‍💼 Support Team Notified",
-                                                    description="Got it! I've notified our support team. They'll help you soon.",
-                                                    color=0x3498DB
-                                                )
-                                                human_embed.add_field(
-                                                    name="⏰ Response Time",
-                                                    value="Usually under 24 hours",
-                                                    inline=True
-                                                )
-                                                human_embed.add_field(
-                                                    name="📸 Tip",
-                                                    value="Send screenshots if you have any!",
-                                                    inline=True
-                                                )
-                                                human_embed.set_footer(text="Revolution Macro Support Team")
-                                                await thread_channel.send(embed=human_embed)
-                                                print(f"👥 User explicitly requested human support after AI - thread {thread_id} escalated")
+                                            except:
+                                                pass
+                                    
+                                    # STEP 3: They got AI response and are still unsatisfied - escalate to human
+                                    elif response_type == 'ai':
+                                        # They got AI response and were still unsatisfied - escalate to human
+                                        print(f"⚠ ESCALATION PATH: AI → Human (user still unsatisfied after AI response)")
+                                        updated_status = 'Human Support'
+                                        escalated_threads.add(thread_id)  # Mark thread - bot stops talking
+                                        
+                                        # Get the user who triggered this (from the message that started the timer)
+                                        # We need to check if they're the post creator and not staff
+                                        user_who_triggered = None
+                                        thread_owner_id = None
+                                        should_show_log_prompt = False
+                                        
+                                        try:
+                                            # Get thread owner
+                                            if hasattr(thread_channel, 'owner_id') and thread_channel.owner_id:
+                                                thread_owner_id = thread_channel.owner_id
+                                            elif hasattr(thread_channel, 'owner') and thread_channel.owner:
+                                                thread_owner_id = thread_channel.owner.id
                                             
-                                            # STEP 2: They got auto-response and are unsatisfied - try AI
-                                            elif response_type == 'auto':
-                                                print(f"🔄 ESCALATION PATH: Auto → AI (user unsatisfied with auto-response, trying AI follow-up...)")
-                                                
-                                                try:
-                                                    # Get the user's question from conversation
-                                                    user_messages = [msg.get('content', '') for msg in conversation if msg.get('author') == 'User']
-                                                    user_question = ' '.join(user_messages[:2]) if user_messages else "Help with this issue"
-                                                    
-                                                    print(f"📝 Generating AI response for: {user_question[:50]}...")
-                                                    
-                                                    # Try to find RAG entries
-                                                    relevant_docs = find_relevant_rag_entries(user_question)
-                                                    
-                                                    # Generate AI response (ALWAYS, with or without RAG)
-                                                    # Note: on_message handler doesn't have access to original images
-                                                    if relevant_docs:
-                                                        print(f"📚 Found {len(relevant_docs)} RAG entries for AI response")
-                                                        ai_response = await generate_ai_response(user_question, relevant_docs[:2], None)
-                                                    else:
-                                                        print(f"💭 No RAG entries - AI using general knowledge")
-                                                        ai_response = await generate_ai_response(user_question, [], None)
-                                                    
-                                                    print(f"✅ AI response generated ({len(ai_response)} chars)")
-                                                    
-                                                    # Send the AI response
-                                                    # Truncate description if too long (Discord limit is 4096 characters)
-                                                    max_description_length = 4096
-                                                    truncated_response = ai_response
-                                                    if len(ai_response) > max_description_length:
-                                                        truncated_response = ai_response[:max_description_length-3] + "..."
-                                                    
-                                                    ai_embed = discord.Embed(
-                                                        title="💡 Let Me Try Again",
-                                                        description=truncated_response,
-                                                        color=0x5865F2
-                                                    )
-                                                    ai_embed.add_field(
-                                                        name="💬 Better?",
-                                                        value="Let me know by clicking a button below!",
-                                                        inline=False
-                                                    )
-                                                    ai_embed.set_footer(text="Revolution Macro AI")
-                                                    
-                                                    # Add solved button - use existing conversation
-                                                    solved_view = SolvedButton(thread_id, conversation)
-                                                    await thread_channel.send(embed=ai_embed, view=solved_view)
-                                                    thread_response_type[thread_id] = 'ai'
-                                                    updated_status = 'AI Response'
-                                                    print(f"✅ SENT AI FOLLOW-UP RESPONSE to thread {thread_id}")
-                                                    
-                                                except Exception as ai_error:
-                                                    print(f"❌ ERROR generating AI follow-up: {ai_error}")
-                                                    import traceback
-                                                    traceback.print_exc()
-                                                    # Even if AI fails, send something
-                                                    try:
-                                                        fallback_embed = discord.Embed(
-                                                            title="💡 Let Me Try Again",
-                                                            description="I'm having trouble generating a detailed response. Let me get a human to help you with this!",
-                                                            color=0xF39C12
-                                                        )
-                                                        await thread_channel.send(embed=fallback_embed)
-                                                        updated_status = 'Human Support'
-                                                        escalated_threads.add(thread_id)
-                                                    except:
-                                                        pass
+                                            # Get the user who sent the message that triggered this (captured from message context)
+                                            user_who_triggered = captured_user if 'captured_user' in locals() else None
+                                            if user_who_triggered and thread_owner_id:
+                                                is_creator = user_who_triggered.id == thread_owner_id
+                                                is_staff = is_staff_or_admin(user_who_triggered) if isinstance(user_who_triggered, discord.Member) else False
+                                                should_show_log_prompt = is_creator and not is_staff
+                                        except Exception as user_check_error:
+                                            print(f"⚠ Error checking user for log prompt: {user_check_error}")
+                                        
+                                        if should_show_log_prompt:
+                                            # First, ask for logs to help support team (only to post creator)
+                                            log_prompt_embed = discord.Embed(
+                                                title="📋 Before We Get Support...",
+                                                description="To help our team solve this **much faster**, please include your **logs**!\n\nLogs contain error details that help us identify exactly what's wrong.",
+                                                color=0xF39C12
+                                            )
+                                            log_prompt_embed.add_field(
+                                                name="🧭 How to Get Logs (from the Macro)",
+                                                value=(
+                                                    "1) Open the macro and go to **Status → Logs**\n"
+                                                    "2) Click **Copy Logs** → then paste here\n"
+                                                    "   - or -\n"
+                                                    "   Click **Open Logs Folder** → upload the most recent `.log` file"
+                                                ),
+                                                inline=False
+                                            )
+                                            log_prompt_embed.add_field(
+                                                name="📌 Tips",
+                                                value="Please include screenshots or a short video if possible. It helps a ton!",
+                                                inline=False
+                                            )
+                                            log_prompt_embed.set_footer(text="💡 Uploading logs can reduce resolution time by 50%!")
                                             
-                                            # STEP 3: They got AI response and are still unsatisfied - escalate to human
-                                            elif response_type == 'ai':
-                                                # They got AI response and were still unsatisfied - escalate to human
-                                                print(f"⚠ ESCALATION PATH: AI → Human (user still unsatisfied after AI response)")
-                                                updated_status = 'Human Support'
-                                                escalated_threads.add(thread_id)  # Mark thread - bot stops talking
-                                                
-                                                # Get the user who triggered this (from the message that started the timer)
-                                                # We need to check if they're the post creator and not staff
-                                                user_who_triggered = None
-                                                thread_owner_id = None
-                                                should_show_log_prompt = False
-                                                
-                                                try:
-                                                    # Get thread owner
-                                                    if hasattr(thread_channel, 'owner_id') and thread_channel.owner_id:
-                                                        thread_owner_id = thread_channel.owner_id
-                                                    elif hasattr(thread_channel, 'owner') and thread_channel.owner:
-                                                        thread_owner_id = thread_channel.owner.id
-                                                    
-                                                    # Get the user who sent the message that triggered this (captured from message context)
-                                                    user_who_triggered = captured_user if 'captured_user' in locals() else None
-                                                    if user_who_triggered and thread_owner_id:
-                                                        is_creator = user_who_triggered.id == thread_owner_id
-                                                        is_staff = is_staff_or_admin(user_who_triggered) if isinstance(user_who_triggered, discord.Member) else False
-                                                        should_show_log_prompt = is_creator and not is_staff
-                                                except Exception as user_check_error:
-                                                    print(f"⚠ Error checking user for log prompt: {user_check_error}")
-                                                
-                                                if should_show_log_prompt:
-                                                    # First, ask for logs to help support team (only to post creator)
-                                                    log_prompt_embed = discord.Embed(
-                                                        title="📋 Before We Get Support...",
-                                                        description="To help our team solve this **much faster**, please include your **logs**!\n\nLogs contain error details that help us identify exactly what's wrong.",
-                                                        color=0xF39C12
-                                                    )
-                                                    log_prompt_embed.add_field(
-                                                        name="🧭 How to Get Logs (from the Macro)",
-                                                        value=(
-                                                            "1) Open the macro and go to **Status → Logs**\n"
-                                                            "2) Click **Copy Logs** → then paste here\n"
-                                                            "   - or -\n"
-                                                            "   Click **Open Logs Folder** → upload the most recent `.log` file"
-                                                        ),
-                                                        inline=False
-                                                    )
-                                                    log_prompt_embed.add_field(
-                                                        name="📌 Tips",
-                                                        value="Please include screenshots or a short video if possible. It helps a ton!",
-                                                        inline=False
-                                                    )
-                                                    log_prompt_embed.set_footer(text="💡 Uploading logs can reduce resolution time by 50%!")
-                                                    
-                                                    # Send the unified logs instructions (no OS selector needed anymore)
-                                                    await thread_channel.send(embed=log_prompt_embed)
-                                                    
-                                                    # Wait a moment, then send escalation message
-                                                    await asyncio.sleep(2)
-                                                else:
-                                                    print(f"ℹ Skipping log prompt - user is not post creator or is staff/admin")
-                                                
-                                                # Send escalation embed
-                                                escalate_embed = discord.Embed(
-                                                    title="👨‍💼 Support Team Notified",
-                                                    description="Our support team has been notified and will review your issue soon!",
-                                                    color=0xE67E22
-                                                )
-                                                escalate_embed.add_field(
-                                                    name="⏰ Response Time",
-                                                    value="Usually under 24 hours",
-                                                    inline=True
-                                                )
-                                                escalate_embed.add_field(
-                                                    name="📎 Helpful to Include",
-                                                    value="Screenshots, videos, or error messages",
-                                                    inline=True
-                                                )
-                                                escalate_embed.set_footer(text="Revolution Macro Support Team")
-                                                await thread_channel.send(embed=escalate_embed)
-                                                print(f"⚠ User unsatisfied after AI - escalating thread {thread_id} to Human Support")
+                                            # Send the unified logs instructions (no OS selector needed anymore)
+                                            await thread_channel.send(embed=log_prompt_embed)
                                             
-                                            # STEP 4: No response type tracked - default behavior
-                                            else:
-                                                print(f"⚠ No response type tracked for thread {thread_id}, defaulting to human escalation")
-                                                updated_status = 'Human Support'
-                                                escalated_threads.add(thread_id)
+                                            # Wait a moment, then send escalation message
+                                            await asyncio.sleep(2)
+                                        else:
+                                            print(f"ℹ Skipping log prompt - user is not post creator or is staff/admin")
                                         
-                                        # Update forum post status in dashboard
-                                        if updated_status != matching_post.get('status'):
-                                            # Only try to update if API is configured
-                                            if 'your-vercel-app' not in DATA_API_URL:
-                                                try:
-                                                    forum_api_url_delayed = DATA_API_URL.replace('/api/data', '/api/forum-posts')
-                                                    print(f"🔄 Updating dashboard status to '{updated_status}' for thread {thread_id}")
-                                                    
-                                                    async with aiohttp.ClientSession() as delayed_session:
-                                                        # Get current posts
-                                                        async with delayed_session.get(forum_api_url_delayed) as get_resp:
-                                                            if get_resp.status == 200:
-                                                                all_posts = await get_resp.json()
-                                                                current_post = None
-                                                                for p in all_posts:
-                                                                    if p.get('postId') == str(thread_id) or p.get('id') == f'POST-{thread_id}':
-                                                                        current_post = p
-                                                                        break
-                                                                
-                                                                if current_post:
-                                                                    current_post['status'] = updated_status
-                                                                    update_payload = {
-                                                                        'action': 'update',
-                                                                        'post': current_post
-                                                                    }
-                                                                    headers = {'Content-Type': 'application/json', 'Accept': 'application/json'}
-                                                                    async with delayed_session.post(forum_api_url_delayed, json=update_payload, headers=headers, timeout=aiohttp.ClientTimeout(total=5)) as update_resp:
-                                                                        if update_resp.status == 200:
-                                                                            print(f"✅ Successfully updated forum post status to '{updated_status}' for thread {thread_id}")
-                                                                            response_data = await update_resp.json()
-                                                                            print(f"   API response: {response_data}")
-                                                                        else:
-                                                                            error_text = await update_resp.text()
-                                                                            print(f"❌ Failed to update forum post status: HTTP {update_resp.status}")
-                                                                            print(f"   Error: {error_text[:200]}")
-                                                                else:
-                                                                    print(f"⚠ Could not find forum post with thread ID {thread_id} in dashboard")
-                                                            else:
-                                                                print(f"⚠ Failed to fetch forum posts from API: HTTP {get_resp.status}")
-                                                except Exception as e:
-                                                    print(f"❌ Error updating status after delayed analysis: {e}")
-                                                    import traceback
-                                                    traceback.print_exc()
-                                                else:
-                                                    print(f"ℹ Skipping dashboard update - API not configured")
-                                    except Exception as e:
-                                        print(f"⚠ Error in satisfaction analysis: {e}")
-                                        import traceback
-                                        traceback.print_exc()
-                        
-                        else:
-                            # Normal flow - update conversation
-                            post_update = {
-                                'action': 'update',
-                                'post': {
-                                    **matching_post,
-                                    'conversation': conversation,
-                                    'status': new_status
-                                }
-                            }
-                    else:
-                        # Create new post if it doesn't exist
-                        thread_name = thread.name if hasattr(thread, 'name') else 'New Thread'
-                        thread_created = thread.created_at if hasattr(thread, 'created_at') else datetime.now()
-                        
-                        post_update = {
-                            'action': 'create',
-                            'post': {
-                                'id': f'POST-{thread.id}',
-                                'user': {
-                                    'username': user_name,
-                                    'id': user_id,
-                                    'avatarUrl': avatar_url
-                                },
-                                'postTitle': thread_name,
-                                'status': 'Unsolved',
-                                'tags': [],
-                                'createdAt': thread_created.isoformat() if hasattr(thread_created, 'isoformat') else datetime.now().isoformat(),
-                                'forumChannelId': str(thread.parent_id),
-                                'postId': str(thread.id),
-                                'conversation': [new_message]
-                            }
-                        }
-                    
-                    # Update post immediately
-                    headers = {
-                        'Content-Type': 'application/json',
-                        'Accept': 'application/json'
-                    }
-                    async with session.post(forum_api_url, json=post_update, headers=headers, timeout=aiohttp.ClientTimeout(total=5)) as post_response:
-                        if post_response.status == 200:
-                            print(f"✓ Updated forum post with message from {user_name}")
-                        else:
-                            text = await post_response.text()
-                            print(f"⚠ Failed to update forum post with message: Status {post_response.status}, Response: {text[:100]}")
+                                        # Send escalation embed
+                                        escalate_embed = discord.Embed(
+                                            title="👨‍💼 Support Team Notified",
+                                            description="Our support team has been notified and will review your issue soon!",
+                                            color=0xE67E22
+                                        )
+                                        escalate_embed.add_field(
+                                            name="⏰ Response Time",
+                                            value="Usually under 24 hours",
+                                            inline=True
+                                        )
+                                        escalate_embed.add_field(
+                                            name="📎 Helpful to Include",
+                                            value="Screenshots, videos, or error messages",
+                                            inline=True
+                                        )
+                                        escalate_embed.set_footer(text="Revolution Macro Support Team")
+                                        await thread_channel.send(embed=escalate_embed)
+                                        print(f"⚠ User unsatisfied after AI - escalating thread {thread_id} to Human Support")
+                                    
+                                    # STEP 4: No response type tracked - default behavior
+                                    else:
+                                        print(f"⚠ No response type tracked for thread {thread_id}, defaulting to human escalation")
+                                        updated_status = 'Human Support'
+                                        escalated_threads.add(thread_id)
+                                
+                                # Update forum post status in dashboard
+                                if updated_status != matching_post.get('status'):
+                                    # Only the status change goes to the dashboard
+                                    print(f"🔄 Updating dashboard status to '{updated_status}' for thread {thread_id}")
+                                    if await forum_post_cache.set_status(thread_id, updated_status):
+                                        print(f"✅ Successfully updated forum post status to '{updated_status}' for thread {thread_id}")
+                            except Exception as e:
+                                print(f"⚠ Error in satisfaction analysis: {e}")
+                                import traceback
+                                traceback.print_exc()
+            else:
+                # Create new post if it doesn't exist
+                thread_name = thread.name if hasattr(thread, 'name') else 'New Thread'
+                thread_created = thread.created_at if hasattr(thread, 'created_at') else datetime.now()
+                
+                new_post = {
+                    'id': f'POST-{thread.id}',
+                    'user': {
+                        'username': user_name,
+                        'id': user_id,
+                        'avatarUrl': avatar_url
+                    },
+                    'postTitle': thread_name,
+                    'status': 'Unsolved',
+                    'tags': [],
+                    'createdAt': thread_created.isoformat() if hasattr(thread_created, 'isoformat') else datetime.now().isoformat(),
+                    'forumChannelId': str(thread.parent_id),
+                    'postId': str(thread.id),
+                    'conversation': [new_message]
+                }
+                if await forum_post_cache.create(new_post):
+                    print(f"✓ Created forum post with message from {user_name}")
         except Exception:
             pass  # Silently fail - bot continues working
     
@@ -6108,6 +7843,7 @@ async def on_thread_delete(thread):
         
         thread_id = thread.id
         print(f"🗑️ Forum post deleted: '{thread.name}' (ID: {thread_id})")
+        forum_post_cache.forget(thread_id)
         
         # Remove from dashboard
         forum_api_url = DATA_API_URL.replace('/api/data', '/api/forum-posts')
@@ -6117,7 +7853,7 @@ async def on_thread_delete(thread):
         }
         
         headers = {'Content-Type': 'application/json', 'Accept': 'application/json'}
-        async with aiohttp.ClientSession() as session:
+        async with dashboard_http.borrow() as session:
             async with session.post(forum_api_url, json=delete_data, headers=headers, timeout=aiohttp.ClientTimeout(total=5)) as response:
                 if response.status == 200:
                     print(f"✅ Deleted forum post from dashboard: {thread_id}")
@@ -6188,7 +7924,7 @@ async def reload(interaction: discord.Interaction):
         await interaction.followup.send("❌ You need Administrator permission to use this command.", ephemeral=True)
         return
     
-    success = await fetch_data_from_api()
+    success = await fetch_data_from_api(force_full=True)
     if success:
         await interaction.followup.send(f"✅ Data reloaded successfully from dashboard! Loaded {len(RAG_DATABASE)} RAG entries into memory.", ephemeral=False)
     else:
@@ -6525,7 +8261,7 @@ async def purge_forum_posts(interaction: discord.Interaction):
             await interaction.followup.send("❌ Discord bot token not configured. Cannot delete Discord threads.", ephemeral=False)
             return
         
-        async with aiohttp.ClientSession() as session:
+        async with dashboard_http.borrow() as session:
             # Delete each Discord forum thread
             for i, thread in enumerate(threads_to_delete, 1):
                 thread_id = str(thread.id)
@@ -7667,7 +9403,7 @@ async def list_high_priority_posts(interaction: discord.Interaction):
         
         forum_api_url = DATA_API_URL.replace('/api/data', '/api/forum-posts')
         
-        async with aiohttp.ClientSession() as session:
+        async with dashboard_http.borrow() as session:
             headers = {'Content-Type': 'application/json', 'Accept': 'application/json'}
             async with session.get(forum_api_url, headers=headers) as response:
                 if response.status != 200:
@@ -7793,7 +9529,7 @@ async def toggle_satisfaction_analysis(interaction: discord.Interaction, enabled
                 f"{status_emoji} Satisfaction analysis is now **{status_text}**!\n\n"
                 f"{'✅ The bot will automatically analyze user messages to detect satisfaction and escalate when needed.' if enabled else '❌ The bot will NOT automatically analyze satisfaction. Users can still click buttons to give feedback.'}\n\n"
                 f"💡 **Groq API Impact**: This saves ~1 API call per user reply (30 RPM limit)\n"
-                f"📊 **Current rate**: {sum(len(calls) for calls in groq_api_calls_by_key.values())} calls across {len(GROQ_API_KEYS)} key(s)",
+                f"📊 **Current rate**: {sum(limiter.recent_requests() for limiter in groq_key_manager.limiters.values())} calls/min across {len(GROQ_API_KEYS)} key(s)",
                 ephemeral=False
             )
             print(f"✓ Satisfaction analysis {status_text} by {interaction.user}")
@@ -7861,7 +9597,7 @@ async def status(interaction: discord.Interaction):
         )
         
         # Calculate total API calls across all keys (last minute)
-        total_recent_calls = sum(len(calls) for calls in groq_api_calls_by_key.values())
+        total_recent_calls = sum(limiter.recent_requests() for limiter in groq_key_manager.limiters.values())
         usage_stats = groq_key_manager.get_usage_stats()
         
         # Enhanced key statistics with health tracking
@@ -7870,7 +9606,7 @@ async def status(interaction: discord.Interaction):
         
         # Show detailed stats for each key
         for key_short, stats in list(usage_stats.items())[:4]:  # Show first 4 keys
-            calls_for_key_recent = len(groq_api_calls_by_key.get(key_short, deque()))
+            calls_for_key_recent = groq_key_manager.limiters[key_short].recent_requests()
             success_rate = stats.get('success_rate', 0)
             health = stats.get('health_score', 0)
             is_rate_limited = stats.get('rate_limited', False)
@@ -7900,7 +9636,7 @@ async def status(interaction: discord.Interaction):
             # Show error count if there are errors
             error_info = f", {errors} errors" if errors > 0 else ""
             key_stats_text += f"{status_icon} {key_short}:\n"
-            key_stats_text += f"  {calls_for_key_recent}/30 calls (last min), {success_rate:.0f}% success{error_info}\n"
+            key_stats_text += f"  {calls_for_key_recent}/{GROQ_RPM_LIMIT} calls (last min), {success_rate:.0f}% success{error_info}\n"
             key_stats_text += f"  Health: {health:.0f} | Total: {key_total_calls} calls\n"
         
         if len(usage_stats) > 4:
@@ -7912,6 +9648,24 @@ async def status(interaction: discord.Interaction):
             inline=True
         )
         
+        status_embed.add_field(
+            name="🔎 Retrieval",
+            value=format_retrieval_timings(),
+            inline=True
+        )
+        
+        status_embed.add_field(
+            name="⚡ Answer Latency",
+            value="\n".join([f"**Streaming:** {'on' if STREAM_AI_RESPONSES else 'off'}"] + format_latency_samples(answer_timings)),
+            inline=True
+        )
+        
+        status_embed.add_field(
+            name="💾 Caches",
+            value=f"{ai_response_cache.format_stats()}\n{_disk_answer_cache.format_stats()}\n{_query_embedding_cache.format_stats()}\n{_semantic_answer_cache.format_stats()}\n{format_single_flight_stats()}\n{forum_post_cache.format_stats()}",
+            inline=False
+        )
+        
         status_embed.add_field(
             name="📺 Forum Channel",
             value=channel_info,
@@ -7924,6 +9678,12 @@ async def status(interaction: discord.Interaction):
             inline=True
         )
         
+        status_embed.add_field(
+            name="🌐 Dashboard HTTP",
+            value=f"{dashboard_http.format_stats()}\n{format_data_sync_stats()}\n{settings_writer.format_stats()}"[:1024],
+            inline=False
+        )
+        
         status_embed.add_field(
             name="🧠 System Prompt",
             value=f"Using {'custom' if SYSTEM_PROMPT_TEXT else 'default'} prompt",
@@ -7988,15 +9748,17 @@ async def api_info(interaction: discord.Interaction):
         )
         
         # API keys info
-        keys_info = f"**Total Keys:** {len(GROQ_API_KEYS)}\n"
+        keys_info = f"**Total Keys:** {len(GROQ_API_KEYS)} ({groq_key_manager.format_lease_status()})\n"
         usage_stats = groq_key_manager.get_usage_stats()
         for i, key in enumerate(GROQ_API_KEYS, 1):
             key_short = key[:10] + '...'
             key_stats = usage_stats.get(key_short, {})
             total_calls = key_stats.get('total_calls', 0) if isinstance(key_stats, dict) else 0
-            recent_calls = len(groq_api_calls_by_key.get(key_short, deque()))
-            current_indicator = " (current)" if i - 1 == groq_key_manager.current_key_index else ""
-            keys_info += f"**Key {i}:** {key_short} - {total_calls} total, {recent_calls} recent{current_indicator}\n"
+            recent_calls = groq_key_manager.limiters[key_short].recent_requests()
+            in_flight = groq_key_manager.key_in_flight[key_short]
+            retired_for = groq_key_manager.limiters[key_short].retired_for()
+            limit_indicator = f", rate limited {retired_for:.0f}s" if retired_for > 0 else ""
+            keys_info += f"**Key {i}:** {key_short} - {total_calls} total, {recent_calls} recent, {in_flight} in flight{limit_indicator}\n"
         
         api_embed.add_field(
             name="🔑 Groq API Keys",
@@ -8080,7 +9842,7 @@ async def test_api_keys(interaction: discord.Interaction):
     
     embed = discord.Embed(
         title="🔍 Testing API Keys",
-        description=f"Testing {len(GROQ_API_KEYS)} key(s) with primary model: `openai/gpt-oss-120b`...",
+        description=f"Testing {len(GROQ_API_KEYS)} key(s) with primary model: `{model_router.candidates(1)[0]}`...",
         color=discord.Color.blue()
     )
     await interaction.followup.send(embed=embed, ephemeral=True)
@@ -8089,30 +9851,28 @@ async def test_api_keys(interaction: discord.Interaction):
         key_short = test_key[:15] + '...' if len(test_key) > 15 else test_key
         key_name = f"GROQ_API_KEY" if i == 1 else f"GROQ_API_KEY_{i}"
         
-        # Try multiple models to find one that works
-        models_to_try = [
-            'openai/gpt-oss-120b',  # Primary model
-            'llama-3.3-70b-versatile',  # Latest and most capable fallback
-            'llama-3.1-70b-versatile',  # Previous generation, very reliable
-            'mixtral-8x7b-32768',  # Good for longer context
-            'gemma2-9b-it',  # Lightweight fallback
-            'llama-3.1-8b-instant'  # Fastest fallback
-        ]
+        # Try models in router order (healthiest first, circuit-broken models skipped)
+        models_to_try = model_router.candidates()
         model_worked = False
         working_model = None
         
         for model_name in models_to_try:
             try:
-                client = Groq(api_key=test_key)
-                test_response = client.chat.completions.create(
-                    model=model_name,
-                    messages=[{"role": "user", "content": "Say hello"}],
-                    max_tokens=10
+                client = groq_transport.client(test_key)
+                call_started = time.perf_counter()
+                test_response = await asyncio.wait_for(
+                    client.chat.completions.create(
+                        model=model_name,
+                        messages=[{"role": "user", "content": "Say hello"}],
+                        max_tokens=10
+                    ),
+                    timeout=15.0
                 )
                 
                 if test_response and test_response.choices and len(test_response.choices) > 0:
                     content = test_response.choices[0].message.content
                     if content:
+                        model_router.record_success(model_name, time.perf_counter() - call_started)
                         working_keys.append((i, key_name, key_short, model_name))
                         model_worked = True
                         working_model = model_name
@@ -8120,6 +9880,7 @@ async def test_api_keys(interaction: discord.Interaction):
             except Exception as e:
                 error_str = str(e).lower()
                 error_msg = str(e)[:200]
+                model_router.record_failure(model_name, e)
                 
                 if 'not found' in error_str or '404' in error_str:
                     # Model not available, try next one
@@ -8174,11 +9935,10 @@ async def check_api_keys(interaction: discord.Interaction):
     try:
         usage_stats = groq_key_manager.get_usage_stats()
         total_keys = len(groq_key_manager.api_keys)
-        current_key = groq_key_manager.get_current_key()
         
         key_embed = discord.Embed(
             title="🔑 API Key Statistics",
-            description=f"**{total_keys}** keys loaded | Current: `{current_key[:20]}...`",
+            description=f"**{total_keys}** keys loaded | {groq_key_manager.format_lease_status()}",
             color=0x5865F2
         )
         
@@ -8191,8 +9951,8 @@ async def check_api_keys(interaction: discord.Interaction):
             health_score = stats.get('health_score', 0)
             is_rate_limited = stats.get('rate_limited', False)
             
-            # Get recent calls from rate limit tracker
-            recent_calls = len(groq_api_calls_by_key.get(key_short, deque()))
+            # Get recent calls from the key's token bucket
+            recent_calls = groq_key_manager.limiters[key_short].recent_requests()
             
             # Determine status based on health score and rate limit
             if is_rate_limited:
@@ -8212,13 +9972,21 @@ async def check_api_keys(interaction: discord.Interaction):
                 name=f"{status_icon} Key {i}: {key_short}",
                 value=(
                     f"**Status:** {status_text}\n"
-                    f"**Total Calls:** {total_calls} ({recent_calls} in last min)\n"
+                    f"**Total Calls:** {total_calls} ({recent_calls} in last min, {stats.get('in_flight', 0)} in flight)\n"
+                    f"**Budget Used:** {stats.get('utilization', 0):.0%} of RPM/TPM\n"
                     f"**Success Rate:** {success_rate:.1f}% ({success_calls} success, {errors} errors)\n"
                     f"**Health Score:** {health_score:.0f}"
                 ),
                 inline=True
             )
         
+        # Model router state: per-model success/latency and open circuits
+        key_embed.add_field(
+            name="🧭 Model Router",
+            value=model_router.format_status()[:1024],
+            inline=False
+        )
+        
         # Add note about Groq API keys
         if total_keys > 1:
             key_embed.add_field(
@@ -8305,7 +10073,7 @@ async def export_data(interaction: discord.Interaction):
             await interaction.followup.send("⚠️ API not configured. Cannot export data.", ephemeral=True)
             return
         
-        async with aiohttp.ClientSession() as session:
+        async with dashboard_http.borrow() as session:
             async with session.get(DATA_API_URL, timeout=aiohttp.ClientTimeout(total=10)) as response:
                 if response.status != 200:
                     await interaction.followup.send(f"❌ Failed to fetch data: Status {response.status}", ephemeral=True)
@@ -8450,6 +10218,8 @@ def is_friend_server(interaction: discord.Interaction) -> bool:
 @bot.tree.command(name="ask", description="Ask the bot a question using the RAG knowledge base.")
 async def ask(interaction: discord.Interaction, question: str):
     """Query the RAG knowledge base - available to everyone on friends server, staff only on main server"""
+    ask_started = time.perf_counter()
+    ask_deadline = Deadline(ASK_ANSWER_DEADLINE_SECONDS)
     try:
         # On friend's server, allow everyone to use /ask but with 10 minute cooldown
         # On other servers, require staff role or admin (no cooldown)
@@ -8457,9 +10227,10 @@ async def ask(interaction: discord.Interaction, question: str):
             # Check cooldown for friends server BEFORE deferring
             user_id = interaction.user.id
             current_time = datetime.now().timestamp()
-            if user_id in ask_cooldowns:
-                time_since_last_use = current_time - ask_cooldowns[user_id]
-                cooldown_seconds = 600  # 10 minute cooldown
+            last_used = ask_cooldowns.get(user_id)
+            if last_used is not None:
+                time_since_last_use = current_time - last_used
+                cooldown_seconds = ASK_COOLDOWN_SECONDS
                 if time_since_last_use < cooldown_seconds:
                     remaining = int(cooldown_seconds - time_since_last_use)
                     remaining_minutes = remaining // 60
@@ -8476,7 +10247,7 @@ async def ask(interaction: discord.Interaction, question: str):
                         )
                     return
             # Update cooldown
-            ask_cooldowns[user_id] = current_time
+            ask_cooldowns.set(user_id, current_time)
             # Defer after cooldown check passes
             await interaction.response.defer(ephemeral=False)
         else:
@@ -8514,11 +10285,11 @@ async def ask(interaction: discord.Interaction, question: str):
         # Step 2: No auto-response found - use RAG knowledgebase with Pinecone (same as forum posts)
         # Use the same find_relevant_rag_entries function that prioritizes Pinecone
         print(f"🔍 /ask: Searching RAG database for: '{question[:50]}...'")
-        relevant_docs = find_relevant_rag_entries(question, RAG_DATABASE, top_k=5, similarity_threshold=0.2)
+        relevant_docs = await find_relevant_rag_entries_async(question, RAG_DATABASE, top_k=5, similarity_threshold=0.2, deadline=ask_deadline)
         
         # Log for debugging
         if relevant_docs:
-            print(f"📊 /ask: Found {len(relevant_docs)} relevant RAG entries using {'Pinecone' if USE_PINECONE else 'keyword'} search")
+            print(f"📊 /ask: Found {len(relevant_docs)} relevant RAG entries using {retrieval_backend_name()} search")
             for i, doc in enumerate(relevant_docs[:3], 1):
                 print(f"   {i}. '{doc.get('title', 'Unknown')}'")
         else:
@@ -8529,21 +10300,20 @@ async def ask(interaction: discord.Interaction, question: str):
         rag_context = relevant_docs[:2] if relevant_docs else []
         
         # Generate AI response (/ask command doesn't have access to images)
+        answer_stream = None
+        if STREAM_AI_RESPONSES:
+            answer_stream = StreamingAnswerMessage(
+                functools.partial(interaction.followup.send, ephemeral=False, wait=True),
+                "✅ AI Response", 0x2ECC71, ask_started
+            )
         try:
-            ai_response = await generate_ai_response(question, rag_context, None)
+            ai_response = await generate_ai_response(question, rag_context, None, stream_to=answer_stream, deadline=ask_deadline)
             if not ai_response or len(ai_response.strip()) == 0:
                 raise Exception("Empty response from AI")
         except Exception as ai_error:
             print(f"⚠️ /ask: AI generation failed: {ai_error}")
             # If we have RAG matches, show them directly as fallback
-            if relevant_docs:
-                top_doc = relevant_docs[0]
-                doc_title = top_doc.get('title', 'Relevant Entry')
-                doc_content = top_doc.get('content', '')
-                content_preview = doc_content[:1500] + "..." if len(doc_content) > 1500 else doc_content
-                ai_response = f"I found information in my knowledge base about **{doc_title}**:\n\n{content_preview}\n\n*Note: I'm having trouble connecting to my AI service right now, but here's the relevant information from my knowledge base.*"
-            else:
-                ai_response = "I couldn't find any relevant information in my knowledge base for your question, and I'm having trouble connecting to my AI service right now. A human support agent will help you shortly."
+            ai_response = degraded_answer(relevant_docs)
         
         # Format AI response into structured embed
         embed = format_ai_response_embed(
@@ -8557,7 +10327,10 @@ async def ask(interaction: discord.Interaction, question: str):
         if not relevant_docs:
             embed.set_footer(text="AI-generated response (no RAG matches found)")
         
-        await interaction.followup.send(embed=embed, ephemeral=False)
+        if answer_stream is not None:
+            await answer_stream.finish(embed)
+        else:
+            await interaction.followup.send(embed=embed, ephemeral=False)
             
     except Exception as e:
         print(f"Error in /ask command: {e}")
@@ -8641,32 +10414,9 @@ async def mark_as_solved(interaction: discord.Interaction):
             )
             return
         
-        # Update forum post status in dashboard
-        if 'your-vercel-app' not in DATA_API_URL:
-            try:
-                forum_api_url = DATA_API_URL.replace('/api/data', '/api/forum-posts')
-                async with aiohttp.ClientSession() as session:
-                    async with session.get(forum_api_url) as get_response:
-                        if get_response.status == 200:
-                            all_posts = await get_response.json()
-                            current_post = None
-                            for p in all_posts:
-                                if p.get('postId') == str(thread_id) or p.get('id') == f'POST-{thread_id}':
-                                    current_post = p
-                                    break
-                            
-                            if current_post:
-                                current_post['status'] = 'Solved'
-                                update_payload = {
-                                    'action': 'update',
-                                    'post': current_post
-                                }
-                                headers = {'Content-Type': 'application/json', 'Accept': 'application/json'}
-                                async with session.post(forum_api_url, json=update_payload, headers=headers, timeout=aiohttp.ClientTimeout(total=5)) as post_response:
-                                    if post_response.status == 200:
-                                        print(f"✅ Updated forum post status to Solved (no RAG)")
-            except Exception as e:
-                print(f"⚠ Error updating dashboard: {e}")
+        # Update forum post status in dashboard (just the status, not the whole post)
+        if await forum_post_cache.set_status(thread_id, 'Solved'):
+            print(f"✅ Updated forum post status to Solved (no RAG)")
         
         # Increment leaderboard for staff member
         await increment_leaderboard(interaction.user)
@@ -8758,45 +10508,15 @@ async def mark_as_solved_with_review(interaction: discord.Interaction):
         if rag_entry:
             # Update forum post status to Solved
             thread = interaction.channel
-            forum_api_url = DATA_API_URL.replace('/api/data', '/api/forum-posts')
             data_api_url = DATA_API_URL
             
             if 'your-vercel-app' not in DATA_API_URL:
                 try:
-                    async with aiohttp.ClientSession() as session:
-                        # Update forum post status to Solved
-                        async with session.get(forum_api_url) as get_response:
-                            current_posts = []
-                            if get_response.status == 200:
-                                current_posts = await get_response.json()
-                            
-                            # Find matching post
-                            matching_post = None
-                            for post in current_posts:
-                                if post.get('postId') == str(thread.id) or post.get('id') == f'POST-{thread.id}':
-                                    matching_post = post
-                                    break
-                            
-                            if matching_post:
-                                # Update post status to Solved
-                                matching_post['status'] = 'Solved'
-                                
-                                post_update = {
-                                    'action': 'update',
-                                    'post': matching_post
-                                }
-                                
-                                headers = {
-                                    'Content-Type': 'application/json',
-                                    'Accept': 'application/json'
-                                }
-                                async with session.post(forum_api_url, json=post_update, headers=headers, timeout=aiohttp.ClientTimeout(total=5)) as post_response:
-                                    if post_response.status == 200:
-                                        print(f"✓ Updated forum post status to Solved for thread {thread.id}")
-                                    else:
-                                        text = await post_response.text()
-                                        print(f"⚠ Failed to update forum post status: Status {post_response.status}, Response: {text[:100]}")
-            
+                    async with dashboard_http.borrow() as session:
+                        # Update forum post status to Solved (just the status, not the whole post)
+                        if await forum_post_cache.set_status(thread.id, 'Solved'):
+                            print(f"✓ Updated forum post status to Solved for thread {thread.id}")
+                        
                         # Create pending RAG entry for review
                         async with session.get(data_api_url) as get_data_response:
                             current_data = {'ragEntries': [], 'autoResponses': [], 'pendingRagEntries': []}
@@ -8833,6 +10553,10 @@ async def mark_as_solved_with_review(interaction: discord.Interaction):
                             print(f"💾 Attempting to save pending RAG entry: '{new_pending_entry['title']}'")
                             print(f"   Total pending RAG entries after save: {len(pending_entries)}")
                             
+                            headers = {
+                                'Content-Type': 'application/json',
+                                'Accept': 'application/json'
+                            }
                             async with session.post(data_api_url, json=save_data, headers=headers, timeout=aiohttp.ClientTimeout(total=10)) as save_response:
                                 if save_response.status == 200:
                                     result = await save_response.json()
@@ -9137,6 +10861,18 @@ async def leaderboard(interaction: discord.Interaction):
         await interaction.followup.send(f"❌ An error occurred: {str(e)}", ephemeral=True)
 
 # --- RUN THE BOT WITH AUTO-RESTART ---
+# Set by SIGTERM (Railway stops containers with it) so the restart loop exits and the shutdown cleanup runs
+_shutdown_requested = False
+
+def request_shutdown(signame):
+    """Signal handler: close the bot without restarting it"""
+    global _shutdown_requested
+    if _shutdown_requested:
+        return
+    _shutdown_requested = True
+    print(f"\n⚠️ Received {signame} - shutting down")
+    asyncio.ensure_future(bot.close())
+
 async def run_bot_with_restart():
     """Run the bot with automatic restart on crashes"""
     max_retries = 10
@@ -9151,6 +10887,8 @@ async def run_bot_with_restart():
             print("\n⚠️ Bot stopped by user (KeyboardInterrupt)")
             break
         except Exception as e:
+            if _shutdown_requested:
+                break
             retry_count += 1
             error_type = type(e).__name__
             print(f"\n❌ Bot crashed: {error_type}: {str(e)}")
@@ -9166,6 +10904,9 @@ async def run_bot_with_restart():
                 print(f"❌ Max retries ({max_retries}) reached. Bot stopped.")
                 raise
         else:
+            if _shutdown_requested:
+                print("✅ Bot closed for shutdown")
+                break
             # If bot exits normally (shouldn't happen), restart
             print("⚠️ Bot exited unexpectedly. Restarting...")
             retry_count = 0
@@ -9182,11 +10923,24 @@ def handle_exception(loop, context):
     else:
         print(f"⚠️ Unhandled error in event loop: {context.get('message', 'Unknown error')}")
 
+def run_shutdown_step(loop, name, step):
+    """Run one cleanup step (sync or async) so a failure can't skip the steps after it"""
+    try:
+        result = step()
+        if asyncio.iscoroutine(result):
+            loop.run_until_complete(result)
+    except Exception as e:
+        print(f"⚠️ Shutdown step '{name}' failed: {type(e).__name__}: {e}")
+
 if __name__ == "__main__":
     # Set up global exception handler
     loop = asyncio.new_event_loop()
     asyncio.set_event_loop(loop)
     loop.set_exception_handler(handle_exception)
+    try:
+        loop.add_signal_handler(signal.SIGTERM, request_shutdown, 'SIGTERM')
+    except NotImplementedError:
+        pass  # Windows event loops have no signal handlers (Ctrl+C still raises KeyboardInterrupt)
     
     try:
         # Run bot with auto-restart
@@ -9194,4 +10948,10 @@ if __name__ == "__main__":
     except KeyboardInterrupt:
         print("\n⚠️ Bot stopped by user")
     finally:
+        # Queued dashboard writes go out before the pooled session closes; each step runs even if one before it fails
+        run_shutdown_step(loop, 'flush forum posts', forum_post_cache.flush)
+        run_shutdown_step(loop, 'flush bot settings', settings_writer.flush)
+        run_shutdown_step(loop, 'close dashboard HTTP', dashboard_http.close)
+        run_shutdown_step(loop, 'close Groq transport', groq_transport.close)
+        run_shutdown_step(loop, 'close AI answer cache', _disk_answer_cache.close)
         loop.close()
\ No newline at end of file
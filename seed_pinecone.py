@@ -1,37 +1,45 @@
 import os
+import time
 import requests
 from pinecone import Pinecone
 from sentence_transformers import SentenceTransformer
 
 api_url = os.environ["DATA_API_URL"]
 index_name = os.environ["PINECONE_INDEX_NAME"]
+batch_size = int(os.environ.get("EMBEDDING_BATCH_SIZE", "64"))
 
 pc = Pinecone(api_key=os.environ["PINECONE_API_KEY"])
 index = pc.Index(index_name)
 model = SentenceTransformer("all-MiniLM-L6-v2")
 
 data = requests.get(api_url, timeout=15).json()
-vectors = []
-for entry in data.get("ragEntries", []):
-    eid = entry.get("id")
-    if not eid:
-        continue
-    text = f"{entry.get('title','')}\n{' '.join(entry.get('keywords', []))}\n{entry.get('content','')[:500]}"
-    vec = model.encode(text).tolist()
-    vectors.append({
-        "id": eid,
-        "values": vec,
+entries = [entry for entry in data.get("ragEntries", []) if entry.get("id")]
+texts = [
+    f"{entry.get('title','')}\n{' '.join(entry.get('keywords', []))}\n{entry.get('content','')[:500]}"
+    for entry in entries
+]
+
+# Encode in batches and upsert each batch as soon as it is ready
+started = time.monotonic()
+upserted = 0
+for i in range(0, len(entries), batch_size):
+    batch = entries[i:i+batch_size]
+    vecs = model.encode(texts[i:i+batch_size], batch_size=batch_size, normalize_embeddings=True)
+    vectors = [{
+        "id": entry["id"],
+        "values": vec.tolist(),
         "metadata": {
             "title": entry.get("title","")[:1000],
             "content": entry.get("content","")[:1000],
             "keywords": " ".join(entry.get("keywords", []))[:500],
-            "entry_id": eid
+            "entry_id": entry["id"]
         }
-    })
-
-for i in range(0, len(vectors), 100):
-    index.upsert(vectors=vectors[i:i+100])
+    } for entry, vec in zip(batch, vecs)]
+    for j in range(0, len(vectors), 100):
+        index.upsert(vectors=vectors[j:j+100])
+    upserted += len(vectors)
 
-print(f"Upserted {len(vectors)} vectors to Pinecone")
+elapsed = max(time.monotonic() - started, 1e-6)
+print(f"Upserted {upserted} vectors to Pinecone in {elapsed:.1f}s ({upserted / elapsed:.0f} entries/sec)")
 print("Stats:", index.describe_index_stats())
 